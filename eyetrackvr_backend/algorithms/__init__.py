@@ -5,3 +5,4 @@ from .hsrac import HSRAC
 
 # from .ransac import RANSAC
 from .ahsf import AHSF
+from .intensity import Intensity
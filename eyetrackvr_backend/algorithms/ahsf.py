@@ -31,7 +31,7 @@ import cv2
 import numpy as np
 from cv2.typing import MatLike
 from functools import lru_cache
-from ..utils import BaseAlgorithm
+from ..utils import BaseAlgorithm, Overlay
 from ..processes import EyeProcessor
 from ..types import EyeData, TrackerPosition, TRACKING_FAILED
 
@@ -39,30 +39,45 @@ from ..types import EyeData, TrackerPosition, TRACKING_FAILED
 lru_maxsize_vvs = 16
 lru_maxsize_vs = 64
 lru_maxsize_s = 128
+# `degrade` grows the search steps up to this many times the default steps
+max_step_scale = 3
 
 
 class AHSF(BaseAlgorithm):
+    supports_search_window = True
+
     def __init__(self, eye_processor: EyeProcessor):
         self.ep = eye_processor
-
-    def draw_coarse(self, frame, pupil_rect, outer_rect, center_fitting):
+        self.step_scale = 1
+
+    def degrade(self) -> bool:
+        if self.step_scale >= max_step_scale:
+            return False
+        self.step_scale += 1
+        self.ep.logger.info(f"AHSF is running over its time budget, searching with {self.step_scale}x the step size")
+        return True
+
+    def draw_coarse(self, layer, pupil_rect, outer_rect, center_fitting, offset):
+        # the detection ran on the padded square frame, the overlay is the size of the original frame
+        x_offset, y_offset = offset
         cv2.rectangle(
-            frame,
-            (pupil_rect[0], pupil_rect[1]),
-            (pupil_rect[0] + pupil_rect[2], pupil_rect[1] + pupil_rect[3]),
-            (0, 0, 0),
+            layer,
+            (pupil_rect[0] - x_offset, pupil_rect[1] - y_offset),
+            (pupil_rect[0] + pupil_rect[2] - x_offset, pupil_rect[1] + pupil_rect[3] - y_offset),
+            (0, 255, 255),
             1,
         )
         cv2.rectangle(
-            frame,
-            (outer_rect[0], outer_rect[1]),
-            (outer_rect[0] + outer_rect[2], outer_rect[1] + outer_rect[3]),
+            layer,
+            (outer_rect[0] - x_offset, outer_rect[1] - y_offset),
+            (outer_rect[0] + outer_rect[2] - x_offset, outer_rect[1] + outer_rect[3] - y_offset),
             (105, 105, 105),
             1,
         )
-        cv2.drawMarker(frame, center_fitting, (255, 255, 255), cv2.MARKER_CROSS, 15, 1)
+        center = (center_fitting[0] - x_offset, center_fitting[1] - y_offset)
+        cv2.drawMarker(layer, center, (255, 255, 255), cv2.MARKER_CROSS, 15, 1)
 
-    def run(self, frame: MatLike, tracker_position: TrackerPosition) -> tuple[EyeData, MatLike]:
+    def run(self, frame: MatLike, tracker_position: TrackerPosition, overlay: Overlay) -> EyeData:
         average_color = np.mean(frame)  # type: ignore[arg-type]
         # Get the dimensions of the rotated image
         height, width = frame.shape
@@ -88,8 +103,8 @@ class AHSF(BaseAlgorithm):
             "kf": 2,  # noise filter. May lose tracking if too high (or even never start)
             "width_min": frame.shape[1] * 0.08,  # Minimum width of the pupil
             "width_max": frame.shape[1] * 0.5,  # Maximum width of the pupil
-            "wh_step": 5,  # Pupil width and height step search size
-            "xy_step": 10,  # Kernel movement step search size
+            "wh_step": 5 * self.step_scale,  # Pupil width and height step search size
+            "xy_step": 10 * self.step_scale,  # Kernel movement step search size
             "roi": (0, 0, frame.shape[1], frame.shape[0]),
             "init_rect_flag": False,
             "init_rect": (0, 0, frame.shape[1], frame.shape[0]),
@@ -104,18 +119,19 @@ class AHSF(BaseAlgorithm):
             ) = coarse_detection(frame, params)
             ellipse_rect, center_fitting = fine_detection(frame, pupil_rect_coarse)
         except TypeError:
-            return TRACKING_FAILED, frame
+            return TRACKING_FAILED
 
         # x = outer_rect_coarse[0] + outer_rect_coarse[2] / 2
         # y = outer_rect_coarse[1] + outer_rect_coarse[3] / 2
         x = center_fitting[0]
         y = center_fitting[1]
-        self.draw_coarse(frame, pupil_rect_coarse, outer_rect_coarse, center_fitting)
+        if (layer := overlay.layer()) is not None:
+            self.draw_coarse(layer, pupil_rect_coarse, outer_rect_coarse, center_fitting, (x_offset, y_offset))
 
         x = x / frame.shape[1]
         y = y / frame.shape[0]
 
-        return EyeData(x, y, 1, tracker_position), frame
+        return EyeData(x, y, 1, tracker_position)
 
 
 @lru_cache(maxsize=lru_maxsize_vvs)
@@ -29,16 +29,18 @@ This project is licensed under the MIT License. See LICENSE for more details.
 
 import cv2
 from cv2.typing import MatLike
-from ..utils import BaseAlgorithm
+from ..utils import BaseAlgorithm, Overlay
 from ..processes import EyeProcessor
 from ..types import EyeData, TrackerPosition, TRACKING_FAILED
 
 
 class Blob(BaseAlgorithm):
+    supports_search_window = True
+
     def __init__(self, eye_processor: EyeProcessor):
         self.ep = eye_processor
 
-    def run(self, frame: MatLike, tracker_position: TrackerPosition) -> tuple[EyeData, MatLike]:
+    def run(self, frame: MatLike, tracker_position: TrackerPosition, overlay: Overlay) -> EyeData:
         _, larger_threshold = cv2.threshold(frame, self.ep.config.blob.threshold, 255, cv2.THRESH_BINARY)
 
         try:
@@ -49,10 +51,10 @@ class Blob(BaseAlgorithm):
             # If we have no contours, we have nothing to blob track. Fail here.
             if len(contours) == 0:
                 self.ep.logger.warning(f"Failed to find any contours for {self.ep.tracker_position.name}")
-                return TRACKING_FAILED, frame
+                return TRACKING_FAILED
         except (cv2.error, Exception):
             self.ep.logger.exception("Something went wrong!")
-            return TRACKING_FAILED, frame
+            return TRACKING_FAILED
 
         for cnt in contours:
             (x, y, w, h) = cv2.boundingRect(cnt)
@@ -68,9 +70,12 @@ class Blob(BaseAlgorithm):
             x = x + int(w / 2)
             y = y + int(h / 2)
 
-            cv2.drawContours(frame, [cnt], -1, (0, 255, 0), 3)
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
+            if (layer := overlay.layer()) is not None:
+                cv2.drawContours(layer, [cnt], -1, (0, 255, 0), 3)
+                cv2.rectangle(layer, (x, y), (x + w, y + h), (255, 0, 0), 2)
 
-            return EyeData(x, y, 1, tracker_position), frame
+            # like every other algorithm, return the position relative to the frame size instead of in pixels
+            tx, ty = self.normalize(x, y, frame.shape[1], frame.shape[0])
+            return EyeData(tx, ty, 1, tracker_position)
 
-        return TRACKING_FAILED, frame
+        return TRACKING_FAILED
@@ -40,7 +40,7 @@ from copy import deepcopy
 from functools import lru_cache
 from cv2.typing import MatLike, Point
 from ..processes import EyeProcessor
-from ..utils import BaseAlgorithm, safe_crop
+from ..utils import BaseAlgorithm, Overlay, safe_crop
 from ..types import EyeData, TrackerPosition, TRACKING_FAILED
 
 
@@ -52,6 +52,8 @@ lru_maxsize_s = 128
 default_radius = 20
 auto_radius_range = (default_radius - 18, default_radius + 15)  # (10,30)
 auto_radius_step = 1
+# `degrade` grows the step up to this many times the configured step
+max_step_scale = 3
 
 
 class CVMode(Enum):
@@ -62,6 +64,8 @@ class CVMode(Enum):
 
 
 class HSF(BaseAlgorithm):
+    supports_search_window = True
+
     def __init__(self, eye_processor: EyeProcessor):
         self.ep = eye_processor
         self.mode = CVMode.FIRST_FRAME
@@ -71,8 +75,17 @@ class HSF(BaseAlgorithm):
         self.center_correct = CenterCorrection()
         self.cvparam = CvParameters(default_radius, self.ep.config.hsf.default_step)
 
+    def degrade(self) -> bool:
+        step_x, step_y = self.cvparam.step
+        default_x, default_y = self.ep.config.hsf.default_step
+        if step_x >= default_x * max_step_scale and step_y >= default_y * max_step_scale:
+            return False
+        self.cvparam.step = (min(step_x + default_x, default_x * max_step_scale), min(step_y + default_y, default_y * max_step_scale))
+        self.ep.logger.info(f"HSF is running over its time budget, increasing the step to {self.cvparam.step}")
+        return True
+
     # TODO: i would like to split this into smaller functions
-    def run(self, frame: MatLike, tracker_position: TrackerPosition) -> tuple[EyeData, MatLike]:
+    def run(self, frame: MatLike, tracker_position: TrackerPosition, overlay: Overlay) -> EyeData:
         # adjustment of radius
         if self.mode == CVMode.RADIUS_ADJUST:
             self.cvparam.radius = self.auto_radius_calc.get_radius()
@@ -142,9 +155,10 @@ class HSF(BaseAlgorithm):
         cropped_image = safe_crop(frame, lower_x, lower_y, upper_x, upper_y)
         if 0 in cropped_image.shape:
             self.ep.logger.error("Cropped image has bad dimensions, skipping frame.")
-            return TRACKING_FAILED, frame
+            return TRACKING_FAILED
 
         blink = 1
+        layer = overlay.layer()
         match self.mode:
             case CVMode.NORMAL:
                 orig_x, orig_y = deepcopy((center_x, center_y))
@@ -160,7 +174,8 @@ class HSF(BaseAlgorithm):
                     # FIXME: since this is binary blink we should use a smoothing function to avoid flickering from false negatives
                     blink = 0
 
-                cv2.circle(frame, (orig_x, orig_y), 6, (0, 0, 255), -1)
+                if layer is not None:
+                    cv2.circle(layer, (orig_x, orig_y), 6, (0, 0, 255), -1)
             case CVMode.BLINK_ADJUST:  # We dont have enough frames yet, gather more data
                 if self.blink_detector.response_len() < self.ep.config.hsf.blink_stat_frames:
                     lower_x = center_x - max(20, radius)
@@ -190,7 +205,8 @@ class HSF(BaseAlgorithm):
                 self.auto_radius_calc.add_response(radius, response)
             case _:
                 self.ep.logger.error(f"Invalid mode: {self.mode}")
-        cv2.circle(frame, (center_x, center_y), 3, (255, 0, 0), -1)
+        if layer is not None:
+            cv2.circle(layer, (center_x, center_y), 3, (255, 0, 0), -1)
 
         # Moving from first_frame to the next mode
         if self.mode == CVMode.FIRST_FRAME:
@@ -210,7 +226,7 @@ class HSF(BaseAlgorithm):
         x = center_x / frame.shape[1]
         y = center_y / frame.shape[0]
 
-        return EyeData(x, y, blink, tracker_position), frame
+        return EyeData(x, y, blink, tracker_position)
 
 
 # If you want to update response_max. it may be more cost-effective to rewrite response_list in the following way
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+from typing import Final
+from cv2.typing import MatLike
+from ..processes import EyeProcessor
+from ..utils import BaseAlgorithm, Overlay, clamp
+from ..types import EyeData, TrackerPosition
+
+# frames are shrunk by this factor before we look at them, the openness doesnt need any detail
+INTENSITY_SCALE: Final = 4
+# how many responses we keep to figure out what a open and a closed eye look like
+INTENSITY_HISTORY: Final = 1024
+# percentiles of the history that count as fully open and fully closed
+OPEN_PERCENTILE: Final = 5
+CLOSED_PERCENTILE: Final = 99
+# smallest difference between a open and closed eye in gray values, so noise on a eye that never blinked isnt a blink
+MIN_RESPONSE_RANGE: Final = 40
+
+
+class Intensity(BaseAlgorithm):
+    """Cheap openness estimate from how dark the darkest part of the eye is, made for `blink_order`.
+
+    The pupil is the darkest part of a open eye, once the eyelid covers it the darkest area gets a lot brighter.
+    Like the `BlinkDetector` of HSF what open and closed look like is learned from the previous frames, until
+    `calibration_frames` frames were seen the eye is always reported as open.
+    The darkest point is returned as a rough pupil position, it is only good enough for a fallback gaze.
+    """
+
+    def __init__(self, eye_processor: EyeProcessor):
+        self.ep = eye_processor
+        self.responses = np.zeros(INTENSITY_HISTORY, dtype=np.float32)
+        self.frames: int = 0
+
+    def run(self, frame: MatLike, tracker_position: TrackerPosition, overlay: Overlay) -> EyeData:
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (max(width // INTENSITY_SCALE, 1), max(height // INTENSITY_SCALE, 1)), interpolation=cv2.INTER_AREA)
+        # so we find the middle of a dark area instead of a single dark pixel
+        small = cv2.blur(small, (3, 3))
+        response, _, (min_x, min_y), _ = cv2.minMaxLoc(small)
+        self.responses[self.frames % INTENSITY_HISTORY] = response
+        self.frames += 1
+
+        x, y = self.normalize(min_x + 0.5, min_y + 0.5, small.shape[1], small.shape[0])
+        blink = self.openness(response)
+        if (layer := overlay.layer()) is not None:
+            cv2.circle(layer, (int(x * width), int(y * height)), 4, (0, 255, 255), 1)
+            cv2.line(layer, (1, height - 1), (1, int((height - 1) * (1 - blink))), (0, 255, 255), 2)
+        return EyeData(x, y, blink, tracker_position)
+
+    def openness(self, response: float) -> float:
+        if self.frames < self.ep.config.intensity.calibration_frames:
+            return 1.0
+
+        history = self.responses[: min(self.frames, INTENSITY_HISTORY)]
+        open_response, closed_response = np.percentile(history, [OPEN_PERCENTILE, CLOSED_PERCENTILE])
+        closed_response = max(closed_response, open_response + MIN_RESPONSE_RANGE)
+        openness = clamp((closed_response - response) / (closed_response - open_response), 0.0, 1.0)
+        if openness <= self.ep.config.intensity.blink_threshold:
+            return 0.0
+        return float(openness)
@@ -38,8 +38,8 @@ from cv2.typing import MatLike
 from eyetrackvr_backend.assets import MODELS_DIR
 
 from ..processes import EyeProcessor
-from ..types import EyeData, TrackerPosition
-from ..utils import BaseAlgorithm, OneEuroFilter
+from ..types import EyeData, TrackerPosition, TRACKING_FAILED
+from ..utils import BaseAlgorithm, OneEuroFilter, Overlay
 
 rt.disable_telemetry_events()
 os.environ["OMP_NUM_THREADS"] = "1"
@@ -55,12 +55,21 @@ class Leap(BaseAlgorithm):
         self.ep = eye_processor
         self.openlist: list[float] = []
         self.filter = OneEuroFilter(np.random.rand(7, 2), 0.9, 5.0)
-        self.session = rt.InferenceSession(MODEL_PATH, ONNX_OPTIONS, ["CPUExecutionProvider"])
-        self.ep.logger.debug(f"Created Inference Session with `{MODEL_PATH}`")
-
-    def run(self, frame: MatLike, tracker_position: TrackerPosition) -> tuple[EyeData, MatLike]:
-        pre_landmark = self.filter(self.run_model(frame.copy()))
-        self.draw_landmarks(frame, pre_landmark)
+        # when the inference service is enabled the model runs there, batched together with the other trackers
+        self.inference = self.ep.inference
+        if self.inference is None:
+            self.session = rt.InferenceSession(MODEL_PATH, ONNX_OPTIONS, ["CPUExecutionProvider"])
+            self.ep.logger.debug(f"Created Inference Session with `{MODEL_PATH}`")
+
+    def run(self, frame: MatLike, tracker_position: TrackerPosition, overlay: Overlay) -> EyeData:
+        landmarks = self.run_model(frame)
+        if landmarks is None:
+            self.ep.logger.debug("Inference service did not return a result")
+            return TRACKING_FAILED
+
+        pre_landmark = self.filter(landmarks)
+        if (layer := overlay.layer()) is not None:
+            self.draw_landmarks(layer, pre_landmark)
 
         blink = 0.0
         try:
@@ -83,11 +92,12 @@ class Leap(BaseAlgorithm):
         x = pre_landmark[6][0]
         y = pre_landmark[6][1]
 
-        return EyeData(x, y, blink, tracker_position), frame
+        return EyeData(x, y, blink, tracker_position)
 
-    def run_model(self, frame: MatLike) -> np.ndarray:
+    def run_model(self, frame: MatLike) -> np.ndarray | None:
         frame = cv2.resize(frame, (112, 112))
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # the model was trained on RGB images, frames are grayscale so every channel is the same
+        frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
 
         frame = np.array(frame)
         # Normalize the pixel values to [0, 1] and convert the data type to float32
@@ -95,6 +105,9 @@ class Leap(BaseAlgorithm):
         # Transpose the dimensions from (height, width, channels) to (channels, height, width)
         frame = np.transpose(frame, (2, 0, 1))
 
+        if self.inference is not None:
+            return self.inference.run(frame)
+
         # add a batch dimension
         frame = np.expand_dims(frame, axis=0)
         ort_inputs = {self.session.get_inputs()[0].name: frame}
@@ -102,9 +115,9 @@ class Leap(BaseAlgorithm):
         pre_landmark = np.reshape(pre_landmark, (7, 2))
         return pre_landmark
 
-    def draw_landmarks(self, frame: MatLike, landmarks: np.ndarray) -> None:
-        width, height = frame.shape[:2]
+    def draw_landmarks(self, layer: MatLike, landmarks: np.ndarray) -> None:
+        width, height = layer.shape[:2]
 
         for point in landmarks:
             x, y = point
-            cv2.circle(frame, (int(x * height), int(y * width)), 2, (0, 0, 50), -1)
+            cv2.circle(layer, (int(x * height), int(y * width)), 2, (0, 0, 255), -1)
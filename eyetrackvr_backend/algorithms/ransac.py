@@ -38,7 +38,7 @@ import os
 import psutil
 from cv2.typing import MatLike
 from ..processes import EyeProcessor
-from ..utils import BaseAlgorithm
+from ..utils import BaseAlgorithm, Overlay
 from ..types import EyeData, TrackerPosition, TRACKING_FAILED
 from pye3d.camera import CameraModel
 from pye3d.detector_3d import Detector3D, DetectorMode
@@ -223,14 +223,14 @@ class RANSAC(BaseAlgorithm):
     def __init__(self, eye_processor: EyeProcessor):
         self.ep = eye_processor
 
-    def run(self, frame: MatLike, tracker_position: TrackerPosition) -> tuple[EyeData, MatLike]:
+    def run(self, frame: MatLike, tracker_position: TrackerPosition, overlay: Overlay) -> EyeData:
 
         # frame = self.current_image_gray_clean
         kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
 
         rng = np.random.default_rng()
-        # newFrame2 = self.current_image_gray.copy()
-        newFrame2 = frame.copy()
+        # the frame is read only, everything is drawn onto the overlay
+        layer = overlay.layer()
         # Convert the image to grayscale, and set up thresholding. Thresholds here are basically a
         # low-pass filter that will set any pixel < the threshold value to 0. Thresholding is user
         # configurable in this utility as we're dealing with variable lighting amounts/placement, as
@@ -313,7 +313,8 @@ class RANSAC(BaseAlgorithm):
             ranf = True
             pass
 
-        cv2.circle(frame, min_loc, 2, (0, 0, 255), -1)  # the point of the darkest area in the image
+        if layer is not None:
+            cv2.circle(layer, min_loc, 2, (0, 0, 255), -1)  # the point of the darkest area in the image
 
         # However eyes are annoyingly three dimensional, so we need to take this ellipse and turn it
         # into a curve patch on the surface of a sphere (the eye itself). If it's not a sphere, see your
@@ -364,8 +365,8 @@ class RANSAC(BaseAlgorithm):
             print(e)
             f = True
 
-        csy = newFrame2.shape[0]
-        csx = newFrame2.shape[1]
+        csy = frame.shape[0]
+        csx = frame.shape[1]
         # if hsrac_en:
 
         #    if ranf:
@@ -429,8 +430,9 @@ class RANSAC(BaseAlgorithm):
         #           blink = 0.0
 
         try:
-            cv2.drawContours(frame, contours, -1, (255, 0, 0), 1)  # TODO: fix visualizations with HSRAC
-            cv2.circle(frame, (int(cx), int(cy)), 2, (0, 0, 255), -1)
+            if layer is not None:
+                cv2.drawContours(layer, contours, -1, (255, 0, 0), 1)  # TODO: fix visualizations with HSRAC
+                cv2.circle(layer, (int(cx), int(cy)), 2, (0, 0, 255), -1)
         except Exception as e:
             print(e)
 
@@ -451,36 +453,36 @@ class RANSAC(BaseAlgorithm):
 
         try:
             # print(self.lkg_projected_sphere["angle"], self.lkg_projected_sphere["axes"], self.lkg_projected_sphere["center"])
-            cv2.ellipse(
-                newFrame2,
-                tuple(int(v) for v in lkg_projected_sphere["center"]),
-                tuple(int(v) for v in lkg_projected_sphere["axes"]),
-                lkg_projected_sphere["angle"],
-                0,
-                360,  # start/end angle for drawing
-                (0, 255, 0),  # color (BGR): red
-            )
-
-            # draw line from center of eyeball to center of pupil
-            cv2.line(
-                frame,
-                tuple(int(v) for v in lkg_projected_sphere["center"]),
-                tuple(int(v) for v in ellipse_3d["center"]),
-                (0, 255, 0),  # color (BGR): red
-            )
+            if layer is not None:
+                cv2.ellipse(
+                    layer,
+                    tuple(int(v) for v in lkg_projected_sphere["center"]),
+                    tuple(int(v) for v in lkg_projected_sphere["axes"]),
+                    lkg_projected_sphere["angle"],
+                    0,
+                    360,  # start/end angle for drawing
+                    (0, 255, 0),  # color (BGR): red
+                )
+
+                # draw line from center of eyeball to center of pupil
+                cv2.line(
+                    layer,
+                    tuple(int(v) for v in lkg_projected_sphere["center"]),
+                    tuple(int(v) for v in ellipse_3d["center"]),
+                    (0, 255, 0),  # color (BGR): red
+                )
 
         except Exception as e:
             print(e)
 
-        # self.current_image_gray = newFrame2
         y, x = frame.shape
         thresh = cv2.resize(thresh, (x, y))
 
         print(cx)
         try:
-            return (EyeData(cx, cy, 1, tracker_position), newFrame2)
+            return EyeData(cx, cy, 1, tracker_position)
         # return cx, cy, angle, thresh, blink, w, h
         except Exception as e:
             print(e)
             # return 0, 0, 0, thresh, blink, 0, 0
-            return (TRACKING_FAILED, newFrame2)
+            return TRACKING_FAILED
@@ -15,7 +15,7 @@ from .utils import mask_to_cpu_list
 from watchdog.observers import Observer
 from fastapi import Request, HTTPException
 from watchdog.observers.api import BaseObserver
-from .types import Algorithms, TrackerPosition
+from .types import Algorithms, TrackerPosition, PipelineMode, DropPolicy, CaptureBackend, DecodeMode, DECODE_SCALES
 from pydantic import BaseModel, ValidationError, field_validator
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent
 
@@ -63,6 +63,18 @@ class HSFConfig(BaseModel):
     default_step: tuple[int, int] = (5, 5)
 
 
+class IntensityConfig(BaseModel):
+    blink_threshold: float = 0.25
+    # amount of frames to use for the open / closed baseline
+    calibration_frames: int = 60 * 3
+
+    @field_validator("blink_threshold")
+    def blink_threshold_validator(cls, value: float) -> float:
+        if value < 0 or value > 1:
+            raise ValueError("Blink threshold must be between 0 and 1")
+        return value
+
+
 class AlgorithmConfig(BaseModel):
     algorithm_order: list[Algorithms] = [
         Algorithms.LEAP,
@@ -72,9 +84,28 @@ class AlgorithmConfig(BaseModel):
         Algorithms.HSF,
         Algorithms.AHSF,
     ]
+    # run the first N algorithms of `algorithm_order` at the same time instead of one after another,
+    # the highest priority result is still used, 1 disables this
+    parallel_algorithms: int = 1
+    # reorder `algorithm_order` by how long each algorithm takes per successful result over its last runs,
+    # so a algorithm that keeps failing stops being tried first on every frame
+    adaptive_order: bool = False
+    # hard limit on the time spent on the algorithms of a single frame, algorithms that wont finish in time are skipped
+    # and parallel algorithms that arent done by then are ignored for the frame, 0 disables this
+    frame_budget_ms: float = 0
+    # time a single run of a algorithm may take, a algorithm that keeps running over it gets degraded (e.g. a bigger step
+    # for HSF) or skipped for a while if it cant get any cheaper. algorithms without a budget are never degraded
+    algorithm_budget_ms: dict[Algorithms, float] = {}
+    # algorithms that only provide the openness, tried in order once `algorithm_order` found the gaze.
+    # empty uses the openness of the gaze algorithm, like a cheap INTENSITY next to a expensive gaze algorithm
+    blink_order: list[Algorithms] = []
+    # only search a window around the pupil position of the previous frame, sized by how fast the pupil moved lately.
+    # the whole frame is searched again after the pupil was lost or during a blink, only some algorithms support this
+    search_window: bool = False
     blob: BlobConfig = BlobConfig()
     leap: LeapConfig = LeapConfig()
     hsf: HSFConfig = HSFConfig()
+    intensity: IntensityConfig = IntensityConfig()
 
     @field_validator("algorithm_order")
     def algorithm_order_validator(cls, value: list[Algorithms]) -> list[Algorithms]:
@@ -89,6 +120,30 @@ class AlgorithmConfig(BaseModel):
             raise ValueError("Algorithm order must not contain duplicate algorithms")
         return value
 
+    @field_validator("blink_order")
+    def blink_order_validator(cls, value: list[Algorithms]) -> list[Algorithms]:
+        if len(set(value)) != len(value):
+            raise ValueError("Blink order must not contain duplicate algorithms")
+        return value
+
+    @field_validator("parallel_algorithms")
+    def parallel_algorithms_validator(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("Parallel algorithms must be at least 1")
+        return value
+
+    @field_validator("frame_budget_ms")
+    def frame_budget_validator(cls, value: float) -> float:
+        if value < 0:
+            raise ValueError("Frame budget must not be negative")
+        return value
+
+    @field_validator("algorithm_budget_ms")
+    def algorithm_budget_validator(cls, value: dict[Algorithms, float]) -> dict[Algorithms, float]:
+        if any(budget <= 0 for budget in value.values()):
+            raise ValueError("Algorithm budgets must be greater than 0")
+        return value
+
 
 class OSCConfigEndpoints(BaseModel):
     eyes_y: str = "/avatar/parameters/EyesY"
@@ -126,6 +181,8 @@ class OSCConfig(BaseModel):
 
 
 class CameraConfig(BaseModel):
+    # a IP address / url, serial port, `/dev/video*` device, `replay://<path>` or `synthetic://`
+    # `<port>#<stream>` (e.g. `COM3#1`) picks a single camera of a receiver that sends several over one serial port
     capture_source: str = ""
     rotation: int = 0
     threshold: int = 50
@@ -136,6 +193,27 @@ class CameraConfig(BaseModel):
     roi_y: int = 0
     roi_w: int = 0
     roi_h: int = 0
+    # everything after capture works on grayscale, `color` only keeps the colors around for the frontend preview
+    # `decode_scale` shrinks frames by that factor while decoding, which is a lot cheaper than decoding the full
+    # frame, only use it if the camera resolution is higher than what the algorithms need.
+    # ROI values are always in pixels of the full resolution frame
+    decode_mode: DecodeMode = DecodeMode.GRAY
+    decode_scale: int = 1
+    # OpenCV distortion coefficients (k1, k2, p1, p2[, k3]) of the lens, leave empty to skip undistortion
+    # the focal length is in pixels of the full resolution frame, 0 uses the width of the frame
+    lens_distortion: list[float] = []
+    lens_focal_length: float = 0
+    # how network sources are read, `mjpeg` is our own client for plain MJPEG over HTTP streams like the ones our
+    # ESP32 cameras serve, `ffmpeg` uses OpenCV and `auto` tries `mjpeg` first and falls back to `ffmpeg`
+    capture_backend: CaptureBackend = CaptureBackend.AUTO
+    # append every raw packet (serial and MJPEG cameras only) to this file, play it back with `replay://<path>`
+    record_path: str = ""
+    # 1 replays a recording with its original timing, 2 twice as fast and 0 as fast as possible
+    replay_speed: float = 1.0
+    replay_loop: bool = False
+    # grab frames from network streams (`ffmpeg` only) on a separate thread and only decode the newest one, this keeps the stream
+    # from building up a backlog if we cant keep up with it
+    threaded_capture: bool = True
 
     @field_validator("roi_x", "roi_y", "roi_w", "roi_h")
     def roi_validator(cls, value: int) -> int:
@@ -143,6 +221,30 @@ class CameraConfig(BaseModel):
             raise ValueError("ROI values must be greater than 0")
         return value
 
+    @field_validator("lens_distortion")
+    def lens_distortion_validator(cls, value: list[float]) -> list[float]:
+        if len(value) not in (0, 4, 5):
+            raise ValueError("Lens distortion must be empty or contain 4 or 5 coefficients")
+        return value
+
+    @field_validator("lens_focal_length")
+    def lens_focal_length_validator(cls, value: float) -> float:
+        if value < 0:
+            raise ValueError("Lens focal length must be greater than 0")
+        return value
+
+    @field_validator("replay_speed")
+    def replay_speed_validator(cls, value: float) -> float:
+        if value < 0:
+            raise ValueError("Replay speed must be 0 or greater")
+        return value
+
+    @field_validator("decode_scale")
+    def decode_scale_validator(cls, value: int) -> int:
+        if value not in DECODE_SCALES:
+            raise ValueError(f"Decode scale must be one of {DECODE_SCALES}")
+        return value
+
     @field_validator("capture_source")
     def capture_source_validator(cls, value: str) -> str:
         if re.match(IP_ADDRESS_REGEX, value) is not None:
@@ -151,10 +253,57 @@ class CameraConfig(BaseModel):
             return value
         elif "/dev/" in value.lower():
             return value
+        elif value.lower().startswith(("replay://", "synthetic://")):
+            return value
         elif value == "":
             return value
         else:
-            raise ValueError("Invalid capture source, must be a valid IP address or COM port")
+            raise ValueError("Invalid capture source, must be a valid IP address, COM port, recording or synthetic source")
+
+
+class PipelineConfig(BaseModel):
+    # `process` runs capture, processing and OSC in their own processes, `thread` runs them as threads in the backend process
+    # changes only take effect once ETVR is restarted
+    mode: PipelineMode = PipelineMode.PROCESS
+    # what to do with old frames once the processor falls behind the camera
+    # `latest` always processes the newest frame, `bounded` keeps at most `max_queued_frames` frames around
+    # and `deadline` skips any frame older than `frame_deadline_ms`
+    drop_policy: DropPolicy = DropPolicy.LATEST
+    max_queued_frames: int = 4
+    frame_deadline_ms: float = 50
+
+    @field_validator("max_queued_frames")
+    def max_queued_frames_validator(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("Max queued frames must be at least 1")
+        return value
+
+    @field_validator("frame_deadline_ms")
+    def frame_deadline_validator(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("Frame deadline must be greater than 0")
+        return value
+
+
+class InferenceConfig(BaseModel):
+    # run one shared ONNX session in its own process instead of one session per tracker
+    # changes only take effect once ETVR is restarted
+    shared_session: bool = False
+    # how long the service waits for other trackers to submit a frame, so they can be batched into one run
+    batch_window_ms: float = 2
+    intra_op_threads: int = 1
+
+    @field_validator("batch_window_ms")
+    def batch_window_validator(cls, value: float) -> float:
+        if value < 0:
+            raise ValueError("Batch window must not be negative")
+        return value
+
+    @field_validator("intra_op_threads")
+    def intra_op_threads_validator(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("Intra op threads must be at least 1")
+        return value
 
 
 class TrackerConfig(BaseModel):
@@ -164,6 +313,7 @@ class TrackerConfig(BaseModel):
     tracker_position: TrackerPosition = TrackerPosition.UNDEFINED
     algorithm: AlgorithmConfig = AlgorithmConfig()
     camera: CameraConfig = CameraConfig()
+    pipeline: PipelineConfig = PipelineConfig()
 
     @field_validator("uuid")
     def uuid_validator(cls, value: str) -> str:
@@ -179,6 +329,7 @@ class EyeTrackConfig(BaseModel):
     debug: bool = True
     affinity_mask: str = ""
     osc: OSCConfig = OSCConfig()
+    inference: InferenceConfig = InferenceConfig()
     trackers: list[TrackerConfig] = [
         TrackerConfig(
             enabled=True,
@@ -1,7 +1,12 @@
 import os
+import psutil
 import signal
 
-from .processes import VRChatOSCReceiver
+from .processes import VRChatOSCReceiver, InferenceService, SerialHub
+from .utils.misc_utils import split_serial_stream
+from .types import CameraState
+from .utils.metrics import Sample, SummarySample, PERCENTILES, format_prometheus, format_prometheus_summary
+from fastapi.responses import PlainTextResponse
 from .config import ConfigManager
 from multiprocessing import Manager
 from .logger import get_logger
@@ -19,6 +24,10 @@ class ETVR:
         self.manager = Manager()
         # OSC stuff
         self.osc_receiver = VRChatOSCReceiver(self.config)
+        # Shared LEAP inference, only used when `inference.shared_session` is enabled
+        self.inference: InferenceService | None = None
+        # Shared serial ports, only used when a tracker has a `<port>#<stream>` capture source
+        self.serial_hub: SerialHub | None = None
         # Trackers
         self.trackers: list[Tracker] = []
         self.setup_trackers()
@@ -35,6 +44,109 @@ class ETVR:
                 return tracker.algorithm_visualizer()
         return None
 
+    def latency_metrics(self) -> dict[str, dict]:
+        return {tracker.uuid: {"name": tracker.tracker_config.name, "stages": tracker.latency.snapshot()} for tracker in self.trackers}
+
+    def algorithm_metrics(self) -> dict[str, dict]:
+        return {
+            tracker.uuid: {
+                "name": tracker.tracker_config.name,
+                "adaptive_order": tracker.tracker_config.algorithm.adaptive_order,
+                "order": tracker.algorithm_stats.order(),
+                "algorithms": tracker.algorithm_stats.snapshot(),
+            }
+            for tracker in self.trackers
+        }
+
+    def prometheus_metrics(self) -> PlainTextResponse:
+        counters: dict[str, list[Sample]] = {}
+        dropped: list[Sample] = []
+        algorithm_failures: list[Sample] = []
+        algorithm_overruns: list[Sample] = []
+        queue_depth: list[Sample] = []
+        connected: list[Sample] = []
+        latency: list[SummarySample] = []
+        # `<name>_sum` counters, summed over `ground_truth_frames`
+        errors: dict[str, list[SummarySample]] = {}
+        cpu: list[Sample] = []
+        memory: list[Sample] = []
+        processes: list[tuple[dict[str, str], int | None]] = [({"process": "api", "tracker": ""}, os.getpid())]
+        for tracker in self.trackers:
+            labels = {"tracker": tracker.tracker_config.name, "uuid": tracker.uuid}
+            snapshot = tracker.counters.snapshot()
+            for name, value in snapshot.items():
+                if name.startswith("algorithm_failed."):
+                    algorithm_failures.append(({**labels, "algorithm": name.removeprefix("algorithm_failed.")}, value))
+                elif name.startswith("algorithm_overrun."):
+                    algorithm_overruns.append(({**labels, "algorithm": name.removeprefix("algorithm_overrun.")}, value))
+                elif name.endswith("_sum"):
+                    # stored in millionths of the frame size, see `COUNTERS`
+                    errors.setdefault(name.removesuffix("_sum"), []).append((labels, {}, value / 1e6, snapshot["ground_truth_frames"]))
+                else:
+                    counters.setdefault(name, []).append((labels, value))
+            for reason, value in tracker.image_queue.drop_counts().items():
+                dropped.append(({**labels, "reason": reason}, value))
+            queue_depth.append(({**labels, "queue": "frames"}, tracker.image_queue.qsize()))
+            queue_depth.append(({**labels, "queue": "camera_preview"}, tracker.camera_queue.qsize()))
+            queue_depth.append(({**labels, "queue": "algorithm_preview"}, tracker.algo_frame_queue.qsize()))
+            connected.append((labels, int(tracker.camera.get_state() == CameraState.CONNECTED)))
+            for stage, stats in tracker.latency.snapshot().items():
+                quantiles = {str(percentile / 100): round(stats[f"p{percentile}_ms"] / 1000, 6) for percentile in PERCENTILES}
+                total = round(stats["mean_ms"] * stats["count"] / 1000, 6)
+                latency.append(({**labels, "stage": stage}, quantiles, total, int(stats["count"])))
+            for worker in [tracker.camera, tracker.processor, tracker.osc_sender]:
+                processes.append(({"process": worker.name, "tracker": tracker.tracker_config.name}, worker.pid()))
+
+        if self.inference is not None:
+            processes.append(({"process": self.inference.name, "tracker": ""}, self.inference.pid()))
+        if self.serial_hub is not None:
+            processes.append(({"process": self.serial_hub.name, "tracker": ""}, self.serial_hub.pid()))
+
+        for labels, pid in processes:
+            if pid is None:
+                continue
+            try:
+                process = psutil.Process(pid)
+                with process.oneshot():
+                    cpu_times = process.cpu_times()
+                    rss = process.memory_info().rss
+            except psutil.Error:
+                continue
+            cpu.append((labels, cpu_times.user + cpu_times.system))
+            memory.append((labels, rss))
+
+        metrics = [
+            format_prometheus(f"etvr_{name}_total", "counter", name.replace("_", " ").capitalize(), samples)
+            for name, samples in counters.items()
+        ]
+        metrics += [
+            format_prometheus_summary(f"etvr_{name}", f"{name.replace('_', ' ').capitalize()} of the ground truth frames", samples)
+            for name, samples in errors.items()
+        ]
+        metrics += [
+            format_prometheus("etvr_frames_dropped_total", "counter", "Frames dropped by the frame channel", dropped),
+            format_prometheus(
+                "etvr_algorithm_failures_total",
+                "counter",
+                "Algorithm failures that fell through to the next algorithm in algorithm_order",
+                algorithm_failures,
+            ),
+            format_prometheus(
+                "etvr_algorithm_overruns_total",
+                "counter",
+                "Algorithm runs that took longer than algorithm_budget_ms",
+                algorithm_overruns,
+            ),
+            format_prometheus("etvr_queue_depth", "gauge", "Items waiting in a queue", queue_depth),
+            format_prometheus("etvr_camera_connected", "gauge", "1 if the camera is connected", connected),
+            format_prometheus_summary("etvr_latency_seconds", "Latency of every pipeline stage", latency),
+            format_prometheus("etvr_process_cpu_seconds_total", "counter", "CPU time of the process a worker runs in", cpu),
+            format_prometheus(
+                "etvr_process_resident_memory_bytes", "gauge", "Resident memory of the process a worker runs in", memory
+            ),
+        ]
+        return PlainTextResponse("".join(metrics), media_type="text/plain; version=0.0.4")
+
     def setup_trackers(self) -> None:
         if not self.running:
             logger.info("Setting up trackers")
@@ -42,9 +154,14 @@ class ETVR:
                 tracker.stop()
 
             self.trackers = []
-            for tracker_config in self.config.trackers:
-                if tracker_config.enabled:
-                    self.trackers.append(Tracker(self.config, tracker_config.uuid, self.manager, self.router))
+            enabled = [tracker_config for tracker_config in self.config.trackers if tracker_config.enabled]
+            self.inference = InferenceService(len(enabled)) if self.config.inference.shared_session else None
+            shared_serial = [tracker.uuid for tracker in enabled if split_serial_stream(tracker.camera.capture_source) is not None]
+            self.serial_hub = SerialHub(shared_serial) if shared_serial else None
+            for index, tracker_config in enumerate(enabled):
+                inference = self.inference.clients[index] if self.inference is not None else None
+                serial_hub = self.serial_hub.client(tracker_config.uuid) if self.serial_hub is not None else None
+                self.trackers.append(Tracker(self.config, tracker_config.uuid, self.manager, self.router, inference, serial_hub))
 
         else:
             logger.error("Cannot setup trackers while ETVR is running!")
@@ -53,6 +170,10 @@ class ETVR:
         if not self.running:
             self.setup_trackers()
             logger.info("Starting...")
+            if self.inference is not None:
+                self.inference.start()
+            if self.serial_hub is not None:
+                self.serial_hub.start()
             for tracker in self.trackers:
                 tracker.start()
 
@@ -66,6 +187,10 @@ class ETVR:
             logger.info("Stopping...")
             for tracker in self.trackers:
                 tracker.stop()
+            if self.inference is not None:
+                self.inference.stop()
+            if self.serial_hub is not None:
+                self.serial_hub.stop()
 
             self.osc_receiver.stop()
             self.running = False
@@ -159,6 +284,41 @@ class ETVR:
             """,
         )
         # endregion
+        # region: Metrics Endpoints
+        self.router.add_api_route(
+            name="Return latency metrics",
+            path="/etvr/metrics/latency",
+            endpoint=self.latency_metrics,
+            methods=["GET"],
+            tags=["Metrics"],
+            description="""
+            Return p50, p95 and p99 latencies (in milliseconds) of every pipeline stage for each tracker.
+            `frame_dequeued`, `result_dequeued` and `end_to_end` are measured from the moment a frame was captured.
+            """,
+        )
+        self.router.add_api_route(
+            name="Return algorithm metrics",
+            path="/etvr/metrics/algorithms",
+            endpoint=self.algorithm_metrics,
+            methods=["GET"],
+            tags=["Metrics"],
+            description="""
+            Return the order the algorithms currently run in and the success rate, mean runtime and expected cost per
+            successful result (in milliseconds) of every algorithm over its last runs, for each tracker.
+            With `adaptive_order` enabled the order is sorted by the expected cost.
+            """,
+        )
+        self.router.add_api_route(
+            name="Return metrics in the prometheus format",
+            path="/etvr/metrics",
+            endpoint=self.prometheus_metrics,
+            methods=["GET"],
+            tags=["Metrics"],
+            description="""
+            Return frame, algorithm, OSC, queue and process metrics of every tracker in the prometheus text exposition format.
+            """,
+        )
+        # endregion
         # region: Config Endpoints
         self.router.add_api_route(
             name="Update Config",
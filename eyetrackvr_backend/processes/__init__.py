@@ -1,3 +1,5 @@
 from .camera import Camera
+from .inference import InferenceService, InferenceClient
+from .serial_hub import SerialHub, SerialHubClient
 from .eye_processor import EyeProcessor
 from .osc import VRChatOSC, VRChatOSCReceiver
@@ -1,12 +1,20 @@
-from ..utils import WorkerProcess, mat_crop, mat_rotate, clear_queue, is_serial
+from ..utils import WorkerProcess, FrameChannel, LatencyRecorder, MetricCounters, SerialReader, FrameGrabber, is_serial
+from ..utils.image_utils import decode_jpeg, reduce_frame
+from ..utils.preprocess import FramePreprocessor, PreprocessSettings, scale_roi
+from ..utils.serial_reader import SERIAL_READ_TIMEOUT, open_serial_port
+from ..utils.mjpeg_client import MJPEGClient, MJPEGError, is_reachable
+from ..utils.reconnect import ReconnectScheduler
+from ..utils.recording import PacketRecorder, ReplaySource
+from ..utils.synthetic import SyntheticSettings, SyntheticSource
+from ..utils.misc_utils import REPLAY_PREFIX, is_network, is_replay, is_synthetic, split_serial_stream
 from ..config import CameraConfig, TrackerConfig
-from ..types import CameraState
+from ..types import CameraState, CaptureBackend, FrameMeta
+from .serial_hub import SerialHubClient
 from multiprocessing import Value
 import serial.tools.list_ports
 from cv2.typing import MatLike
 from queue import Queue, Full
 from typing import Final
-import numpy as np
 import ctypes
 import serial
 import time
@@ -19,41 +27,70 @@ OPENCV_PARAMS: Final = [
     cv2.CAP_PROP_READ_TIMEOUT_MSEC, 2500,
 ]
 OPENCV_BACKEND: Final = cv2.CAP_FFMPEG
-QUEUE_BACKPRESSURE_THRESHOLD: Final = 50
-
-"""
-header-begin (2 bytes)
-header-type (2 bytes)
-packet-size (2 bytes)
-packet (packet-size bytes)
-"""
-ETVR_HEADER_LENGTH: Final = 6
-ETVR_HEADER: Final = b"\xff\xa0"
-ETVR_HEADER_NAME: Final = b"\xff\xa1"
-COM_PORT_NOT_FOUND_TIMEOUT: Final = 2.5
+# the longest a single `run` waits for something to happen while there is nothing to capture from
+IDLE_TIMEOUT: Final = 0.5
 # fmt: on
 
 
 class Camera(WorkerProcess):
-    def __init__(self, tracker_config: TrackerConfig, image_queue: Queue[MatLike], frontend_queue: Queue[MatLike]):
-        super().__init__(name=f"Capture {str(tracker_config.name)}", uuid=tracker_config.uuid)
+    def __init__(
+        self,
+        tracker_config: TrackerConfig,
+        image_queue: FrameChannel,
+        frontend_queue: Queue[MatLike],
+        threaded: bool = False,
+        latency: LatencyRecorder | None = None,
+        counters: MetricCounters | None = None,
+        serial_hub: SerialHubClient | None = None,
+    ):
+        super().__init__(
+            name=f"Capture {str(tracker_config.name)}",
+            uuid=tracker_config.uuid,
+            threaded=threaded,
+            latency=latency,
+            counters=counters,
+        )
         # Synced variables
         self.image_queue = image_queue
         self.frontend_queue = frontend_queue
         self.state = Value(ctypes.c_int, CameraState.DISCONNECTED.value)
+        # packets of `<port>#<stream>` capture sources come from the serial hub
+        self.serial_hub = serial_hub
         # Unsynced variables
+        self.loop_stage = "loop.camera"
         self.serial_frame_number: int = 0  # if we ever get a bug report where this overflows I will cry
+        self.mjpeg_frame_number: int = 0
+        # error counts we already reported, the reader only keeps running totals
+        self.serial_resyncs: int = 0
+        self.serial_corrupt: int = 0
+        self.serial_dropped: int = 0
         self.config: CameraConfig = tracker_config.camera
         self.current_capture_source: str = self.config.capture_source
+        self.preprocessor = FramePreprocessor()
+        self.preprocess_settings = self.get_preprocess_settings(self.config)
         # these objects are None by default, because they arent picklable
         self.camera: cv2.VideoCapture = None  # type: ignore[assignment]
         self.serial_camera: serial.Serial = None  # type: ignore[assignment]
+        self.serial_reader: SerialReader | None = None
+        self.frame_grabber: FrameGrabber | None = None
+        self.mjpeg_client: MJPEGClient | None = None
+        self.reconnect: ReconnectScheduler = None  # type: ignore[assignment]
+        self.replay: ReplaySource | None = None
+        self.replay_frame_number: int = 0
+        self.synthetic: SyntheticSource | None = None
+        self.recorder: PacketRecorder | None = None
+        self.recording_path: str = ""
+        # skipped frames we already reported
+        self.frames_skipped: int = 0
+        self.grabber_fps: float = 0
 
     def startup(self) -> None:
         if self.camera is None:
             self.camera = cv2.VideoCapture()
         if self.serial_camera is None:
             self.serial_camera = serial.Serial()
+        if self.reconnect is None:
+            self.reconnect = ReconnectScheduler()
 
         if self.config.capture_source == "" or self.current_capture_source == "":
             self.logger.info("No capture source set, waiting for config update")
@@ -61,35 +98,96 @@ class Camera(WorkerProcess):
     def run(self) -> None:
         if self.config.capture_source == "":
             self.set_state(CameraState.DISCONNECTED)
+            # nothing to do until the config changes
+            self.reconnect.idle(IDLE_TIMEOUT)
             return
 
         # if the camera is disconnected or the capture source has changed, reconnect
         if self.get_state() == CameraState.DISCONNECTED or self.current_capture_source != self.config.capture_source:
+            if self.current_capture_source != self.config.capture_source:
+                self.reconnect.reset()
+            elif not self.reconnect.wait(IDLE_TIMEOUT, self.capture_source_present):
+                return
+
             self.set_state(CameraState.CONNECTING)
             self.current_capture_source = self.config.capture_source
             if is_serial(self.current_capture_source):
                 self.connect_serial_camera()
+            elif is_replay(self.current_capture_source):
+                self.connect_replay()
+            elif is_synthetic(self.current_capture_source):
+                self.connect_synthetic()
             else:
                 self.connect_camera()
+
+            if self.get_state() == CameraState.DISCONNECTED:
+                delay = self.reconnect.failed()
+                self.logger.debug(f"Retrying `{self.current_capture_source}` in {delay:.2f}s")
+            else:
+                self.reconnect.reset()
         else:
             if is_serial(self.current_capture_source):
                 self.get_serial_image()
+            elif is_replay(self.current_capture_source):
+                self.get_replay_image()
+            elif is_synthetic(self.current_capture_source):
+                self.get_synthetic_image()
             else:
                 self.get_camera_image()
 
     def shutdown(self) -> None:
-        if self.camera.isOpened() and self.camera is not None:
+        self.stop_recording()
+        self.stop_replay()
+        self.synthetic = None
+        self.stop_frame_grabber()
+        self.stop_mjpeg_client()
+        if self.camera is not None and self.camera.isOpened():
             self.camera.release()
 
-        if self.serial_camera.is_open and self.serial_camera is not None:
-            self.serial_camera.close()
+        self.disconnect_serial_camera()
 
     def on_tracker_config_update(self, tracker_config: TrackerConfig) -> None:
         self.config = tracker_config.camera
+        self.preprocess_settings = self.get_preprocess_settings(self.config)
+        # the new config might fix whatever kept us from connecting, so dont wait for the backoff
+        if self.reconnect is not None:
+            self.reconnect.wake()
+
+    def capture_source_present(self) -> bool:
+        """cheap check if the capture source (re)appeared, used to skip the reconnect backoff"""
+        source = self.current_capture_source
+        if is_serial(source):
+            return self.find_serial_port(source) is not None
+        if is_replay(source):
+            return os.path.exists(source[len(REPLAY_PREFIX) :])
+        if is_network(source):
+            return is_reachable(source)
+        if source.startswith("/dev/"):
+            return os.path.exists(source)
+        return True
 
     # region: OpenCV camera implementation
     def connect_camera(self) -> None:
         self.logger.info(f"Connecting to capture source {self.current_capture_source}")
+        self.stop_frame_grabber()
+        self.stop_mjpeg_client()
+        backend = self.config.capture_backend
+        if is_network(self.current_capture_source) and backend != CaptureBackend.FFMPEG:
+            try:
+                self.connect_mjpeg_camera()
+                return
+            except MJPEGError as e:
+                if backend == CaptureBackend.MJPEG:
+                    self.logger.warning(f"Capture source {self.current_capture_source} is not a MJPEG stream ({e}), retrying")
+                    self.set_state(CameraState.DISCONNECTED)
+                    return
+                self.logger.info(f"Capture source {self.current_capture_source} is not a MJPEG stream ({e}), falling back to FFMPEG")
+            except Exception as e:
+                # the camera is most likely still booting, FFMPEG wouldnt have any more luck
+                self.logger.info(f"Capture source {self.current_capture_source} not found ({e}), retrying")
+                self.set_state(CameraState.DISCONNECTED)
+                return
+
         try:
             self.camera.setExceptionMode(True)
             # https://github.com/opencv/opencv/issues/23207
@@ -97,15 +195,72 @@ class Camera(WorkerProcess):
             if self.camera.isOpened():
                 self.set_state(CameraState.CONNECTED)
                 self.logger.info(f"Camera connected with backend: {self.camera.getBackendName()}")
+                if self.config.threaded_capture and is_network(self.current_capture_source):
+                    # the grab thread owns the capture from now on, so ask for anything we need before starting it
+                    self.grabber_fps = self.camera.get(cv2.CAP_PROP_FPS)
+                    self.frame_grabber = FrameGrabber(self.camera, name=f"Frame Grabber {self.current_capture_source}")
+                    self.frame_grabber.start()
             else:
                 raise cv2.error
         except (cv2.error, Exception):
             self.set_state(CameraState.DISCONNECTED)
             self.logger.info(f"Capture source {self.current_capture_source} not found, retrying")
 
+    def stop_frame_grabber(self) -> None:
+        if self.frame_grabber is not None:
+            self.frame_grabber.stop()
+            self.report_skipped_frames()
+            self.frame_grabber = None
+            self.frames_skipped = 0
+
+    def report_skipped_frames(self) -> None:
+        if self.frame_grabber is not None:
+            skipped = self.frame_grabber.skipped
+        elif self.mjpeg_client is not None:
+            skipped = self.mjpeg_client.dropped
+        else:
+            return
+        if skipped > self.frames_skipped:
+            self.increment("frames_skipped", skipped - self.frames_skipped)
+            self.frames_skipped = skipped
+
+    def get_grabbed_image(self) -> None:
+        assert self.frame_grabber is not None
+        if not self.frame_grabber.is_alive():
+            self.logger.warning(f"Frame grabber stopped ({self.frame_grabber.error}), assuming camera disconnected, reconnecting.")
+            self.stop_frame_grabber()
+            self.camera.release()
+            self.set_state(CameraState.DISCONNECTED)
+            return
+
+        try:
+            result = self.frame_grabber.get(timeout=1)
+            self.report_skipped_frames()
+            if result is None:
+                return
+            frame, timestamp, frame_number = result
+            frame = reduce_frame(frame, self.config.decode_mode, self.config.decode_scale)
+            self.increment("frames_captured")
+            self.increment("frames_decoded")
+            # time since the frame was grabbed, including the time it spent waiting for us to decode it
+            self.record_latency("capture", time.perf_counter() - timestamp)
+            self.push_image_to_queue(frame, FrameMeta(timestamp, frame_number, self.grabber_fps, self.uuid))
+        except (cv2.error, Exception):
+            self.set_state(CameraState.DISCONNECTED)
+            self.logger.warning("Failed to retrieve or push frame to queue, Assuming camera disconnected, waiting for reconnect.")
+
     def get_camera_image(self) -> None:
+        if self.frame_grabber is not None:
+            self.get_grabbed_image()
+            return
+        if self.mjpeg_client is not None:
+            self.get_mjpeg_image()
+            return
+
         try:
+            start = time.perf_counter()
             ret, frame = self.camera.read()
+            timestamp = time.perf_counter()
             if not ret:
                 self.logger.warning("Capture source problem, assuming camera disconnected, waiting for reconnect.")
                 self.camera.set(cv2.CAP_PROP_POS_FRAMES, 0)
@@ -113,115 +268,362 @@ class Camera(WorkerProcess):
                 return
             frame_number: float = self.camera.get(cv2.CAP_PROP_POS_FRAMES)
             fps: float = self.camera.get(cv2.CAP_PROP_FPS)
-            self.push_image_to_queue(frame, frame_number, fps)
+            # opencv decodes the frame while reading it, the best we can do is shrink it before it goes anywhere else
+            frame = reduce_frame(frame, self.config.decode_mode, self.config.decode_scale)
+            self.increment("frames_captured")
+            self.increment("frames_decoded")
+            self.record_latency("capture", timestamp - start)
+            self.push_image_to_queue(frame, FrameMeta(timestamp, int(frame_number), fps, self.uuid))
         except (cv2.error, Exception):
             self.set_state(CameraState.DISCONNECTED)
             self.logger.warning("Failed to retrieve or push frame to queue, Assuming camera disconnected, waiting for reconnect.")
 
     # endregion
 
+    # region: MJPEG camera implementation
+    def connect_mjpeg_camera(self) -> None:
+        client = MJPEGClient(self.current_capture_source, name=f"MJPEG Client {self.current_capture_source}")
+        client.connect()
+        self.mjpeg_client = client
+        client.start()
+        self.set_state(CameraState.CONNECTED)
+        self.logger.info(f"Camera connected to MJPEG stream `{self.current_capture_source}`")
+
+    def stop_mjpeg_client(self) -> None:
+        if self.mjpeg_client is not None:
+            self.mjpeg_client.stop()
+            self.report_skipped_frames()
+            self.mjpeg_client = None
+            self.frames_skipped = 0
+
+    def get_mjpeg_image(self) -> None:
+        assert self.mjpeg_client is not None
+        # the client reconnects on its own, so we only keep the state up to date for the frontend
+        connected = self.mjpeg_client.connected
+        if connected != (self.get_state() == CameraState.CONNECTED):
+            if connected:
+                self.logger.info(f"Reconnected to MJPEG stream `{self.current_capture_source}`")
+            else:
+                self.logger.warning(f"Lost connection to MJPEG stream ({self.mjpeg_client.error}), reconnecting.")
+            self.set_state(CameraState.CONNECTED if connected else CameraState.CONNECTING)
+
+        try:
+            result = self.mjpeg_client.get(timeout=0.5)
+            self.report_skipped_frames()
+            if result is None:
+                return
+            image, timestamp = result
+            self.record_packet(image, timestamp)
+            frame = self.decode_packet(image, timestamp)
+            if frame is None:
+                return
+
+            self.mjpeg_frame_number += 1
+            fps = round(1.0 / self.delta_time)
+            self.push_image_to_queue(frame, FrameMeta(timestamp, self.mjpeg_frame_number, fps, self.uuid))
+        except Exception:
+            self.logger.exception("Failed to decode or push MJPEG frame to queue")
+
+    # endregion
+
     # region: Serial camera implementation
     def connect_serial_camera(self) -> None:
-        # Resolve actual path
-        capture_source = self.config.capture_source
-        if os.path.islink(capture_source):
-            capture_source = os.path.realpath(capture_source)
-        self.logger.info(f"Connecting to serial capture source {self.current_capture_source} ({capture_source})")
-        if not any(p for p in serial.tools.list_ports.comports() if capture_source in p.device):
-            self.logger.warning(f"Serial port `{self.current_capture_source}` (`{capture_source}`) not found, waiting for reconnect.")
+        if split_serial_stream(self.current_capture_source) is not None:
+            self.connect_serial_hub()
+            return
+
+        self.logger.info(f"Connecting to serial capture source {self.current_capture_source}")
+        capture_source = self.find_serial_port(self.current_capture_source)
+        if capture_source is None:
+            self.logger.warning(f"Serial port `{self.current_capture_source}` not found, waiting for reconnect.")
             self.set_state(CameraState.DISCONNECTED)
-            time.sleep(COM_PORT_NOT_FOUND_TIMEOUT)
             return
 
+        # make sure we arent still reading from the previous capture source
+        self.disconnect_serial_camera()
         try:
-            self.serial_camera = serial.Serial(port=capture_source, baudrate=3000000, xonxoff=False, dsrdtr=False, rtscts=False)
-            # The `set_buffer_size` method is only available on Windows (we ignore the type error for linux)
-            if os.name == "nt":
-                self.serial_camera.set_buffer_size(rx_size=32768, tx_size=32768) # type: ignore[attr-defined]
+            self.serial_camera = open_serial_port(capture_source)
+            self.serial_reader = SerialReader(self.serial_camera, name=f"Serial Reader {self.current_capture_source}")
+            self.serial_reader.start()
             self.logger.info(f"Serial camera connected to `{self.current_capture_source}` (`{capture_source}`)")
             self.set_state(CameraState.CONNECTED)
         except Exception:
             self.logger.exception(f"Failed to connect to serial port `{self.current_capture_source}` (`{capture_source}`)")
             self.set_state(CameraState.DISCONNECTED)
 
-    # TODO: maybe move this into `get_serial_image`?
-    def serial_fetch_frame(self) -> bytes:
-        buffer = b""
-        while True:
-            buffer += self.serial_camera.read(2048)
-            beg = buffer.find(ETVR_HEADER + ETVR_HEADER_NAME)
-            if beg != -1:
-                break
-
-        # discard any data before header
-        if beg > 0:
-            buffer = buffer[beg:]
-            beg = 0
-        end = int.from_bytes(buffer[4:6], byteorder="little")
-        buffer += self.serial_camera.read(end - len(buffer))
-
-        frame = buffer[beg + ETVR_HEADER_LENGTH : end + ETVR_HEADER_LENGTH]
-        buffer = buffer[end + ETVR_HEADER_LENGTH :]
-
-        # drop any potentially outdated frames
-        if self.serial_camera.in_waiting > 32768:
-            self.logger.warning(f"Discarding serial buffer ({self.serial_camera.in_waiting} bytes)")
-            self.serial_camera.reset_input_buffer()
+    def find_serial_port(self, source: str) -> str | None:
+        """resolve symlinks and return the path of the serial port, None if it isnt plugged in"""
+        capture_source = os.path.realpath(source) if os.path.islink(source) else source
+        if not any(p for p in serial.tools.list_ports.comports() if capture_source in p.device):
+            return None
+        return capture_source
+
+    def disconnect_serial_camera(self) -> None:
+        # stop the reader first, it might be in the middle of a read
+        if self.serial_reader is not None:
+            self.serial_reader.stop()
+            self.report_serial_errors()
+            self.serial_reader = None
+            self.serial_resyncs = self.serial_corrupt = self.serial_dropped = 0
+        if self.serial_camera is not None and self.serial_camera.is_open:
+            self.serial_camera.close()
 
-        return frame
+    def report_serial_errors(self) -> None:
+        if self.serial_reader is None:
+            return
+
+        parser = self.serial_reader.parser
+        resyncs = parser.resyncs - self.serial_resyncs
+        corrupt = parser.corrupt - self.serial_corrupt
+        dropped = self.serial_reader.dropped - self.serial_dropped
+        if resyncs > 0:
+            self.increment("serial_resyncs", resyncs)
+        if corrupt > 0:
+            self.logger.debug(f"Discarded {corrupt} corrupt serial packet(s)")
+            self.increment("serial_corrupt_packets", corrupt)
+        if dropped > 0:
+            self.increment("serial_packets_dropped", dropped)
+        self.serial_resyncs += resyncs
+        self.serial_corrupt += corrupt
+        self.serial_dropped += dropped
 
     def get_serial_image(self) -> None:
-        if self.serial_camera is None or not self.serial_camera.is_open:
-            self.logger.warning("Serial camera disconnected, waiting for reconnect.")
+        if split_serial_stream(self.current_capture_source) is not None:
+            self.get_serial_hub_image()
+            return
+        if self.serial_reader is None or not self.serial_reader.is_alive():
+            error = self.serial_reader.error if self.serial_reader is not None else None
+            self.logger.warning(f"Serial camera disconnected ({error}), waiting for reconnect.")
             self.set_state(CameraState.DISCONNECTED)
+            self.disconnect_serial_camera()
             return
 
         try:
-            if self.serial_camera.in_waiting:
-                image = self.serial_fetch_frame()
-                frame = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
-                if frame is None:
-                    self.logger.warning("Failed to decode serial camera frame, discarding")
-                    return
+            # the reader thread keeps draining the port while we decode, we only ever decode the newest packet
+            result = self.serial_reader.get(timeout=SERIAL_READ_TIMEOUT)
+            self.report_serial_errors()
+            if result is None:
+                return
+            image, timestamp = result
+            self.record_packet(image, timestamp)
+            frame = self.decode_packet(image, timestamp)
+            if frame is None:
+                return
 
-                self.serial_frame_number += 1
-                fps = round(1.0 / self.delta_time)
-                self.push_image_to_queue(frame, self.serial_frame_number, fps)
+            self.serial_frame_number += 1
+            fps = round(1.0 / self.delta_time)
+            self.push_image_to_queue(frame, FrameMeta(timestamp, self.serial_frame_number, fps, self.uuid))
         except Exception:
             self.logger.exception("Serial capture error, assuming disconnect, waiting for reconnect.")
             self.set_state(CameraState.DISCONNECTED)
-            self.serial_camera.close()
+            self.disconnect_serial_camera()
+
+    def connect_serial_hub(self) -> None:
+        self.disconnect_serial_camera()
+        if self.serial_hub is None:
+            # the hub is only started for trackers that use a shared port when ETVR starts
+            self.logger.error(f"`{self.current_capture_source}` is a stream of a shared serial port, restart ETVR to use it")
+            self.set_state(CameraState.DISABLED)
+            return
+
+        self.serial_hub.skip()
+        self.serial_dropped = self.serial_hub.dropped
+        self.logger.info(f"Receiving `{self.current_capture_source}` from the serial hub")
+        self.set_state(CameraState.CONNECTED if self.serial_hub.connected() else CameraState.CONNECTING)
+
+    def get_serial_hub_image(self) -> None:
+        if self.serial_hub is None:
+            self.reconnect.idle(IDLE_TIMEOUT)
+            return
+
+        # the hub (re)opens the port on its own, so we only keep the state up to date for the frontend
+        connected = self.serial_hub.connected()
+        if connected != (self.get_state() == CameraState.CONNECTED):
+            if connected:
+                self.logger.info(f"Serial hub connected to `{self.current_capture_source}`")
+            else:
+                self.logger.warning(f"Serial hub lost `{self.current_capture_source}`, waiting for reconnect.")
+            self.set_state(CameraState.CONNECTED if connected else CameraState.CONNECTING)
+
+        try:
+            result = self.serial_hub.get(timeout=SERIAL_READ_TIMEOUT)
+            if self.serial_hub.dropped > self.serial_dropped:
+                self.increment("serial_packets_dropped", self.serial_hub.dropped - self.serial_dropped)
+                self.serial_dropped = self.serial_hub.dropped
+            if result is None:
+                return
+            image, timestamp = result
+            self.record_packet(image, timestamp)
+            frame = self.decode_packet(image, timestamp)
+            if frame is None:
+                return
+
+            self.serial_frame_number += 1
+            fps = round(1.0 / self.delta_time)
+            self.push_image_to_queue(frame, FrameMeta(timestamp, self.serial_frame_number, fps, self.uuid))
+        except Exception:
+            self.logger.exception("Failed to decode or push frame from the serial hub to queue")
+
+    # endregion
+
+    # region: Replay implementation
+    def connect_replay(self) -> None:
+        self.stop_replay()
+        path = self.current_capture_source[len(REPLAY_PREFIX) :]
+        try:
+            self.replay = ReplaySource(path, self.config.replay_speed, self.config.replay_loop)
+            self.replay_frame_number = 0
+            self.logger.info(f"Replaying `{path}` ({len(self.replay.recording)} packets, {self.replay.recording.duration():.1f}s)")
+            self.set_state(CameraState.CONNECTED)
+        except Exception:
+            self.logger.exception(f"Failed to open recording `{path}`, retrying")
+            self.set_state(CameraState.DISCONNECTED)
+
+    def stop_replay(self) -> None:
+        if self.replay is not None:
+            self.replay.close()
+            self.replay = None
+
+    def get_replay_image(self) -> None:
+        if self.replay is None or self.get_state() == CameraState.DISABLED:
+            self.reconnect.idle(IDLE_TIMEOUT)
+            return
+
+        # the timing can be changed while the replay is running
+        self.replay.speed = self.config.replay_speed
+        self.replay.loop = self.config.replay_loop
+        try:
+            result = self.replay.get(timeout=0.5)
+            if result is None:
+                if self.replay.finished():
+                    self.logger.info(f"Replay of `{self.current_capture_source}` finished")
+                    self.set_state(CameraState.DISABLED)
+                return
+            image, timestamp = result
+            frame = self.decode_packet(image, timestamp)
+            if frame is None:
+                return
+
+            self.replay_frame_number += 1
+            fps = round(1.0 / self.delta_time)
+            self.push_image_to_queue(frame, FrameMeta(timestamp, self.replay_frame_number, fps, self.uuid))
+        except Exception:
+            self.logger.exception("Failed to decode or push replayed frame to queue")
 
     # endregion
 
+    # region: Synthetic implementation
+    def connect_synthetic(self) -> None:
+        self.synthetic = None
+        try:
+            settings = SyntheticSettings.from_url(self.current_capture_source)
+        except ValueError as e:
+            # nothing will change until the capture source does, so dont bother retrying
+            self.logger.error(f"Invalid synthetic capture source `{self.current_capture_source}` ({e})")
+            self.set_state(CameraState.DISABLED)
+            return
+
+        self.synthetic = SyntheticSource(settings)
+        self.logger.info(f"Generating synthetic {settings.width}x{settings.height} frames at {settings.fps or 'max'} fps")
+        self.set_state(CameraState.CONNECTED)
+
+    def get_synthetic_image(self) -> None:
+        if self.synthetic is None:
+            self.reconnect.idle(IDLE_TIMEOUT)
+            return
+
+        try:
+            result = self.synthetic.get(timeout=0.5)
+            if result is None:
+                return
+            frame, ground_truth, timestamp = result
+            self.increment("frames_captured")
+            self.increment("frames_decoded")
+            # the ground truth is normalized, so it doesnt change when the frame is scaled down
+            frame = reduce_frame(frame, self.config.decode_mode, self.config.decode_scale)
+            self.record_latency("capture", time.perf_counter() - timestamp)
+            fps = round(1.0 / self.delta_time)
+            self.push_image_to_queue(frame, FrameMeta(timestamp, self.synthetic.frame_number, fps, self.uuid, ground_truth))
+        except Exception:
+            self.logger.exception("Failed to generate or push synthetic frame to queue")
+
+    # endregion
+
+    def record_packet(self, packet: bytes, timestamp: float) -> None:
+        # the recording is (re)started as soon as `record_path` changes
+        if self.config.record_path != self.recording_path:
+            self.stop_recording()
+            self.recording_path = self.config.record_path
+            if self.recording_path != "":
+                try:
+                    self.recorder = PacketRecorder(self.recording_path)
+                    self.logger.info(f"Recording raw packets to `{self.recording_path}`")
+                except Exception:
+                    self.logger.exception(f"Failed to open `{self.recording_path}` for recording")
+
+        if self.recorder is not None:
+            self.recorder.write(packet, timestamp)
+
+    def stop_recording(self) -> None:
+        if self.recorder is not None:
+            self.logger.info(f"Recorded {self.recorder.packets} packets to `{self.recorder.path}`")
+            self.recorder.close()
+            self.recorder = None
+
+    def decode_packet(self, packet: bytes | memoryview, timestamp: float) -> MatLike | None:
+        self.increment("frames_captured")
+        frame = decode_jpeg(packet, self.config.decode_mode, self.config.decode_scale)
+        if frame is None:
+            self.logger.warning("Failed to decode frame, discarding")
+            return None
+        self.increment("frames_decoded")
+        # time since the packet was received, including the time it spent waiting for us
+        self.record_latency("capture", time.perf_counter() - timestamp)
+        return frame
+
+    def get_preprocess_settings(self, config: CameraConfig) -> PreprocessSettings:
+        # the ROI and focal length are in pixels of the full resolution frame
+        scale = config.decode_scale
+        return PreprocessSettings(
+            flip_x_axis=config.flip_x_axis,
+            flip_y_axis=config.flip_y_axis,
+            rotation=config.rotation,
+            roi=scale_roi((config.roi_x, config.roi_y, config.roi_w, config.roi_h), scale),
+            distortion=tuple(config.lens_distortion),
+            focal_length=config.lens_focal_length / scale,
+        )
+
     def preprocess_frame(self, frame: MatLike) -> MatLike:
-        # flip the frame if needed
-        if self.config.flip_x_axis:
-            frame = cv2.flip(frame, 0)
-        if self.config.flip_y_axis:
-            frame = cv2.flip(frame, 1)
-
-        frame = mat_rotate(frame, self.config.rotation)
-        # send frame to frontend
+        settings = self.preprocess_settings
+        # send frame to frontend, nobody is watching if the queue is full so we dont even bother building the preview
         try:
-            self.frontend_queue.put(frame, block=False)
+            if not self.frontend_queue.full():
+                self.frontend_queue.put(self.full_size_frame(self.preprocessor.preview(frame, settings)), block=False)
         except Full:
             pass
-        frame = mat_crop(self.config.roi_x, self.config.roi_y, self.config.roi_w, self.config.roi_h, frame)
+        # flip, rotate, undistort and crop in one go
+        frame = self.preprocessor.process(frame, settings)
+        # everything after the camera works on grayscale, colors are only ever used for the frontend preview
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
         return frame
 
-    def push_image_to_queue(self, frame: MatLike, frame_number: float, fps: float) -> None:
+    def full_size_frame(self, frame: MatLike) -> MatLike:
+        # the frontend draws the ROI on top of this frame, so it needs to match the resolution of the camera
+        scale = self.config.decode_scale
+        if scale == 1:
+            return frame
+        return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+
+    def push_image_to_queue(self, frame: MatLike, meta: FrameMeta) -> None:
         try:
+            start = time.perf_counter()
             self.window.imshow(self.process_name(), frame)
             frame = self.preprocess_frame(frame)
-            qsize: int = self.image_queue.qsize()
-            if qsize > QUEUE_BACKPRESSURE_THRESHOLD:
-                self.logger.warning(f"Capture queue backpressure of {qsize}, dropping frames...")
-                clear_queue(self.image_queue)
-
-            self.image_queue.put(frame)
-            # self.image_queue.put(frame, frame_number, fps)
+            # the ring overwrites the oldest frame if the processor falls behind, so no need to handle backpressure here
+            self.image_queue.put(frame, meta)
+            self.record_latency("preprocess", time.perf_counter() - start)
         except Exception:
             self.logger.exception("Failed to push to camera capture queue!")
 
@@ -1,98 +1,486 @@
 from ..types import EyeData, Algorithms, TRACKING_FAILED
-from ..config import AlgorithmConfig, TrackerConfig
-from ..utils import WorkerProcess, BaseAlgorithm
+from ..config import AlgorithmConfig, PipelineConfig, TrackerConfig
+from ..utils import WorkerProcess, BaseAlgorithm, FrameChannel, EyeDataSlot, LatencyRecorder, MetricCounters, AlgorithmStats
+from ..utils import Overlay, draw_overlays
+from .inference import InferenceClient
 from cv2.typing import MatLike
 from queue import Queue, Full
-from copy import deepcopy
-import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Final
+import ctypes
 import queue
-import cv2
+import math
+import time
+
+# how often we log how many frames were dropped, in seconds
+DROP_REPORT_INTERVAL: Final = 10
+# with `adaptive_order` the algorithms are sorted again every this many frames
+ADAPTIVE_REORDER_INTERVAL: Final = 30
+# and every this many frames the algorithm that ran the longest time ago is tried first, so it can earn its spot back
+ADAPTIVE_PROBE_INTERVAL: Final = 100
+# a algorithm gets degraded after running over its `algorithm_budget_ms` this many times in a row
+OVERRUN_LIMIT: Final = 5
+# and skipped for this many frames if it cant get any cheaper
+OVERRUN_SKIP_FRAMES: Final = 120
+# with `search_window` the window covers this much of the frame on both axes, the smallest size that fits is used.
+# there are only a few sizes, so algorithms that cache work per frame size (like HSF) dont start over on every frame
+SEARCH_WINDOW_SIZES: Final = (0.5, 0.75)
+# the window reaches at least this far past the previous pupil center (relative to the frame), enough for the pupil itself
+SEARCH_WINDOW_MARGIN: Final = 0.15
+# plus this many times the distance the pupil recently moved per frame
+SEARCH_WINDOW_MOTION_SCALE: Final = 4
+# how quickly that distance follows the latest frames, 1 only looks at the last frame
+SEARCH_WINDOW_MOTION_SMOOTHING: Final = 0.3
+# a eye closed further than this counts as a blink, the pupil is often somewhere else once the lid opens again
+SEARCH_WINDOW_BLINK: Final = 0.5
 
 
 class EyeProcessor(WorkerProcess):
     def __init__(
         self,
         tracker_config: TrackerConfig,
-        image_queue: Queue[MatLike],
-        osc_queue: Queue[EyeData],
+        image_queue: FrameChannel,
+        osc_queue: EyeDataSlot,
         frontend_queue: Queue[MatLike],
+        threaded: bool = False,
+        latency: LatencyRecorder | None = None,
+        counters: MetricCounters | None = None,
+        inference: InferenceClient | None = None,
+        preview_subscribers: ctypes.c_int | None = None,
+        algorithm_stats: AlgorithmStats | None = None,
     ):
-        super().__init__(name=f"Eye Processor {str(tracker_config.name)}", uuid=tracker_config.uuid)
+        super().__init__(
+            name=f"Eye Processor {str(tracker_config.name)}",
+            uuid=tracker_config.uuid,
+            threaded=threaded,
+            latency=latency,
+            counters=counters,
+        )
         # Synced variables
         self.frontend_queue = frontend_queue
         self.image_queue = image_queue
         self.osc_queue = osc_queue
+        self.inference = inference
+        # how many clients are watching `frontend_queue`, if None we always assume someone is watching
+        self.preview_subscribers = preview_subscribers
+        self.algorithm_stats = algorithm_stats if algorithm_stats is not None else AlgorithmStats()
         # Unsynced variables
+        self.loop_stage = "loop.eye_processor"
         self.algorithms: list[BaseAlgorithm] = []
+        # only used for the openness, see `AlgorithmConfig.blink_order`
+        self.blink_algorithms: list[BaseAlgorithm] = []
+        # `algorithms` sorted by `AlgorithmStats.expected_cost`, only used with `adaptive_order`
+        self.effective_order: list[BaseAlgorithm] = []
+        self.frame_count: int = 0
+        # `frame_count` of the last time a algorithm ran
+        self.last_run: dict[BaseAlgorithm, int] = {}
+        # runs in a row that took longer than `algorithm_budget_ms`, and the `frame_count` skipped algorithms run again
+        self.overruns: dict[BaseAlgorithm, int] = {}
+        self.skipped_until: dict[BaseAlgorithm, int] = {}
+        # `algorithm_budget_ms` of every algorithm that has one, in seconds
+        self.budgets: dict[BaseAlgorithm, float] = {}
+        # set when `frame_budget_ms` ran out before every algorithm that should have run got to run
+        self.budget_exceeded: bool = False
+        # the last gaze that was found, used for the position while only the blink algorithms find something
+        self.last_gaze: EyeData | None = None
+        # pupil position of the previous frame and how far it moved per frame lately, only used with `search_window`
+        self.last_position: tuple[float, float] | None = None
+        self.motion: float = 0
         self.config: AlgorithmConfig = tracker_config.algorithm
+        self.pipeline_config: PipelineConfig = tracker_config.pipeline
         self.tracker_position = tracker_config.tracker_position
+        self.drop_counts: dict[str, int] = {}
+        self.last_drop_report: float = 0
+        # None by default because thread pools arent picklable
+        self.executor: ThreadPoolExecutor | None = None
+        self.executor_workers: int = 1
+        # algorithms that are still running in the thread pool, they are skipped until they finish
+        self.running_algorithms: dict[BaseAlgorithm, Future[EyeData]] = {}
 
     def startup(self) -> None:
         self.setup_algorithms()
+        self.setup_drop_policy()
+        self.setup_executor()
 
     def run(self) -> None:
         try:
-            current_frame = self.image_queue.get(block=True, timeout=0.5)
-            current_frame = cv2.cvtColor(current_frame, cv2.COLOR_BGR2GRAY)
+            current_frame, meta = self.image_queue.get(block=True, timeout=0.5)
+            start = time.perf_counter()
+            self.record_latency("frame_dequeued", start - meta.timestamp)
         except queue.Empty:
             return
         except Exception:
             self.logger.exception("Failed to get image from queue")
             return
+        finally:
+            self.report_drops()
 
-        frames = []
-        result = EyeData(0, 0, 0, self.tracker_position)
-        # TODO: add support for running one algorithm for blink detection and another for gaze tracking
-        for algorithm in self.algorithms:
-            result, frame = algorithm.run(deepcopy(current_frame), self.tracker_position)
-            frames.append(frame)
-            if result == TRACKING_FAILED:
-                self.logger.debug(f"Algorithm {algorithm.get_name()} failed to find a result")
-                continue
-            break
+        preview = self.preview_active()
+        result, overlays = self.run_algorithms(current_frame, preview)
+        self.increment("frames_processed")
+        if result == TRACKING_FAILED:
+            self.increment("tracking_failed")
+        elif meta.ground_truth is not None:
+            self.record_tracking_error(result, meta.ground_truth)
 
+        self.osc_queue.put(replace(result, timestamp=meta.timestamp, frame_number=meta.frame_number))
+        self.record_latency("process", time.perf_counter() - start)
+        if not preview:
+            return
+
+        preview_frame = draw_overlays(current_frame, overlays)
         try:
-            # This is kinda bad, i would like to use a bitwise or but ahsf modifies the frame dimensions
-            frame_shape = max(frames, key=lambda x: x.shape[0] * x.shape[1]).shape
-            current_frame = np.zeros(frame_shape, dtype=np.uint8)
-            frame_weight = min(1.0 / (len(frames)), 0.5)
-            for frame in frames:
-                if frame.shape != frame_shape:
-                    frame = cv2.resize(frame, (frame_shape[1], frame_shape[0]))
-                current_frame = cv2.addWeighted(current_frame, 1 - frame_weight, frame, frame_weight, 1)
-            # make dark colors darker and light colors lighter
-            current_frame = cv2.addWeighted(current_frame, 1.5, current_frame, 0, 0)
-            self.osc_queue.put(result)
-            self.frontend_queue.put(current_frame, block=False)
+            self.frontend_queue.put(preview_frame, block=False)
         except Full:
             pass
-        self.window.imshow(self.process_name(), current_frame)
+        self.window.imshow(self.process_name(), preview_frame)
 
     def shutdown(self) -> None:
-        pass
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
 
     def on_tracker_config_update(self, tracker_config: TrackerConfig) -> None:
         self.config = tracker_config.algorithm
+        self.pipeline_config = tracker_config.pipeline
         self.tracker_position = tracker_config.tracker_position
         self.setup_algorithms()
+        self.setup_drop_policy()
+        self.setup_executor()
 
-    def setup_algorithms(self) -> None:
-        from ..algorithms import Blob, HSF, HSRAC, Leap, AHSF
+    def run_algorithms(self, frame: MatLike, preview: bool = True) -> tuple[EyeData, list[Overlay]]:
+        """run the algorithms in order until one of them finds a result
+        * The first `parallel_algorithms` algorithms are started at the same time, the result of the
+          highest priority algorithm that succeeds is used and the rest are ignored.
+        * If `blink_order` is set the openness comes from the first of those algorithms that succeeds, algorithms
+          that already ran for the gaze arent run again. If all of them fail the openness of the gaze is kept.
+          They run even if no gaze was found (e.g. because the eye is closed), the openness is then reported
+          with the last gaze that was found.
+        * With `frame_budget_ms` algorithms that wont finish in time (going by how long they usually take) are skipped,
+          the first algorithm of a frame always runs. Parallel algorithms that arent done in time are ignored.
+        * Every algorithm gets the same read only view of the frame, the overlays of the algorithms that ran are
+          returned so they can be drawn on the preview, they are disabled if `preview` is False.
+        * With `search_window` algorithms that support it only get the part of the frame around the previous pupil
+          position, their results are moved back to the whole frame. The blink algorithms always get the whole frame.
+        """
+        budget = self.config.frame_budget_ms
+        deadline = time.perf_counter() + budget / 1000 if budget > 0 else None
+        self.budget_exceeded = False
+        # a view, so we dont change the flags of a frame someone else might still be writing to
+        frame = frame.view()
+        frame.flags.writeable = False
+        overlays: list[Overlay] = []
+        results: dict[BaseAlgorithm, EyeData] = {}
+        self.frame_count += 1
+        if self.config.adaptive_order and self.frame_count % ADAPTIVE_REORDER_INTERVAL == 0:
+            self.reorder_algorithms()
+        window = self.search_window(frame.shape)
+        gaze = result = self.run_gaze_algorithms(frame, window, preview, deadline, results, overlays)
+        if gaze != TRACKING_FAILED:
+            self.last_gaze = gaze
+        blink = self.run_blink_algorithms(frame, preview, deadline, results, overlays)
+        if blink is not None:
+            # without any gaze so far the position of the blink algorithm is the best we have
+            position = gaze if gaze != TRACKING_FAILED else self.last_gaze or blink
+            result = replace(position, blink=blink.blink)
+        if self.budget_exceeded:
+            self.increment("frame_budget_exceeded")
+        # the openness might come from `blink_order`, the gaze algorithm doesnt always know about blinks
+        self.update_search_window(gaze, result.blink, window)
+        return result, overlays
+
+    def run_gaze_algorithms(
+        self,
+        frame: MatLike,
+        window: tuple[int, int, int, int] | None,
+        preview: bool,
+        deadline: float | None,
+        results: dict[BaseAlgorithm, EyeData],
+        overlays: list[Overlay],
+    ) -> EyeData:
+        """run `algorithm_order`, the result and overlay of every algorithm that ran are added to `results` and `overlays`"""
+        algorithms = [algorithm for algorithm in self.gaze_order() if self.frame_count >= self.skipped_until.get(algorithm, 0)]
+        # stays failed if every algorithm is still busy with a previous frame
+        result = TRACKING_FAILED
+        parallel = 0
+        futures: list[tuple[BaseAlgorithm, Overlay, Future[EyeData] | None]] = []
+        executor = self.executor
+        if executor is not None:
+            parallel = min(self.config.parallel_algorithms, len(algorithms))
+            for algorithm in algorithms[:parallel]:
+                algorithm_window = window if algorithm.supports_search_window else None
+                overlay = Overlay(frame.shape, enabled=preview, window=algorithm_window)
+                futures.append((algorithm, overlay, self.submit_algorithm(executor, algorithm, frame, overlay, algorithm_window)))
+        started = any(future is not None for _, _, future in futures)
+        for index, (algorithm, overlay, future) in enumerate(futures):
+            if future is None:
+                self.logger.debug(f"Algorithm {algorithm.get_name()} is still busy with a previous frame, skipping")
+                continue
+            try:
+                result = results[algorithm] = future.result(None if deadline is None else max(deadline - time.perf_counter(), 0))
+            except TimeoutError:
+                # it keeps running in the background and is skipped until it is done
+                self.logger.debug(f"Algorithm {algorithm.get_name()} didnt finish within the frame budget, ignoring it")
+                self.budget_exceeded = True
+                continue
+            overlays.append(overlay)
+            if result != TRACKING_FAILED:
+                # we already have the best result we are going to get, dont start anything that hasnt started yet
+                for _, _, lower_priority in futures[index + 1 :]:
+                    if lower_priority is not None:
+                        lower_priority.cancel()
+                return result
+            self.on_algorithm_failed(algorithm)
+
+        for algorithm in algorithms[parallel:]:
+            if started and not self.fits_budget(algorithm, deadline):
+                continue
+            started = True
+            algorithm_window = window if algorithm.supports_search_window else None
+            overlay = Overlay(frame.shape, enabled=preview, window=algorithm_window)
+            result = results[algorithm] = self.run_algorithm(algorithm, frame, overlay, algorithm_window)
+            overlays.append(overlay)
+            if result != TRACKING_FAILED:
+                break
+            self.on_algorithm_failed(algorithm)
 
+        return result
+
+    def run_blink_algorithms(
+        self,
+        frame: MatLike,
+        preview: bool,
+        deadline: float | None,
+        results: dict[BaseAlgorithm, EyeData],
+        overlays: list[Overlay],
+    ) -> EyeData | None:
+        """run `blink_order` until one of them succeeds and return its result, None if none of them did"""
+        for algorithm in self.blink_algorithms:
+            blink_result = results.get(algorithm)
+            if blink_result is None:
+                previous = self.running_algorithms.get(algorithm)
+                if previous is not None and not previous.done():
+                    continue
+                if self.frame_count < self.skipped_until.get(algorithm, 0) or not self.fits_budget(algorithm, deadline):
+                    continue
+                overlay = Overlay(frame.shape, enabled=preview)
+                blink_result = results[algorithm] = self.run_algorithm(algorithm, frame, overlay)
+                overlays.append(overlay)
+                if blink_result == TRACKING_FAILED:
+                    self.on_algorithm_failed(algorithm)
+            if blink_result != TRACKING_FAILED:
+                return blink_result
+        return None
+
+    def fits_budget(self, algorithm: BaseAlgorithm, deadline: float | None) -> bool:
+        """True if the algorithm usually finishes before the frame deadline"""
+        if deadline is None:
+            return True
+        if time.perf_counter() + self.algorithm_stats.mean_runtime(algorithm.get_name().upper()) <= deadline:
+            return True
+        self.logger.debug(f"Skipping algorithm {algorithm.get_name()}, it wont finish within the frame budget")
+        self.budget_exceeded = True
+        return False
+
+    def gaze_order(self) -> list[BaseAlgorithm]:
+        """the order to run `algorithm_order` in for the current frame"""
+        if not self.config.adaptive_order or len(self.algorithms) < 2:
+            return self.algorithms
+
+        if self.frame_count % ADAPTIVE_PROBE_INTERVAL == 0:
+            # algorithms behind one that keeps succeeding never run, so their statistics never change on their own
+            stale = min(self.effective_order[1:], key=lambda algorithm: self.last_run.get(algorithm, 0))
+            return [stale, *(algorithm for algorithm in self.effective_order if algorithm is not stale)]
+        return self.effective_order
+
+    def reorder_algorithms(self) -> None:
+        # the chain stops at the first success, so running the algorithms by increasing runtime / success rate
+        # minimizes the expected cost of a frame. sorting is stable, so ties keep the configured order
+        stats = self.algorithm_stats
+        self.effective_order = sorted(self.algorithms, key=lambda algorithm: stats.expected_cost(algorithm.get_name().upper()))
+        stats.set_order([algorithm.get_name().upper() for algorithm in self.effective_order])
+
+    def search_window(self, shape: tuple[int, ...]) -> tuple[int, int, int, int] | None:
+        """the part of the frame around the previous pupil position as (x, y, width, height), None to search everything"""
+        if not self.config.search_window or self.last_position is None:
+            return None
+        if not any(algorithm.supports_search_window for algorithm in self.algorithms):
+            return None
+
+        reach = SEARCH_WINDOW_MARGIN + SEARCH_WINDOW_MOTION_SCALE * self.motion
+        size = next((size for size in SEARCH_WINDOW_SIZES if size / 2 >= reach), None)
+        if size is None:
+            return None
+        height, width = shape[:2]
+        window_width, window_height = round(width * size), round(height * size)
+        x, y = self.last_position
+        # moved back into the frame at the edges instead of cut off, so the size stays the same
+        left = min(max(round(x * width - window_width / 2), 0), width - window_width)
+        top = min(max(round(y * height - window_height / 2), 0), height - window_height)
+        return left, top, window_width, window_height
+
+    def update_search_window(self, result: EyeData, blink: float, window: tuple[int, int, int, int] | None) -> None:
+        """remember where the pupil (gaze `result`) is for the next frame, or forget it so the next frame searches everything"""
+        if not self.config.search_window:
+            return
+
+        if window is not None:
+            self.increment("search_window_frames")
+            if result == TRACKING_FAILED:
+                self.increment("search_window_misses")
+        if result == TRACKING_FAILED or blink < SEARCH_WINDOW_BLINK:
+            self.last_position = None
+            self.motion = 0
+            return
+        if self.last_position is not None:
+            moved = max(abs(result.x - self.last_position[0]), abs(result.y - self.last_position[1]))
+            self.motion += SEARCH_WINDOW_MOTION_SMOOTHING * (moved - self.motion)
+        self.last_position = (result.x, result.y)
+
+    def submit_algorithm(
+        self,
+        executor: ThreadPoolExecutor,
+        algorithm: BaseAlgorithm,
+        frame: MatLike,
+        overlay: Overlay,
+        window: tuple[int, int, int, int] | None = None,
+    ) -> Future[EyeData] | None:
+        """start a algorithm in the thread pool, returns None if it is still running on a previous frame"""
+        previous = self.running_algorithms.get(algorithm)
+        if previous is not None and not previous.done():
+            return None
+
+        future = executor.submit(self.run_algorithm, algorithm, frame, overlay, window)
+        self.running_algorithms[algorithm] = future
+        return future
+
+    def run_algorithm(
+        self, algorithm: BaseAlgorithm, frame: MatLike, overlay: Overlay, window: tuple[int, int, int, int] | None = None
+    ) -> EyeData:
+        """run a algorithm on the frame or only the `window` of it, the result is always relative to the whole frame"""
+        name = algorithm.get_name().upper()
+        start = time.perf_counter()
+        if window is None:
+            result = algorithm.run(frame, self.tracker_position, overlay)
+        else:
+            left, top, width, height = window
+            result = algorithm.run(frame[top : top + height, left : left + width], self.tracker_position, overlay)
+            if result != TRACKING_FAILED:
+                x = (left + result.x * width) / frame.shape[1]
+                y = (top + result.y * height) / frame.shape[0]
+                result = replace(result, x=x, y=y)
+        elapsed = time.perf_counter() - start
+        self.record_latency(f"algorithm.{name}", elapsed)
+        self.algorithm_stats.record(name, result != TRACKING_FAILED, elapsed)
+        self.last_run[algorithm] = self.frame_count
+        budget = self.budgets.get(algorithm)
+        if budget is not None:
+            self.check_budget(algorithm, elapsed, budget)
+        return result
+
+    def check_budget(self, algorithm: BaseAlgorithm, elapsed: float, budget: float) -> None:
+        """degrade or skip a algorithm that keeps running over its budget, only called by the thread running it"""
+        if elapsed <= budget:
+            self.overruns[algorithm] = 0
+            return
+
+        name = algorithm.get_name().upper()
+        self.increment(f"algorithm_overrun.{name}")
+        overruns = self.overruns.get(algorithm, 0) + 1
+        self.overruns[algorithm] = overruns if overruns < OVERRUN_LIMIT else 0
+        if overruns < OVERRUN_LIMIT or algorithm.degrade():
+            return
+        self.logger.warning(f"Algorithm {name} keeps running over its time budget, skipping it for {OVERRUN_SKIP_FRAMES} frames")
+        self.skipped_until[algorithm] = self.frame_count + OVERRUN_SKIP_FRAMES
+
+    def preview_active(self) -> bool:
+        """True if anyone is going to look at the preview, either through the frontend or a debug window"""
+        if self.window.debug:
+            return True
+        return self.preview_subscribers is None or self.preview_subscribers.value > 0
+
+    def record_tracking_error(self, result: EyeData, ground_truth: tuple[float, float, float]) -> None:
+        # the ground truth is relative to the whole frame, so this only makes sense without rotation or a ROI
+        x, y, blink = ground_truth
+        self.increment("ground_truth_frames")
+        self.increment("tracking_error_sum", round(math.hypot(result.x - x, result.y - y) * 1e6))
+        self.increment("blink_error_sum", round(abs(result.blink - blink) * 1e6))
+
+    def on_algorithm_failed(self, algorithm: BaseAlgorithm) -> None:
+        self.logger.debug(f"Algorithm {algorithm.get_name()} failed to find a result")
+        self.increment(f"algorithm_failed.{algorithm.get_name().upper()}")
+
+    def setup_executor(self) -> None:
+        workers = self.config.parallel_algorithms
+        if workers == self.executor_workers:
+            return
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix=self.name) if workers > 1 else None
+        self.executor_workers = workers
+
+    def setup_drop_policy(self) -> None:
+        self.image_queue.set_policy(
+            self.pipeline_config.drop_policy,
+            max_frames=self.pipeline_config.max_queued_frames,
+            deadline=self.pipeline_config.frame_deadline_ms / 1000,
+        )
+
+    def report_drops(self) -> None:
+        now = time.perf_counter()
+        if now - self.last_drop_report < DROP_REPORT_INTERVAL:
+            return
+
+        self.last_drop_report = now
+        drop_counts = self.image_queue.drop_counts()
+        dropped = {reason: count - self.drop_counts.get(reason, 0) for reason, count in drop_counts.items()}
+        self.drop_counts = drop_counts
+        if any(dropped.values()):
+            summary = ", ".join(f"{reason}={count}" for reason, count in dropped.items() if count > 0)
+            self.logger.info(f"Dropped frames in the last {DROP_REPORT_INTERVAL}s ({summary})")
+
+    def setup_algorithms(self) -> None:
         self.algorithms.clear()
-        for algorithm in self.config.algorithm_order:
-            match algorithm:
-                case Algorithms.BLOB:
-                    self.algorithms.append(Blob(self))
-                case Algorithms.HSF:
-                    self.algorithms.append(HSF(self))
-                case Algorithms.HSRAC:
-                    self.algorithms.append(HSRAC(self))
-                # case Algorithms.RANSAC:
-                #     self.algorithms.append(RANSAC(self))
-                case Algorithms.LEAP:
-                    self.algorithms.append(Leap(self))
-                case Algorithms.AHSF:
-                    self.algorithms.append(AHSF(self))
-                case _:
-                    self.logger.warning(f"Unknown algorithm: {algorithm}")
+        self.blink_algorithms.clear()
+        self.running_algorithms.clear()
+        # a algorithm in both orders is only created once, so it keeps its state and only runs once per frame
+        orders = self.config.algorithm_order + self.config.blink_order
+        created = {algorithm: self.create_algorithm(algorithm) for algorithm in dict.fromkeys(orders)}
+        self.algorithms.extend(instance for algorithm in self.config.algorithm_order if (instance := created[algorithm]) is not None)
+        self.blink_algorithms.extend(instance for algorithm in self.config.blink_order if (instance := created[algorithm]) is not None)
+        self.budgets = {
+            instance: budget / 1000
+            for algorithm, budget in self.config.algorithm_budget_ms.items()
+            if (instance := created.get(algorithm)) is not None
+        }
+        self.last_run.clear()
+        self.overruns.clear()
+        self.skipped_until.clear()
+        self.last_gaze = None
+        self.last_position = None
+        self.motion = 0
+        self.effective_order = list(self.algorithms)
+        self.algorithm_stats.set_order([algorithm.get_name().upper() for algorithm in self.algorithms])
+
+    def create_algorithm(self, algorithm: Algorithms) -> BaseAlgorithm | None:
+        from ..algorithms import Blob, HSF, HSRAC, Leap, AHSF, Intensity
+
+        match algorithm:
+            case Algorithms.BLOB:
+                return Blob(self)
+            case Algorithms.HSF:
+                return HSF(self)
+            case Algorithms.HSRAC:
+                return HSRAC(self)
+            # case Algorithms.RANSAC:
+            #     return RANSAC(self)
+            case Algorithms.LEAP:
+                return Leap(self)
+            case Algorithms.AHSF:
+                return AHSF(self)
+            case Algorithms.INTENSITY:
+                return Intensity(self)
+            case _:
+                self.logger.warning(f"Unknown algorithm: {algorithm}")
+                return None
@@ -0,0 +1,184 @@
+from ..utils import WorkerProcess
+from ..config import EyeTrackConfig, InferenceConfig
+from ..assets import MODELS_DIR
+from multiprocessing import Event
+from multiprocessing.sharedctypes import RawArray, RawValue
+from typing import Final
+import numpy as np
+import ctypes
+import time
+import os
+
+LEAP_MODEL_PATH: Final = os.path.join(MODELS_DIR, "leap.onnx")
+LEAP_INPUT_SHAPE: Final = (3, 112, 112)
+LEAP_OUTPUT_SHAPE: Final = (7, 2)
+# how long a client waits for the service before giving up on a frame
+INFERENCE_TIMEOUT: Final = 1.0
+
+
+class InferenceClient:
+    """A single request slot of the `InferenceService`, every tracker gets its own.
+
+    The input tensor and the result live in shared memory, the event is only used to signal that a result is ready.
+    Every request gets a sequence number that the service echoes back with the result, so a late result of a request
+    we already gave up on is never mistaken for the result of the current one.
+    """
+
+    def __init__(self, wakeup, running):
+        # Synced variables
+        self.__input = RawArray(ctypes.c_float, int(np.prod(LEAP_INPUT_SHAPE)))
+        self.__output = RawArray(ctypes.c_float, int(np.prod(LEAP_OUTPUT_SHAPE)))
+        self.__failed = RawValue(ctypes.c_bool, False)
+        # sequence number of the last submitted request and of the request the last result belongs to
+        self.__request = RawValue(ctypes.c_int64, 0)
+        self.__response = RawValue(ctypes.c_int64, 0)
+        self.__done = Event()
+        # shared between all clients of a service
+        self.__wakeup = wakeup
+        self.__running = running
+
+    # region: Client methods
+    def run(self, tensor: np.ndarray, timeout: float = INFERENCE_TIMEOUT) -> np.ndarray | None:
+        """run the model on a single `LEAP_INPUT_SHAPE` tensor, returns None if the service failed or isnt running"""
+        if not self.submit(tensor):
+            return None
+        return self.result(timeout)
+
+    def submit(self, tensor: np.ndarray) -> bool:
+        if not self.__running.is_set():
+            return False
+
+        self.__done.clear()
+        np.frombuffer(memoryview(self.__input), dtype=np.float32)[:] = tensor.ravel()
+        # only published once the tensor is complete
+        self.__request.value += 1
+        self.__wakeup.set()
+        return True
+
+    def result(self, timeout: float = INFERENCE_TIMEOUT) -> np.ndarray | None:
+        deadline = time.perf_counter() + timeout
+        while True:
+            # cleared before checking, so we cant miss a result that comes in right after the check
+            self.__done.clear()
+            if self.__response.value == self.__request.value:
+                break
+            # results of older requests wake us up as well, they are ignored
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self.__done.wait(remaining):
+                return None
+
+        if self.__failed.value:
+            return None
+        return np.frombuffer(memoryview(self.__output), dtype=np.float32).reshape(LEAP_OUTPUT_SHAPE).copy()
+
+    # endregion
+
+    # region: Service methods
+    def is_pending(self) -> bool:
+        return self.__request.value != self.__response.value
+
+    def sequence(self) -> int:
+        """sequence number of the newest request, must be read before its `tensor`"""
+        return self.__request.value
+
+    def tensor(self) -> np.ndarray:
+        return np.frombuffer(memoryview(self.__input), dtype=np.float32).reshape(LEAP_INPUT_SHAPE)
+
+    def respond(self, sequence: int, output: np.ndarray | None) -> None:
+        """publish the result of the request with the given sequence number"""
+        self.__failed.value = output is None
+        if output is not None:
+            np.frombuffer(memoryview(self.__output), dtype=np.float32)[:] = output.ravel()
+        self.__response.value = sequence
+        self.__done.set()
+
+    # endregion
+
+
+class InferenceService(WorkerProcess):
+    """Owns a single ONNX session that is shared by the LEAP algorithm of every tracker.
+
+    Requests that arrive within `batch_window_ms` of each other are run as a single batch, if the model
+    doesnt support batching we fall back to running them one after another.
+    """
+
+    def __init__(self, clients: int):
+        super().__init__(name="Inference Service")
+        # Synced variables
+        self.wakeup = Event()
+        self.running = Event()
+        self.clients = [InferenceClient(self.wakeup, self.running) for _ in range(clients)]
+        # Unsynced variables
+        self.config: InferenceConfig = self.base_config.inference
+        self.batching: bool = True
+        # None by default because sessions arent picklable
+        self.session = None
+
+    def startup(self) -> None:
+        import onnxruntime as rt
+
+        rt.disable_telemetry_events()
+        options = rt.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = self.config.intra_op_threads
+        options.graph_optimization_level = rt.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = rt.InferenceSession(LEAP_MODEL_PATH, options, ["CPUExecutionProvider"])
+        self.logger.info(f"Created shared inference session with `{LEAP_MODEL_PATH}` for {len(self.clients)} trackers")
+        self.running.set()
+
+    def run(self) -> None:
+        if not self.wakeup.wait(timeout=0.5):
+            return
+
+        # give the other trackers a chance to submit their frame, so we can run them all at once
+        deadline = time.perf_counter() + self.config.batch_window_ms / 1000
+        while not all(client.is_pending() for client in self.clients):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.wakeup.clear()
+            self.wakeup.wait(remaining)
+        self.wakeup.clear()
+        self.process_requests()
+
+    def shutdown(self) -> None:
+        self.running.clear()
+        # dont leave anyone waiting for a result that will never come
+        for client in self.clients:
+            if client.is_pending():
+                client.respond(client.sequence(), None)
+
+    def on_config_update(self, config: EyeTrackConfig) -> None:
+        self.config = config.inference
+
+    def process_requests(self) -> None:
+        pending = [client for client in self.clients if client.is_pending()]
+        if len(pending) == 0:
+            return
+
+        # if a client gives up and submits a new frame while we are busy, the result is tagged with the old sequence
+        # number and the new frame stays pending for the next round
+        sequences = [client.sequence() for client in pending]
+        try:
+            outputs = self.infer(np.stack([client.tensor() for client in pending]))
+        except Exception:
+            self.logger.exception("Failed to run inference")
+            for client, sequence in zip(pending, sequences):
+                client.respond(sequence, None)
+            return
+
+        for client, sequence, output in zip(pending, sequences, outputs):
+            client.respond(sequence, output)
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        assert self.session is not None
+        input_name = self.session.get_inputs()[0].name
+        if self.batching and len(batch) > 1:
+            try:
+                return np.reshape(self.session.run(None, {input_name: batch})[1], (len(batch), *LEAP_OUTPUT_SHAPE))
+            except Exception:
+                self.logger.warning("Model does not support batching, falling back to running requests one by one")
+                self.batching = False
+
+        outputs = [self.session.run(None, {input_name: tensor[np.newaxis]})[1] for tensor in batch]
+        return np.reshape(outputs, (len(batch), *LEAP_OUTPUT_SHAPE))
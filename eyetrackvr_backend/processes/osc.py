@@ -1,12 +1,13 @@
-from ..utils import WorkerProcess, OneEuroFilter
+from ..utils import WorkerProcess, OneEuroFilter, EyeDataSlot, LatencyRecorder, MetricCounters
 from ..config import EyeTrackConfig, OSCConfig
 from ..types import EyeData, TrackerPosition
 from ..logger import get_logger
-from queue import Queue, Empty
+from queue import Empty
 from copy import deepcopy
 from typing import Final
 import numpy as np
 import threading
+import time
 import cv2
 from pythonosc.dispatcher import Dispatcher
 from pythonosc.udp_client import SimpleUDPClient
@@ -19,14 +20,23 @@ logger = get_logger()
 
 
 class VRChatOSC(WorkerProcess):
-    def __init__(self, osc_queue: Queue[EyeData], name: str):
-        super().__init__(name=f"OSC {name}")
+    def __init__(
+        self,
+        osc_queue: EyeDataSlot,
+        name: str,
+        threaded: bool = False,
+        latency: LatencyRecorder | None = None,
+        counters: MetricCounters | None = None,
+    ):
+        super().__init__(name=f"OSC {name}", threaded=threaded, latency=latency, counters=counters)
         # Synced variables
-        self.osc_queue: Queue[EyeData] = osc_queue
+        self.osc_queue: EyeDataSlot = osc_queue
         # Unsynced variables
+        self.loop_stage = "loop.osc"
         self.config: EyeTrackConfig = self.base_config
         self.client = SimpleUDPClient(self.config.osc.address, self.config.osc.sending_port)
-        self.filter = OneEuroFilter(np.random.rand(2), 0.9, 5.0)
+        # samples are filtered using their capture time, so the filter has to run on the same clock
+        self.filter = OneEuroFilter(np.random.rand(2), 0.9, 5.0, t0=time.perf_counter())
 
     # TODO: Since vrchat implements OSCQuery we shouldnt rely on the config for this
     # we should instead query the server for the endpoints
@@ -36,6 +46,7 @@ class VRChatOSC(WorkerProcess):
     def run(self) -> None:
         try:
             eye_data: EyeData = self.osc_queue.get(block=True, timeout=0.5)
+            self.record_latency("result_dequeued", time.perf_counter() - eye_data.timestamp)
             if not self.config.osc.enable_sending:
                 return
 
@@ -53,22 +64,33 @@ class VRChatOSC(WorkerProcess):
             self.logger.exception("Failed to get eye data from queue")
             return
 
+        start = time.perf_counter()
+        self.send(eye_data)
+        end = time.perf_counter()
+        self.record_latency("osc_send", end - start)
+        self.record_latency("end_to_end", end - eye_data.timestamp)
+
+    def send(self, eye_data: EyeData) -> None:
         if self.config.osc.mirror_eyes:
-            self.client.send_message(self.config.osc.endpoints.eyes_y, float(eye_data.y))
-            self.client.send_message(self.config.osc.endpoints.left_eye_x, float(eye_data.x))
-            self.client.send_message(self.config.osc.endpoints.right_eye_x, float(eye_data.x))
-            self.client.send_message(self.config.osc.endpoints.left_eye_blink, float(eye_data.blink))
-            self.client.send_message(self.config.osc.endpoints.right_eye_blink, float(eye_data.blink))
+            self.send_message(self.config.osc.endpoints.eyes_y, float(eye_data.y))
+            self.send_message(self.config.osc.endpoints.left_eye_x, float(eye_data.x))
+            self.send_message(self.config.osc.endpoints.right_eye_x, float(eye_data.x))
+            self.send_message(self.config.osc.endpoints.left_eye_blink, float(eye_data.blink))
+            self.send_message(self.config.osc.endpoints.right_eye_blink, float(eye_data.blink))
             return
 
         if eye_data.position == TrackerPosition.LEFT_EYE:
-            self.client.send_message(self.config.osc.endpoints.eyes_y, float(eye_data.y))
-            self.client.send_message(self.config.osc.endpoints.left_eye_x, float(eye_data.x))
-            self.client.send_message(self.config.osc.endpoints.left_eye_blink, float(eye_data.blink))
+            self.send_message(self.config.osc.endpoints.eyes_y, float(eye_data.y))
+            self.send_message(self.config.osc.endpoints.left_eye_x, float(eye_data.x))
+            self.send_message(self.config.osc.endpoints.left_eye_blink, float(eye_data.blink))
         elif eye_data.position == TrackerPosition.RIGHT_EYE:
-            self.client.send_message(self.config.osc.endpoints.eyes_y, float(eye_data.y))
-            self.client.send_message(self.config.osc.endpoints.right_eye_x, float(eye_data.x))
-            self.client.send_message(self.config.osc.endpoints.right_eye_blink, float(eye_data.blink))
+            self.send_message(self.config.osc.endpoints.eyes_y, float(eye_data.y))
+            self.send_message(self.config.osc.endpoints.right_eye_x, float(eye_data.x))
+            self.send_message(self.config.osc.endpoints.right_eye_blink, float(eye_data.blink))
+
+    def send_message(self, address: str, value: float) -> None:
+        self.client.send_message(address, value)
+        self.increment("osc_messages_sent")
 
     def shutdown(self) -> None:
         pass
@@ -80,7 +102,7 @@ class VRChatOSC(WorkerProcess):
 
     def smooth(self, data: EyeData) -> EyeData:
         original = deepcopy(data)
-        data.x, data.y = self.filter(np.array([data.x, data.y]))
+        data.x, data.y = self.filter(np.array([data.x, data.y]), data.timestamp)
         self.draw_debug("Smoothed", original, data)
         return data
 
@@ -0,0 +1,200 @@
+from ..utils import WorkerProcess, SerialReader
+from ..utils.misc_utils import split_serial_stream
+from ..utils.reconnect import ReconnectScheduler
+from ..utils.serial_reader import open_serial_port
+from ..config import EyeTrackConfig
+from multiprocessing import Event
+from multiprocessing.sharedctypes import RawArray, RawValue
+from typing import Final
+import threading
+import ctypes
+
+# the size field of a packet is 2 bytes, so no packet can be any larger
+SERIAL_HUB_PACKET_SIZE: Final = 65535
+# how often the hub checks if ports need to be opened or closed, config changes are picked up right away
+SERIAL_HUB_INTERVAL: Final = 0.5
+
+
+class SerialHubClient:
+    """A single packet slot of the `SerialHub`, every tracker gets its own.
+
+    Works like `SerialReader.get` across processes, the newest packet lives in shared memory behind a sequence
+    number that is odd while the hub is writing. Packets the camera didnt pick up in time are counted in `dropped`.
+    """
+
+    def __init__(self, uuid: str):
+        self.uuid = uuid
+        # Synced variables
+        self.__packet = RawArray(ctypes.c_uint8, SERIAL_HUB_PACKET_SIZE)
+        self.__size = RawValue(ctypes.c_uint32, 0)
+        self.__timestamp = RawValue(ctypes.c_double, 0)
+        self.__sequence = RawValue(ctypes.c_int64, 0)
+        self.__connected = RawValue(ctypes.c_bool, False)
+        self.__ready = Event()
+        # Unsynced variables, only used by the camera
+        self.__read: int = 0
+        self.dropped: int = 0
+
+    # region: Client methods
+    def connected(self) -> bool:
+        """True if the hub has the serial port of this tracker open"""
+        return self.__connected.value
+
+    def skip(self) -> None:
+        """ignore everything that was published so far, so packets from before we started arent counted as dropped"""
+        self.__read = self.__sequence.value // 2
+
+    def get(self, timeout: float | None = None) -> tuple[bytes, float] | None:
+        """return the newest packet and the time it was received, None if no packet arrived within `timeout`"""
+        # cleared before checking, so we cant miss a packet that is published right after the check
+        self.__ready.clear()
+        if self.__sequence.value // 2 == self.__read and not self.__ready.wait(timeout):
+            return None
+
+        # the hub might start overwriting the packet while we copy it, in that case just try again
+        for _ in range(3):
+            sequence = self.__sequence.value
+            if sequence % 2 == 1:
+                continue
+            size = self.__size.value
+            timestamp = self.__timestamp.value
+            packet = ctypes.string_at(self.__packet, size)
+            if self.__sequence.value != sequence or sequence // 2 == self.__read:
+                continue
+            self.dropped += sequence // 2 - self.__read - 1
+            self.__read = sequence // 2
+            return packet, timestamp
+        return None
+
+    # endregion
+
+    # region: Service methods
+    def publish(self, packet: bytes, timestamp: float) -> None:
+        size = min(len(packet), SERIAL_HUB_PACKET_SIZE)
+        self.__sequence.value += 1
+        ctypes.memmove(self.__packet, packet, size)
+        self.__size.value = size
+        self.__timestamp.value = timestamp
+        self.__sequence.value += 1
+        self.__ready.set()
+
+    def set_connected(self, connected: bool) -> None:
+        self.__connected.value = connected
+
+    # endregion
+
+
+class SerialDemux(SerialReader):
+    """`SerialReader` that hands every packet to the clients of its stream instead of keeping it around"""
+
+    def __init__(self, port, name: str = "Serial Demux"):
+        super().__init__(port, name)
+        # stream id -> clients, replaced as a whole when the routes change so the reader never sees a half update
+        self.routes: dict[int, list[SerialHubClient]] = {}
+
+    def publish(self, packet: bytes, timestamp: float) -> None:
+        for client in self.routes.get(self.parser.stream, []):
+            client.publish(packet, timestamp)
+
+
+class SerialHub(WorkerProcess):
+    """Owns serial ports that carry several cameras, so trackers can share a single receiver.
+
+    A tracker picks a stream of a shared port with a `<port>#<stream>` capture source, e.g. `COM3#0` and `COM3#1`
+    for both eyes of a wireless receiver. Every port is read by a single `SerialDemux` that routes packets by the
+    stream id in their header to the `SerialHubClient` of each tracker, the cameras only decode them.
+    """
+
+    def __init__(self, uuids: list[str]):
+        super().__init__(name="Serial Hub")
+        # Synced variables
+        self.clients = [SerialHubClient(uuid) for uuid in uuids]
+        # Unsynced variables
+        # port -> stream id -> clients
+        self.routes: dict[str, dict[int, list[SerialHubClient]]] = {}
+        self.readers: dict[str, SerialDemux] = {}
+        self.reconnect: dict[str, ReconnectScheduler] = {}
+        # None by default, because events arent picklable
+        self.wakeup: threading.Event = None  # type: ignore[assignment]
+
+    def startup(self) -> None:
+        self.wakeup = threading.Event()
+        self.routes = self.get_routes(self.base_config)
+
+    def run(self) -> None:
+        self.update_ports()
+        self.wakeup.wait(SERIAL_HUB_INTERVAL)
+        self.wakeup.clear()
+
+    def shutdown(self) -> None:
+        for port in list(self.readers):
+            self.close_port(port)
+
+    def on_config_update(self, config: EyeTrackConfig) -> None:
+        self.routes = self.get_routes(config)
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def client(self, uuid: str) -> SerialHubClient | None:
+        return next((client for client in self.clients if client.uuid == uuid), None)
+
+    def get_routes(self, config: EyeTrackConfig) -> dict[str, dict[int, list[SerialHubClient]]]:
+        routes: dict[str, dict[int, list[SerialHubClient]]] = {}
+        for tracker in config.trackers:
+            client = self.client(tracker.uuid)
+            stream = split_serial_stream(tracker.camera.capture_source)
+            if client is None or stream is None or not tracker.enabled:
+                continue
+            port, stream_id = stream
+            routes.setdefault(port, {}).setdefault(stream_id, []).append(client)
+        return routes
+
+    def update_ports(self) -> None:
+        routes = self.routes
+        for port in list(self.readers):
+            if port not in routes:
+                self.logger.info(f"Serial port `{port}` is no longer used, closing it")
+                self.close_port(port)
+
+        for port, streams in routes.items():
+            reader = self.readers.get(port)
+            if reader is not None and not reader.is_alive():
+                self.logger.warning(f"Serial port `{port}` disconnected ({reader.error}), waiting for reconnect.")
+                self.close_port(port)
+                reader = None
+            if reader is None:
+                reader = self.open_port(port)
+            if reader is not None:
+                reader.routes = streams
+
+        for client in self.clients:
+            client.set_connected(any(client in clients for port in self.readers for clients in routes.get(port, {}).values()))
+
+    def open_port(self, port: str) -> SerialDemux | None:
+        scheduler = self.reconnect.setdefault(port, ReconnectScheduler())
+        if not scheduler.wait(0):
+            return None
+
+        try:
+            reader = SerialDemux(open_serial_port(port), name=f"Serial Demux {port}")
+        except Exception as e:
+            delay = scheduler.failed()
+            self.logger.warning(f"Failed to open shared serial port `{port}` ({e}), retrying in {delay:.1f}s")
+            return None
+
+        scheduler.reset()
+        reader.start()
+        self.readers[port] = reader
+        self.logger.info(f"Opened shared serial port `{port}`")
+        return reader
+
+    def close_port(self, port: str) -> None:
+        reader = self.readers.pop(port, None)
+        if reader is None:
+            return
+
+        reader.stop()
+        reader.port.close()
+        for clients in reader.routes.values():
+            for client in clients:
+                client.set_connected(False)
@@ -1,35 +1,79 @@
 from queue import Queue
 from fastapi import APIRouter
-from .types import EyeData
 from cv2.typing import MatLike
-from .utils import clear_queue
+from .types import PipelineMode
+from .utils import clear_queue, FrameChannel, FrameRing, LocalFrameRing, EyeDataSlot, LatencyRecorder, MetricCounters, AlgorithmStats
+from .utils.frame_ring import FRAME_RING_SLOTS
 from .config import EyeTrackConfig
 from .visualizer import Visualizer
 from multiprocessing.managers import SyncManager
-from .processes import EyeProcessor, Camera, VRChatOSC
+from .processes import EyeProcessor, Camera, VRChatOSC, InferenceClient, SerialHubClient
 
 
 # TODO: when we start to integrate babble this should become a common interface that eye trackers and mouth trackers inherit from
 class Tracker:
-    def __init__(self, config: EyeTrackConfig, uuid: str, manager: SyncManager, router: APIRouter):
+    def __init__(
+        self,
+        config: EyeTrackConfig,
+        uuid: str,
+        manager: SyncManager,
+        router: APIRouter,
+        inference: InferenceClient | None = None,
+        serial_hub: SerialHubClient | None = None,
+    ):
         self.uuid = uuid
         self.router = router
         self.config = config
         self.tracker_config = config.get_tracker_by_uuid(uuid)
         # IPC stuff
         self.manager = manager
-        self.osc_queue: Queue[EyeData] = self.manager.Queue(maxsize=60)
-        self.image_queue: Queue[MatLike] = self.manager.Queue(maxsize=60)
-        # Used purely for visualization in the frontend
-        self.camera_queue: Queue[MatLike] = self.manager.Queue(maxsize=15)
-        self.algo_frame_queue: Queue[MatLike] = self.manager.Queue(maxsize=15)
-        # processes
-        self.processor = EyeProcessor(self.tracker_config, self.image_queue, self.osc_queue, self.algo_frame_queue)
-        self.camera = Camera(self.tracker_config, self.image_queue, self.camera_queue)
-        self.osc_sender = VRChatOSC(self.osc_queue, self.tracker_config.name)
+        self.threaded = self.tracker_config.pipeline.mode == PipelineMode.THREAD
+        # only the newest result matters for OSC, so results are shared through a single slot instead of a queue
+        self.osc_queue: EyeDataSlot = EyeDataSlot()
+        slots = max(FRAME_RING_SLOTS, self.tracker_config.pipeline.max_queued_frames)
+        if self.threaded:
+            # everything lives in this process, so frames can be passed around by reference
+            self.image_queue: FrameChannel = LocalFrameRing(slots=slots)
+            self.camera_queue: Queue[MatLike] = Queue(maxsize=15)
+            self.algo_frame_queue: Queue[MatLike] = Queue(maxsize=15)
+        else:
+            # frames are moved through shared memory, pickling them through the manager is way too slow
+            self.image_queue = FrameRing(slots=slots)
+            # Used purely for visualization in the frontend
+            self.camera_queue = self.manager.Queue(maxsize=15)
+            self.algo_frame_queue = self.manager.Queue(maxsize=15)
+        # every worker records into the same histograms, so we can follow a frame from capture to OSC
+        self.latency = LatencyRecorder()
+        self.counters = MetricCounters()
+        self.algorithm_stats = AlgorithmStats()
         # Visualization
         self.camera_visualizer = Visualizer(self.camera_queue)
         self.algorithm_visualizer = Visualizer(self.algo_frame_queue)
+        # processes
+        self.processor = EyeProcessor(
+            self.tracker_config,
+            self.image_queue,
+            self.osc_queue,
+            self.algo_frame_queue,
+            threaded=self.threaded,
+            latency=self.latency,
+            counters=self.counters,
+            inference=inference,
+            preview_subscribers=self.algorithm_visualizer.subscribers,
+            algorithm_stats=self.algorithm_stats,
+        )
+        self.camera = Camera(
+            self.tracker_config,
+            self.image_queue,
+            self.camera_queue,
+            threaded=self.threaded,
+            latency=self.latency,
+            counters=self.counters,
+            serial_hub=serial_hub,
+        )
+        self.osc_sender = VRChatOSC(
+            self.osc_queue, self.tracker_config.name, threaded=self.threaded, latency=self.latency, counters=self.counters
+        )
 
     def start(self) -> None:
         self.osc_sender.start()
@@ -43,8 +87,7 @@ class Tracker:
         self.camera_visualizer.stop()
         self.algorithm_visualizer.stop()
         # if we dont do this we memory leak :3
-        clear_queue(self.osc_queue)
-        clear_queue(self.image_queue)
+        self.image_queue.close()
         clear_queue(self.camera_queue)
         clear_queue(self.algo_frame_queue)
 
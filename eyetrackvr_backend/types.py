@@ -1,10 +1,11 @@
 # This file exists purely because circular imports are a thing and im too lazy to come up with a better
 # solution that doesnt involve a bunch of refactoring.
+import time
 import logging
 import numpy as np
 from typing import Final
 from enum import Enum, StrEnum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 class Algorithms(StrEnum):
@@ -14,6 +15,7 @@ class Algorithms(StrEnum):
     HSRAC = "HSRAC"
     RANSAC = "RANSAC"
     AHSF = "AHSF"
+    INTENSITY = "INTENSITY"
 
 
 class TrackerPosition(StrEnum):
@@ -23,6 +25,28 @@ class TrackerPosition(StrEnum):
     UNDEFINED = "undefined"
 
 
+class PipelineMode(StrEnum):
+    PROCESS = "process"
+    THREAD = "thread"
+
+
+class CaptureBackend(StrEnum):
+    AUTO = "auto"
+    MJPEG = "mjpeg"
+    FFMPEG = "ffmpeg"
+
+
+class DecodeMode(StrEnum):
+    COLOR = "color"
+    GRAY = "gray"
+
+
+class DropPolicy(StrEnum):
+    LATEST = "latest"
+    BOUNDED = "bounded"
+    DEADLINE = "deadline"
+
+
 class LogLevel(Enum):
     DEBUG = logging.DEBUG
     INFO = logging.INFO
@@ -38,14 +62,30 @@ class CameraState(Enum):
     DISABLED = 3
 
 
+@dataclass
+class FrameMeta:
+    # `time.perf_counter()` of when the frame was captured, this clock is shared between processes
+    timestamp: float = field(default_factory=time.perf_counter)
+    frame_number: int = 0
+    fps: float = 0.0
+    uuid: str = ""
+    # (x, y, blink) the algorithms should find, only known for `synthetic://` frames
+    ground_truth: tuple[float, float, float] | None = None
+
+
 @dataclass
 class EyeData:
     x: float
     y: float
     blink: float
     position: TrackerPosition
+    # copied from the `FrameMeta` of the frame this result was calculated from
+    timestamp: float = 0.0
+    frame_number: int = 0
 
 
 DEBUG_FLAG: Final = "ETVR_DEBUG"
+# JPEG can be decoded at 1/2, 1/4 and 1/8 of its size for free
+DECODE_SCALES: Final = (1, 2, 4, 8)
 EMPTY_FRAME: Final = np.zeros((1, 1), dtype=np.uint8)
 TRACKING_FAILED: Final = EyeData(0, 0, 0, TrackerPosition.UNDEFINED)
@@ -1,4 +1,10 @@
-from .misc_utils import clamp, BaseAlgorithm, clear_queue, is_serial, mask_to_cpu_list
-from .image_utils import mat_crop, mat_rotate, safe_crop
+from .misc_utils import clamp, BaseAlgorithm, clear_queue, is_serial, is_network, is_replay, is_synthetic, mask_to_cpu_list
+from .image_utils import mat_crop, mat_rotate, safe_crop, Overlay, draw_overlays
 from .one_euro_filter import OneEuroFilter
 from .process import WorkerProcess
+from .frame_ring import FrameChannel, FrameRing, LocalFrameRing
+from .eye_data_slot import EyeDataSlot
+from .metrics import LatencyRecorder, MetricCounters, AlgorithmStats
+from .packet_parser import PacketParser
+from .serial_reader import SerialReader
+from .frame_grabber import FrameGrabber
@@ -0,0 +1,77 @@
+import time
+import ctypes
+from queue import Empty
+from typing import Final
+from multiprocessing import Array, Event
+from ..types import EyeData, TrackerPosition
+
+POSITIONS: Final = list(TrackerPosition)
+# fmt: off
+SEQUENCE, X, Y, BLINK, POSITION, TIMESTAMP, FRAME_NUMBER = range(7)
+# fmt: on
+
+
+class EyeDataSlot:
+    """Latest value slot for sharing `EyeData` between processes.
+
+    Only the newest sample matters for gaze, so instead of queueing results the writer overwrites a single slot
+    and the reader always gets the most recent value. The slot is a seqlock: the sequence number is odd while a
+    write is in progress, readers retry if the sequence changed while they were copying the values out.
+    """
+
+    def __init__(self):
+        # lock=False, the sequence number takes care of consistency
+        self.__values = Array(ctypes.c_double, 7, lock=False)
+        self.__event = Event()
+        self.__last_sequence: float = 0
+
+    def put(self, eye_data: EyeData) -> None:
+        values = self.__values
+        sequence = values[SEQUENCE]
+        values[SEQUENCE] = sequence + 1
+        values[X] = eye_data.x
+        values[Y] = eye_data.y
+        values[BLINK] = eye_data.blink
+        values[POSITION] = POSITIONS.index(eye_data.position)
+        values[TIMESTAMP] = eye_data.timestamp
+        values[FRAME_NUMBER] = eye_data.frame_number
+        values[SEQUENCE] = sequence + 2
+        self.__event.set()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> EyeData:
+        """return the newest sample that hasnt been read yet, raises `queue.Empty` if nothing new arrived in time"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            # the event must be cleared before checking the sequence, otherwise we could miss a wakeup
+            self.__event.clear()
+            eye_data = self.__read()
+            if eye_data is not None:
+                return eye_data
+
+            if not block:
+                raise Empty
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                raise Empty
+            self.__event.wait(remaining)
+
+    def __read(self) -> EyeData | None:
+        while True:
+            values = self.__values[:]
+            sequence = values[SEQUENCE]
+            # nothing new, or the writer is still busy, it will wake us up once it is done
+            if sequence == self.__last_sequence or sequence % 2 != 0:
+                return None
+            # the writer started a new write while we were copying, try again
+            if self.__values[SEQUENCE] != sequence:
+                continue
+
+            self.__last_sequence = sequence
+            return EyeData(
+                x=values[X],
+                y=values[Y],
+                blink=values[BLINK],
+                position=POSITIONS[int(values[POSITION])],
+                timestamp=values[TIMESTAMP],
+                frame_number=int(values[FRAME_NUMBER]),
+            )
@@ -0,0 +1,86 @@
+import cv2
+import time
+import threading
+from cv2.typing import MatLike
+
+
+class FrameGrabber:
+    """Grabs frames from a `cv2.VideoCapture` on its own thread and only decodes the newest one.
+
+    `read` blocks while a frame is decoded, if we fall behind a network stream the frames pile up in the FFMPEG
+    buffers and every frame we read is older than the last one. `grab` only pulls the next frame out of the stream
+    without decoding it, so the grab thread can keep the stream drained and `get` only `retrieve`s (decodes) the
+    newest frame. Frames that were grabbed but never retrieved are counted in `skipped`.
+    """
+
+    def __init__(self, capture: cv2.VideoCapture, name: str = "Frame Grabber"):
+        self.capture = capture
+        self.name = name
+        # number of frames grabbed, doubles as the frame number
+        self.grabbed: int = 0
+        self.skipped: int = 0
+        # set if grabbing failed, most likely because the stream went away
+        self.error: Exception | None = None
+        self.__retrieved: int = 0
+        self.__timestamp: float = 0
+        self.__waiting: bool = False
+        # a capture cant grab and retrieve at the same time, so every call to it happens while holding this
+        self.__condition = threading.Condition()
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_alive():
+            return
+
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = 3.0) -> None:
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def is_alive(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def get(self, timeout: float | None = None) -> tuple[MatLike, float, int] | None:
+        """decode the newest grabbed frame, returns (frame, timestamp, frame number) or None if no new frame showed up"""
+        # set before taking the lock, otherwise the grab thread could keep grabbing the lock right after releasing it
+        self.__waiting = True
+        with self.__condition:
+            try:
+                if self.grabbed == self.__retrieved and self.is_alive():
+                    self.__condition.wait(timeout)
+                if self.grabbed == self.__retrieved:
+                    return None
+
+                self.skipped += self.grabbed - self.__retrieved - 1
+                self.__retrieved = self.grabbed
+                ret, frame = self.capture.retrieve()
+                if not ret:
+                    return None
+                return frame, self.__timestamp, self.grabbed
+            finally:
+                self.__waiting = False
+                self.__condition.notify_all()
+
+    def _run(self) -> None:
+        try:
+            while not self.__stop.is_set():
+                with self.__condition:
+                    if not self.capture.grab():
+                        raise RuntimeError("Failed to grab frame")
+                    self.grabbed += 1
+                    self.__timestamp = time.perf_counter()
+                    self.__condition.notify_all()
+                    # someone wants a frame, let them retrieve this one before we grab the next
+                    if self.__waiting:
+                        self.__condition.wait_for(lambda: not self.__waiting or self.__stop.is_set(), timeout=1.0)
+        except Exception as e:
+            self.error = e
+        finally:
+            with self.__condition:
+                self.__condition.notify_all()
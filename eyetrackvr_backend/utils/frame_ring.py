@@ -0,0 +1,384 @@
+import time
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from queue import Empty
+from typing import Final
+from cv2.typing import MatLike
+from multiprocessing import Event
+from multiprocessing.shared_memory import SharedMemory
+from ..types import DropPolicy, FrameMeta, EMPTY_FRAME
+
+FRAME_RING_SLOTS: Final = 8
+# big enough for a 640x480 grayscale frame, the ring will grow itself if a bigger frame shows up
+FRAME_RING_SLOT_SIZE: Final = 640 * 480
+# `overrun` counts frames the writer overwrote before we got to them, the rest are skipped on purpose by the drop policy
+DROP_REASONS: Final = ["overrun", *DropPolicy]
+
+# fmt: off
+CONTROL_DTYPE: Final = np.dtype([
+    ("generation", np.int64),   # bumped every time the data segment is reallocated
+    ("write_count", np.int64),  # total frames written, the newest frame lives in slot `(write_count - 1) % slots`
+    ("read_count", np.int64),   # total frames consumed (or skipped) by the reader
+    ("dropped", np.int64, (len(DROP_REASONS),)),  # frames the reader never got, see `DROP_REASONS`
+    ("slot_size", np.int64),    # capacity of a single slot in bytes
+    ("name", "S32"),            # name of the current data segment
+])
+SLOT_DTYPE: Final = np.dtype([
+    ("sequence", np.int64),     # odd while the writer owns the slot, `2 * (index + 1)` once the frame is complete
+    ("timestamp", np.float64),  # the rest of the header is the `FrameMeta` of the frame
+    ("frame_number", np.int64),
+    ("fps", np.float64),
+    ("uuid", "S40"),           # 36 characters, padded to keep the header aligned
+    ("ndim", np.int64),
+    ("shape", np.int64, (3,)),
+    ("ground_truth", np.float64, (3,)),  # NaN if the frame has no ground truth
+])
+# fmt: on
+
+
+class FrameChannel(ABC):
+    """Common interface for moving frames from the camera to the processor.
+
+    Both implementations are rings indexed by a running frame count, which lets the reader apply a drop policy
+    when it falls behind the writer:
+    * `latest` - always jump to the newest frame
+    * `bounded` - only keep the newest `max_frames` frames around
+    * `deadline` - skip any frame that is older than `deadline` seconds
+    """
+
+    slots: int
+    _event: threading.Event
+    policy: DropPolicy = DropPolicy.LATEST
+    max_frames: int = FRAME_RING_SLOTS
+    deadline: float = 0.05
+
+    @abstractmethod
+    def put(self, frame: MatLike, meta: FrameMeta) -> None: ...
+
+    def get(self, block: bool = True, timeout: float | None = None) -> tuple[MatLike, FrameMeta]:
+        """return the next frame according to the drop policy, raises `queue.Empty` if no frame arrived in time"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            # the event must be cleared before checking for frames, otherwise we could miss a wakeup
+            self._event.clear()
+            item = self._read()
+            if item is not None:
+                return item
+
+            if not block:
+                raise Empty
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                raise Empty
+            self._event.wait(remaining)
+
+    def set_policy(self, policy: DropPolicy, max_frames: int = FRAME_RING_SLOTS, deadline: float = 0.05) -> None:
+        """set how the reader should drop frames, this only affects the calling process"""
+        self.policy = policy
+        self.max_frames = max(1, min(max_frames, self.slots))
+        self.deadline = deadline
+
+    def _read(self) -> tuple[MatLike, FrameMeta] | None:
+        while True:
+            write_count, read_count = self._counters()
+            available = write_count - read_count
+            if available <= 0:
+                return None
+
+            # the writer lapped us, skip ahead to the oldest frame that still exists
+            if available > self.slots:
+                self._drop("overrun", available - self.slots)
+                read_count += available - self.slots
+                available = self.slots
+
+            skip = 0
+            match self.policy:
+                case DropPolicy.LATEST:
+                    skip = available - 1
+                case DropPolicy.BOUNDED:
+                    skip = max(0, available - self.max_frames)
+                case DropPolicy.DEADLINE:
+                    now = time.perf_counter()
+                    while skip < available and now - self._timestamp(read_count + skip) > self.deadline:
+                        skip += 1
+            if skip > 0:
+                self._drop(self.policy, skip)
+                read_count += skip
+                if skip == available:
+                    self._set_read_count(read_count)
+                    return None
+
+            item = self._copy(read_count)
+            self._set_read_count(read_count + 1)
+            if item is not None:
+                return item
+            # the slot was overwritten while we were reading it
+            self._drop("overrun", 1)
+
+    def qsize(self) -> int:
+        write_count, read_count = self._counters()
+        return min(write_count - read_count, self.slots)
+
+    @abstractmethod
+    def drop_counts(self) -> dict[str, int]:
+        """amount of frames dropped for each reason in `DROP_REASONS`"""
+        ...
+
+    def close(self) -> None:
+        pass
+
+    # region: Storage specific methods
+    @abstractmethod
+    def _counters(self) -> tuple[int, int]:
+        """return the write count and read count"""
+        ...
+
+    @abstractmethod
+    def _set_read_count(self, read_count: int) -> None: ...
+
+    @abstractmethod
+    def _timestamp(self, index: int) -> float:
+        """return the capture timestamp of the frame with the given index"""
+        ...
+
+    @abstractmethod
+    def _copy(self, index: int) -> tuple[MatLike, FrameMeta] | None:
+        """return a copy of the frame with the given index, or None if it has been overwritten"""
+        ...
+
+    @abstractmethod
+    def _drop(self, reason: str, count: int) -> None: ...
+
+    # endregion
+
+
+class FrameRing(FrameChannel):
+    """Single producer, single consumer ring of frames backed by shared memory.
+
+    The writer copies each frame straight into a fixed slot and the reader copies it back out, nothing is pickled
+    and nothing goes through a manager process. Every slot has a sequence number in its header so the reader can
+    tell when a frame was overwritten while it was being read.
+
+    The ring is created by the owning process and then handed to the child processes, which attach lazily.
+    If a frame is bigger than a slot (eg: the ROI or camera resolution changed) the writer allocates a bigger
+    data segment and publishes its name in the control block, readers reattach on their next read.
+    """
+
+    def __init__(self, slots: int = FRAME_RING_SLOTS, slot_size: int = FRAME_RING_SLOT_SIZE):
+        self.slots = slots
+        self._event = Event()  # type: ignore[assignment]
+        # these are None by default, because they arent picklable
+        self.__control_shm: SharedMemory | None = None
+        self.__data_shm: SharedMemory | None = None
+        self.__control: np.ndarray | None = None
+        self.__headers: np.ndarray | None = None
+        self.__data: np.ndarray | None = None
+        self.__generation: int = -1
+
+        self.__control_shm = SharedMemory(create=True, size=CONTROL_DTYPE.itemsize)
+        self.control_name: str = self.__control_shm.name
+        self.__control = np.ndarray((1,), dtype=CONTROL_DTYPE, buffer=self.__control_shm.buf)
+        self.__control[0] = (0, 0, 0, (0,) * len(DROP_REASONS), 0, b"")
+        self.__allocate(self.__control[0], slot_size)
+
+    # region: Producer
+    def put(self, frame: MatLike, meta: FrameMeta) -> None:
+        """write a frame into the next slot, overwriting the oldest frame if the reader is falling behind"""
+        control = self.__attach()
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes > control["slot_size"]:
+            self.__allocate(control, max(frame.nbytes, int(control["slot_size"]) * 2))
+            control = self.__attach()
+
+        assert self.__headers is not None and self.__data is not None
+        index = int(control["write_count"])
+        slot = index % self.slots
+        header = self.__headers[slot]
+        header["sequence"] = 2 * index + 1
+        self.__data[slot, : frame.nbytes] = frame.reshape(-1)
+        header["timestamp"] = meta.timestamp
+        header["frame_number"] = meta.frame_number
+        header["fps"] = meta.fps
+        header["uuid"] = meta.uuid.encode()
+        header["ndim"] = frame.ndim
+        header["shape"] = frame.shape + (0,) * (3 - frame.ndim)
+        header["ground_truth"] = meta.ground_truth if meta.ground_truth is not None else (np.nan,) * 3
+        header["sequence"] = 2 * index + 2
+
+        control["write_count"] = index + 1
+        self._event.set()
+
+    # endregion
+
+    # region: Consumer
+    def _counters(self) -> tuple[int, int]:
+        control = self.__attach()
+        return int(control["write_count"]), int(control["read_count"])
+
+    def _set_read_count(self, read_count: int) -> None:
+        self.__attach()["read_count"] = read_count
+
+    def _timestamp(self, index: int) -> float:
+        self.__attach()
+        assert self.__headers is not None
+        return float(self.__headers[index % self.slots]["timestamp"])
+
+    def _copy(self, index: int) -> tuple[MatLike, FrameMeta] | None:
+        self.__attach()
+        assert self.__headers is not None and self.__data is not None
+        slot = index % self.slots
+        header = self.__headers[slot]
+        sequence = 2 * index + 2
+        if header["sequence"] != sequence:
+            return None
+
+        ndim = int(header["ndim"])
+        shape = tuple(int(x) for x in header["shape"][:ndim])
+        frame = self.__data[slot, : int(np.prod(shape))].reshape(shape).copy()
+        truth = header["ground_truth"]
+        meta = FrameMeta(
+            timestamp=float(header["timestamp"]),
+            frame_number=int(header["frame_number"]),
+            fps=float(header["fps"]),
+            uuid=bytes(header["uuid"]).decode(),
+            ground_truth=None if np.isnan(truth[0]) else (float(truth[0]), float(truth[1]), float(truth[2])),
+        )
+        # make sure the writer didnt start overwriting the slot while we were copying it
+        return (frame, meta) if header["sequence"] == sequence else None
+
+    def _drop(self, reason: str, count: int) -> None:
+        self.__attach()["dropped"][DROP_REASONS.index(reason)] += count
+
+    def drop_counts(self) -> dict[str, int]:
+        dropped = self.__attach()["dropped"]
+        return {reason: int(dropped[index]) for index, reason in enumerate(DROP_REASONS)}
+
+    # endregion
+
+    def close(self) -> None:
+        """release the shared memory, should only be called by the owner once every process using the ring has stopped"""
+        try:
+            name = bytes(self.__attach()["name"]).decode()
+        except FileNotFoundError:
+            return
+
+        self.__detach_data()
+        self.__control = None
+        self.__unlink(name)
+        if self.__control_shm is not None:
+            self.__control_shm.close()
+            try:
+                self.__control_shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.__control_shm = None
+
+    # region: Internal methods
+    def __attach(self) -> np.void:
+        if self.__control is None:
+            if self.__control_shm is None:
+                self.__control_shm = SharedMemory(name=self.control_name)
+            self.__control = np.ndarray((1,), dtype=CONTROL_DTYPE, buffer=self.__control_shm.buf)
+
+        control = self.__control[0]
+        if int(control["generation"]) != self.__generation:
+            self.__detach_data()
+            generation = int(control["generation"])
+            self.__data_shm = SharedMemory(name=bytes(control["name"]).decode())
+            self.__headers = np.ndarray((self.slots,), dtype=SLOT_DTYPE, buffer=self.__data_shm.buf)
+            self.__data = np.ndarray(
+                (self.slots, int(control["slot_size"])),
+                dtype=np.uint8,
+                buffer=self.__data_shm.buf,
+                offset=self.slots * SLOT_DTYPE.itemsize,
+            )
+            self.__generation = generation
+        return control
+
+    def __detach_data(self) -> None:
+        # numpy views have to be released before the shared memory can be closed
+        self.__headers = None
+        self.__data = None
+        if self.__data_shm is not None:
+            self.__data_shm.close()
+            self.__data_shm = None
+        self.__generation = -1
+
+    def __allocate(self, control: np.void, slot_size: int) -> None:
+        old_name = bytes(control["name"]).decode()
+
+        data_shm = SharedMemory(create=True, size=self.slots * (SLOT_DTYPE.itemsize + slot_size))
+        headers = np.ndarray((self.slots,), dtype=SLOT_DTYPE, buffer=data_shm.buf)
+        data = np.ndarray((self.slots, slot_size), dtype=np.uint8, buffer=data_shm.buf, offset=self.slots * SLOT_DTYPE.itemsize)
+        headers[:] = (0, 0.0, 0, 0.0, b"", 0, (0, 0, 0), (np.nan, np.nan, np.nan))
+        # carry over any frames the reader hasnt gotten to yet
+        if self.__headers is not None and self.__data is not None:
+            headers[:] = self.__headers
+            data[:, : self.__data.shape[1]] = self.__data
+        del headers, data
+        data_shm.close()
+
+        control["name"] = data_shm.name.encode()
+        control["slot_size"] = slot_size
+        control["generation"] += 1
+        if old_name != "":
+            # readers that are still attached keep their mapping, the segment is freed once they let go
+            self.__detach_data()
+            self.__unlink(old_name)
+
+    @staticmethod
+    def __unlink(name: str) -> None:
+        try:
+            shm = SharedMemory(name=name)
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    # endregion
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for attribute in ("control_shm", "data_shm", "control", "headers", "data"):
+            state[f"_FrameRing__{attribute}"] = None
+        state["_FrameRing__generation"] = -1
+        return state
+
+
+class LocalFrameRing(FrameChannel):
+    """In process version of `FrameRing`, frames are passed by reference so it can only be used between threads"""
+
+    def __init__(self, slots: int = FRAME_RING_SLOTS):
+        self.slots = slots
+        self._event = threading.Event()
+        # (index, meta, frame) for each slot, the index lets the reader detect overwritten slots
+        self.__slots: list[tuple[int, FrameMeta, MatLike]] = [(-1, FrameMeta(), EMPTY_FRAME)] * slots
+        self.__write_count: int = 0
+        self.__read_count: int = 0
+        self.__dropped: dict[str, int] = dict.fromkeys(DROP_REASONS, 0)
+
+    def put(self, frame: MatLike, meta: FrameMeta) -> None:
+        index = self.__write_count
+        self.__slots[index % self.slots] = (index, meta, frame)
+        self.__write_count = index + 1
+        self._event.set()
+
+    def _counters(self) -> tuple[int, int]:
+        return self.__write_count, self.__read_count
+
+    def _set_read_count(self, read_count: int) -> None:
+        self.__read_count = read_count
+
+    def _timestamp(self, index: int) -> float:
+        return self.__slots[index % self.slots][1].timestamp
+
+    def _copy(self, index: int) -> tuple[MatLike, FrameMeta] | None:
+        slot_index, meta, frame = self.__slots[index % self.slots]
+        return (frame, meta) if slot_index == index else None
+
+    def _drop(self, reason: str, count: int) -> None:
+        self.__dropped[reason] += count
+
+    def drop_counts(self) -> dict[str, int]:
+        return dict(self.__dropped)
@@ -1,5 +1,21 @@
 import cv2
+import numpy as np
+from typing import Final
 from cv2.typing import MatLike
+from ..types import DecodeMode
+
+# fmt: off
+IMREAD_FLAGS: Final = {
+    (DecodeMode.COLOR, 1): cv2.IMREAD_COLOR,
+    (DecodeMode.COLOR, 2): cv2.IMREAD_REDUCED_COLOR_2,
+    (DecodeMode.COLOR, 4): cv2.IMREAD_REDUCED_COLOR_4,
+    (DecodeMode.COLOR, 8): cv2.IMREAD_REDUCED_COLOR_8,
+    (DecodeMode.GRAY, 1): cv2.IMREAD_GRAYSCALE,
+    (DecodeMode.GRAY, 2): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (DecodeMode.GRAY, 4): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (DecodeMode.GRAY, 8): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+# fmt: on
 
 
 def safe_crop(frame: MatLike, x: int, y: int, w: int, h: int, keepsize=False):
@@ -19,6 +35,66 @@ def mat_crop(x: int, y: int, w: int, h: int, frame: MatLike) -> MatLike:
 
 
 def mat_rotate(frame: MatLike, angle: float, border_color: tuple[int, int, int] = (255, 255, 255)) -> MatLike:
-    row, col, _ = frame.shape
+    row, col = frame.shape[:2]
     matrix = cv2.getRotationMatrix2D((col / 2, row / 2), angle, 1)
     return cv2.warpAffine(frame, matrix, (col, row), borderMode=cv2.BORDER_CONSTANT, borderValue=border_color)
+
+
+def decode_jpeg(data: bytes | memoryview, mode: DecodeMode, scale: int = 1) -> MatLike | None:
+    """decode a JPEG image, the DCT scaling of libjpeg makes reduced sizes cheaper to decode than the full image"""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), IMREAD_FLAGS[(mode, scale)])
+
+
+def reduce_frame(frame: MatLike, mode: DecodeMode, scale: int = 1) -> MatLike:
+    """convert an already decoded frame to what `decode_jpeg` would have returned"""
+    if mode == DecodeMode.GRAY and frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale > 1:
+        height, width = frame.shape[:2]
+        frame = cv2.resize(frame, (-(-width // scale), -(-height // scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+class Overlay:
+    """Debug drawings of a single algorithm, kept apart from the frame so the frame can be shared read only.
+
+    The BGR layer is only allocated once an algorithm asks for it, and if nobody is watching the preview the
+    overlay is disabled and `layer` returns None so the algorithm can skip drawing altogether.
+    Black doesnt show up on the preview, it is treated as transparent.
+    """
+
+    def __init__(self, shape: tuple[int, ...], enabled: bool = True, window: tuple[int, int, int, int] | None = None):
+        self.shape = shape[:2]
+        self.enabled = enabled
+        # (x, y, width, height) of the part of the frame the algorithm got, if it only got part of it
+        self.window = window
+        self.__layer: MatLike | None = None
+
+    def layer(self) -> MatLike | None:
+        """the layer to draw on, same size as the frame the algorithm got"""
+        if not self.enabled:
+            return None
+        if self.__layer is None:
+            self.__layer = np.zeros((*self.shape, 3), dtype=np.uint8)
+        if self.window is not None:
+            x, y, width, height = self.window
+            return self.__layer[y : y + height, x : x + width]
+        return self.__layer
+
+    def drawn(self) -> bool:
+        return self.__layer is not None
+
+    def draw_onto(self, frame: MatLike) -> None:
+        """draw the layer on top of a BGR frame of the same size"""
+        if self.__layer is None:
+            return
+        mask = self.__layer.max(axis=2)
+        cv2.copyTo(self.__layer, mask, frame)
+
+
+def draw_overlays(frame: MatLike, overlays: list[Overlay]) -> MatLike:
+    """composite the overlays of every algorithm on top of a copy of the frame for the preview"""
+    preview = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR) if frame.ndim == 2 else frame.copy()
+    for overlay in overlays:
+        overlay.draw_onto(preview)
+    return preview
@@ -0,0 +1,294 @@
+import math
+import ctypes
+import numpy as np
+from collections import deque
+from typing import Final
+from multiprocessing.sharedctypes import RawArray
+from ..types import Algorithms
+
+# Latency histograms are bucketed like HdrHistogram, every power of two is split into `SUB_BUCKETS` linear buckets
+# so the relative error of a recorded value is at most 1 / SUB_BUCKETS (~6%) no matter how large it is.
+# Values are recorded in microseconds, anything above 2^MAX_EXPONENT us (~35 minutes) ends up in the last bucket.
+SUB_BUCKET_BITS: Final = 4
+SUB_BUCKETS: Final = 1 << SUB_BUCKET_BITS
+MAX_EXPONENT: Final = 31
+BUCKETS: Final = (MAX_EXPONENT - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+# every histogram is stored as [buckets..., count, sum, max]
+COUNT, SUM, MAX = BUCKETS, BUCKETS + 1, BUCKETS + 2
+HISTOGRAM_SIZE: Final = BUCKETS + 3
+PERCENTILES: Final = (50, 95, 99)
+
+# Durations of a single step
+# * `capture`: reading a frame from the camera, including decoding, for serial cameras this starts once the packet
+#   has been received by the reader thread
+# * `preprocess`: flipping, rotating and cropping the frame and pushing it into the frame channel
+# * `algorithm.<name>`: a single algorithm run
+# * `process`: everything the eye processor does with a frame, including all algorithms
+# * `osc_send`: sending the OSC messages for a result
+# * `loop.<worker>`: a single iteration of a workers main loop
+# Time since the frame was captured, the difference between two of these is the time spent in a queue
+# * `frame_dequeued`: the eye processor picked up the frame
+# * `result_dequeued`: the OSC sender picked up the result calculated from the frame
+# * `end_to_end`: the OSC messages for the frame have been sent
+LATENCY_STAGES: Final = [
+    "capture",
+    "preprocess",
+    "frame_dequeued",
+    *[f"algorithm.{algorithm}" for algorithm in Algorithms],
+    "process",
+    "result_dequeued",
+    "osc_send",
+    "end_to_end",
+    "loop.camera",
+    "loop.eye_processor",
+    "loop.osc",
+]
+
+# Counters, like the latency stages every counter must only be incremented by a single worker
+# * `frames_captured`: frames read from the camera
+# * `frames_decoded`: captured frames that were decoded successfully
+# * `frames_skipped`: frames that were grabbed from a network stream but never decoded because a newer one came in
+# * `serial_resyncs`: times the serial parser had to skip bytes to find the next packet
+# * `serial_corrupt_packets`: serial packets that were not a valid JPEG image
+# * `serial_packets_dropped`: serial packets that were replaced by a newer one before they could be decoded
+# * `frames_processed`: frames the eye processor ran the algorithms on
+# * `tracking_failed`: frames where every algorithm failed to find a result
+# * `algorithm_failed.<name>`: a algorithm failed and the next one in `algorithm_order` (or `blink_order`) had to be tried
+# * `algorithm_overrun.<name>`: a algorithm took longer than its `algorithm_budget_ms`
+# * `frame_budget_exceeded`: frames where algorithms were skipped or ignored because `frame_budget_ms` ran out
+# * `search_window_frames`: frames where the algorithms only searched a window around the previous pupil position
+# * `search_window_misses`: of those, frames where the pupil wasnt found in the window, the next frame searches everything
+# * `ground_truth_frames`: frames with a known ground truth (`synthetic://`) that a algorithm found a result for
+# * `tracking_error_sum`: distance between the result and the ground truth pupil center of those frames, in millionths
+#   of the frame size, divide by `ground_truth_frames` for the mean error
+# * `blink_error_sum`: same as `tracking_error_sum` for the blink value
+# * `osc_messages_sent`: OSC messages sent
+COUNTERS: Final = [
+    "frames_captured",
+    "frames_decoded",
+    "frames_skipped",
+    "serial_resyncs",
+    "serial_corrupt_packets",
+    "serial_packets_dropped",
+    "frames_processed",
+    "tracking_failed",
+    *[f"algorithm_failed.{algorithm}" for algorithm in Algorithms],
+    *[f"algorithm_overrun.{algorithm}" for algorithm in Algorithms],
+    "frame_budget_exceeded",
+    "search_window_frames",
+    "search_window_misses",
+    "ground_truth_frames",
+    "tracking_error_sum",
+    "blink_error_sum",
+    "osc_messages_sent",
+]
+
+
+def bucket_index(value: int) -> int:
+    """return the index of the bucket a value (in microseconds) belongs to"""
+    if value < SUB_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return min((shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS, BUCKETS - 1)
+
+
+def bucket_upper_bounds() -> np.ndarray:
+    """return the highest value (in microseconds) that ends up in each bucket"""
+    index = np.arange(BUCKETS, dtype=np.uint64)
+    shift = np.maximum(index // SUB_BUCKETS, 1) - 1
+    mantissa = np.where(index < SUB_BUCKETS, index, index % SUB_BUCKETS + SUB_BUCKETS)
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyRecorder:
+    """Per tracker latency histograms that live in shared memory.
+
+    Every stage must only ever be recorded by a single worker, this way we can get away without any locking.
+    Readers might see a histogram in the middle of an update, which is fine for statistics.
+    """
+
+    def __init__(self, stages: list[str] = LATENCY_STAGES):
+        self.stages = {stage: index for index, stage in enumerate(stages)}
+        # no lock needed, every histogram has a single writer
+        self.__values = RawArray(ctypes.c_uint64, len(stages) * HISTOGRAM_SIZE)
+        self.__upper_bounds = bucket_upper_bounds()
+
+    def record(self, stage: str, seconds: float) -> None:
+        # instrumentation should never take down a worker, unknown stages are simply not recorded
+        index = self.stages.get(stage)
+        if index is None:
+            return
+
+        value = max(int(seconds * 1_000_000), 0)
+        offset = index * HISTOGRAM_SIZE
+        values = self.__values
+        values[offset + bucket_index(value)] += 1
+        values[offset + COUNT] += 1
+        values[offset + SUM] += value
+        if value > values[offset + MAX]:
+            values[offset + MAX] = value
+
+    def histograms(self) -> np.ndarray:
+        return np.frombuffer(memoryview(self.__values), dtype=np.uint64).reshape(len(self.stages), HISTOGRAM_SIZE).copy()
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """return count, mean, max and percentiles (in milliseconds) of every stage that has been recorded"""
+        snapshot: dict[str, dict[str, float]] = {}
+        for stage, histogram in zip(self.stages, self.histograms()):
+            count = int(histogram[COUNT])
+            if count == 0:
+                continue
+
+            maximum = int(histogram[MAX])
+            cumulative = np.cumsum(histogram[:BUCKETS])
+            stats: dict[str, float] = {"count": count, "mean_ms": int(histogram[SUM]) / count / 1000}
+            for percentile in PERCENTILES:
+                rank = max(math.ceil(percentile / 100 * cumulative[-1]), 1)
+                index = int(np.searchsorted(cumulative, rank))
+                stats[f"p{percentile}_ms"] = min(int(self.__upper_bounds[index]), maximum) / 1000
+            stats["max_ms"] = maximum / 1000
+            snapshot[stage] = stats
+
+        return snapshot
+
+
+class MetricCounters:
+    """Per tracker counters that live in shared memory, so the API can read them without asking the workers."""
+
+    def __init__(self, names: list[str] = COUNTERS):
+        self.names = {name: index for index, name in enumerate(names)}
+        # no lock needed, every counter has a single writer
+        self.__values = RawArray(ctypes.c_uint64, len(names))
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        index = self.names.get(name)
+        if index is not None:
+            self.__values[index] += amount
+
+    def snapshot(self) -> dict[str, int]:
+        values = self.__values[:]
+        return {name: values[index] for name, index in self.names.items()}
+
+
+# Algorithm statistics are kept over the last `ALGORITHM_WINDOW` runs of each algorithm, older runs are forgotten
+ALGORITHM_WINDOW: Final = 200
+# every algorithm is stored as [runs, successes, runtime sum (seconds), position in the effective order]
+RUNS, SUCCESSES, RUNTIME, POSITION = range(4)
+ALGORITHM_FIELDS: Final = 4
+
+
+class AlgorithmStats:
+    """Per tracker success rate and runtime of every algorithm over a sliding window, in shared memory like `MetricCounters`.
+
+    Only the eye processor writes and a algorithm never runs on two threads at once, so every algorithm has a single
+    writer. The order the eye processor currently runs the algorithms in is stored next to the statistics.
+    """
+
+    def __init__(self, window: int = ALGORITHM_WINDOW):
+        self.names = {str(algorithm): index for index, algorithm in enumerate(Algorithms)}
+        self.window = window
+        # no lock needed, every algorithm has a single writer
+        self.__values = RawArray(ctypes.c_double, len(self.names) * ALGORITHM_FIELDS)
+        for index in range(len(self.names)):
+            self.__values[index * ALGORITHM_FIELDS + POSITION] = -1
+        # Unsynced variables, only used by the eye processor
+        self.__history: dict[str, deque[tuple[bool, float]]] = {}
+
+    def record(self, name: str, success: bool, seconds: float) -> None:
+        index = self.names.get(name)
+        if index is None:
+            return
+
+        offset = index * ALGORITHM_FIELDS
+        history = self.__history.setdefault(name, deque())
+        history.append((success, seconds))
+        values = self.__values
+        values[offset + RUNS] = len(history)
+        values[offset + SUCCESSES] += success
+        values[offset + RUNTIME] += seconds
+        if len(history) > self.window:
+            old_success, old_seconds = history.popleft()
+            values[offset + RUNS] = len(history)
+            values[offset + SUCCESSES] -= old_success
+            values[offset + RUNTIME] -= old_seconds
+
+    def mean_runtime(self, name: str) -> float:
+        """mean seconds a run of this algorithm took, 0 if it never ran"""
+        index = self.names.get(name)
+        if index is None:
+            return 0.0
+
+        offset = index * ALGORITHM_FIELDS
+        runs = self.__values[offset + RUNS]
+        return max(self.__values[offset + RUNTIME], 0.0) / runs if runs > 0 else 0.0
+
+    def expected_cost(self, name: str) -> float:
+        """seconds spent on this algorithm per successful result, 0 if it never ran so it gets tried first"""
+        index = self.names.get(name)
+        if index is None:
+            return 0.0
+
+        offset = index * ALGORITHM_FIELDS
+        runs = self.__values[offset + RUNS]
+        # the +1 / +2 keep a algorithm that never succeeded within the window from becoming infinitely expensive
+        success_rate = (self.__values[offset + SUCCESSES] + 1) / (runs + 2)
+        return self.mean_runtime(name) / success_rate
+
+    def set_order(self, names: list[str]) -> None:
+        for name, index in self.names.items():
+            self.__values[index * ALGORITHM_FIELDS + POSITION] = names.index(name) if name in names else -1
+
+    def order(self) -> list[str]:
+        positions = {name: self.__values[index * ALGORITHM_FIELDS + POSITION] for name, index in self.names.items()}
+        return sorted((name for name, position in positions.items() if position >= 0), key=lambda name: positions[name])
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """return runs, success rate, mean runtime and expected cost per success (in milliseconds) of every algorithm that ran"""
+        snapshot: dict[str, dict[str, float]] = {}
+        for name, index in self.names.items():
+            runs, successes, _, _ = self.__values[index * ALGORITHM_FIELDS : (index + 1) * ALGORITHM_FIELDS]
+            if runs == 0:
+                continue
+            snapshot[name] = {
+                "runs": int(runs),
+                "success_rate": successes / runs,
+                "mean_ms": self.mean_runtime(name) * 1000,
+                "expected_cost_ms": self.expected_cost(name) * 1000,
+            }
+        return snapshot
+
+
+# a single sample of a prometheus metric, (labels, value)
+Sample = tuple[dict[str, str], float]
+# a single sample of a prometheus summary, (labels, quantile -> value, sum, count)
+SummarySample = tuple[dict[str, str], dict[str, float], float, int]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    label_list = ",".join(f'{key}="{escape_label(label)}"' for key, label in labels.items())
+    return f"{name}{{{label_list}}} {value}" if label_list else f"{name} {value}"
+
+
+def format_prometheus(name: str, kind: str, description: str, samples: list[Sample]) -> str:
+    """format a single metric in the prometheus text exposition format"""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(format_sample(name, labels, value))
+
+    return "\n".join(lines) + "\n"
+
+
+def format_prometheus_summary(name: str, description: str, samples: list[SummarySample]) -> str:
+    """format a summary, every sample gets its quantiles and the matching `_sum` and `_count` series"""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} summary"]
+    for labels, quantiles, total, count in samples:
+        for quantile, value in quantiles.items():
+            lines.append(format_sample(name, {**labels, "quantile": quantile}, value))
+        lines.append(format_sample(f"{name}_sum", labels, total))
+        lines.append(format_sample(f"{name}_count", labels, count))
+
+    return "\n".join(lines) + "\n"
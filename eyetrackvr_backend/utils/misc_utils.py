@@ -1,6 +1,11 @@
-from ..types import EyeData, TrackerPosition, TRACKING_FAILED, EMPTY_FRAME
+from ..types import EyeData, TrackerPosition, TRACKING_FAILED
+from .image_utils import Overlay
 from queue import Queue, Empty
 from cv2.typing import MatLike
+from typing import Final
+
+REPLAY_PREFIX: Final = "replay://"
+SYNTHETIC_PREFIX: Final = "synthetic://"
 
 
 def is_serial(source: str) -> bool:
@@ -8,6 +13,35 @@ def is_serial(source: str) -> bool:
     return any(source.lower().startswith(prefix) for prefix in serial_prefixes)
 
 
+def split_serial_stream(source: str) -> tuple[str, int] | None:
+    """split a `<port>#<stream>` capture source, None if it isnt a single stream of a shared serial port"""
+    if not is_serial(source):
+        return None
+    port, separator, stream = source.rpartition("#")
+    if separator == "" or not stream.isdigit():
+        return None
+    return port, int(stream)
+
+
+def is_replay(source: str) -> bool:
+    return source.lower().startswith(REPLAY_PREFIX)
+
+
+def is_synthetic(source: str) -> bool:
+    return source.lower().startswith(SYNTHETIC_PREFIX)
+
+
+def is_network(source: str) -> bool:
+    # anything that isnt a serial port, a local video device, a recording or generated is streamed over the network
+    return (
+        source != ""
+        and not is_serial(source)
+        and not is_replay(source)
+        and not is_synthetic(source)
+        and not source.lower().startswith("/dev/")
+    )
+
+
 def clamp(x, low, high):
     return max(low, min(x, high))
 
@@ -22,9 +56,17 @@ def clear_queue(queue: Queue) -> None:
 
 # Base class for all algorithms
 class BaseAlgorithm:
+    # True if the algorithm only looks for the pupil, so it can be given a crop around the previous pupil position
+    supports_search_window: bool = False
+
     # all algorithms must implement this method
-    def run(self, frame: MatLike, tracker_position: TrackerPosition) -> tuple[EyeData, MatLike]:
-        return TRACKING_FAILED, EMPTY_FRAME
+    # the frame is shared with the other algorithms and read only, debug drawings go into the overlay
+    def run(self, frame: MatLike, tracker_position: TrackerPosition, overlay: Overlay) -> EyeData:
+        return TRACKING_FAILED
+
+    def degrade(self) -> bool:
+        """make the algorithm cheaper because it kept running over its time budget, False if it cant get any cheaper"""
+        return False
 
     def normalize(self, x: float, y: float, width: int, height: int) -> tuple[float, float]:
         """takes a point and normalizes it to a range of 0 to 1"""
@@ -0,0 +1,239 @@
+import time
+import socket
+import threading
+from typing import Final
+from urllib.parse import urlsplit
+from .packet_parser import JPEG_EOI
+
+# how long we wait for the camera to accept the connection or send data before we reconnect
+MJPEG_TIMEOUT: Final = 2.0
+# the first reconnect is immediate, after that we back off up to `MJPEG_MAX_BACKOFF` seconds
+MJPEG_MIN_BACKOFF: Final = 0.01
+MJPEG_MAX_BACKOFF: Final = 1.0
+MJPEG_RECV_SIZE: Final = 65536
+# how long `is_reachable` waits for the camera to accept the connection
+PROBE_TIMEOUT: Final = 0.2
+# if we cant find a boundary in this many bytes something is very wrong, start over instead of growing forever
+MAX_BUFFER_SIZE: Final = 4 * 1024 * 1024
+
+
+class MJPEGError(Exception):
+    pass
+
+
+def split_url(url: str) -> tuple[str, int, str]:
+    """return host, port and path of a capture source, a bare host or ip address is treated as `http://`"""
+    if "://" not in url:
+        url = "http://" + url
+    parts = urlsplit(url)
+    if parts.scheme != "http" or not parts.hostname:
+        raise MJPEGError(f"Unsupported MJPEG url `{url}`")
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    return parts.hostname, parts.port or 80, path
+
+
+def is_reachable(url: str, timeout: float = PROBE_TIMEOUT) -> bool:
+    """check if anything accepts connections on the host and port of a capture source, without sending a request"""
+    try:
+        host, port, _ = split_url(url)
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except (MJPEGError, OSError):
+        return False
+
+
+class MultipartParser:
+    """Streaming parser for `multipart/x-mixed-replace` bodies, works the same way as `PacketParser`.
+
+    Parts are found by their boundary, if a part has a `Content-Length` header we use it, otherwise the part ends
+    at the next boundary. Some cameras send the boundary without the leading `--`, so we only look for the boundary.
+    """
+
+    def __init__(self, boundary: bytes):
+        self.boundary = boundary
+        self.buffer = bytearray()
+        self.start: int = 0
+
+    def feed(self, data: bytes | bytearray | memoryview) -> None:
+        if self.start > 0 and self.start >= len(self.buffer) // 2:
+            del self.buffer[: self.start]
+            self.start = 0
+        self.buffer += data
+
+        if len(self.buffer) - self.start > MAX_BUFFER_SIZE:
+            # keep the last few bytes, they might be the start of a boundary
+            del self.buffer[: len(self.buffer) - len(self.boundary)]
+            self.start = 0
+
+    def next_part(self) -> bytes | None:
+        """return the body of the next complete part or None if we need more data"""
+        begin = self.buffer.find(self.boundary, self.start)
+        if begin == -1:
+            self.start = max(len(self.buffer) - len(self.boundary) + 1, self.start)
+            return None
+        self.start = begin
+
+        header_end = self.buffer.find(b"\r\n\r\n", begin)
+        if header_end == -1:
+            return None
+        headers = bytes(self.buffer[begin + len(self.boundary) : header_end]).lower()
+        body = header_end + 4
+
+        length = parse_content_length(headers)
+        if length is not None:
+            end = body + length
+            if len(self.buffer) < end:
+                return None
+            self.start = end
+            return bytes(self.buffer[body:end])
+
+        end = self.buffer.find(self.boundary, body)
+        if end == -1:
+            return None
+        self.start = end
+        # everything between the end of the image and the next boundary is just line breaks and dashes
+        eoi = self.buffer.rfind(JPEG_EOI, body, end)
+        return bytes(self.buffer[body : eoi + len(JPEG_EOI) if eoi != -1 else end])
+
+    def reset(self) -> None:
+        self.buffer.clear()
+        self.start = 0
+
+
+def parse_content_length(headers: bytes) -> int | None:
+    for line in headers.split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        if name.strip() == b"content-length":
+            try:
+                return int(value.strip())
+            except ValueError:
+                return None
+    return None
+
+
+class MJPEGClient:
+    """Minimal HTTP client for MJPEG streams, made for the ESP32 cameras.
+
+    A persistent socket is drained on its own thread into a `MultipartParser`, like `SerialReader` only the newest
+    JPEG is kept around and anything that was replaced before `get` picked it up is counted in `dropped`.
+    If the connection drops the thread reconnects on its own, starting right away and backing off if it keeps failing.
+    """
+
+    def __init__(self, url: str, name: str = "MJPEG Client", timeout: float = MJPEG_TIMEOUT):
+        self.host, self.port, self.path = split_url(url)
+        self.name = name
+        self.timeout = timeout
+        self.connected: bool = False
+        self.reconnects: int = 0
+        self.dropped: int = 0
+        # the last reason the connection failed, for logging
+        self.error: Exception | None = None
+        self.__socket: socket.socket | None = None
+        self.__parser: MultipartParser | None = None
+        self.__packet: tuple[bytes, float] | None = None
+        self.__condition = threading.Condition()
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def connect(self) -> None:
+        """open the stream and read the response headers, raises `MJPEGError` if the source isnt a MJPEG stream"""
+        self.close()
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            request = f"GET {self.path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n\r\n"
+            sock.sendall(request.encode())
+
+            response = bytearray()
+            while (header_end := response.find(b"\r\n\r\n")) == -1:
+                data = sock.recv(4096)
+                if not data or len(response) > 16384:
+                    raise MJPEGError("Invalid HTTP response")
+                response += data
+            status, *headers = bytes(response[:header_end]).decode("latin-1").split("\r\n")
+            if len(status.split()) < 2 or status.split()[1] != "200":
+                raise MJPEGError(f"Unexpected HTTP status `{status}`")
+            fields = {name.strip().lower(): value.strip() for name, _, value in (header.partition(":") for header in headers)}
+            content_type = fields.get("content-type", "")
+            if "multipart" not in content_type.lower() or "boundary=" not in content_type:
+                raise MJPEGError(f"Not a MJPEG stream, content type is `{content_type}`")
+            boundary = content_type.split("boundary=", 1)[1].split(";")[0].strip().strip('"')
+        except Exception:
+            sock.close()
+            raise
+
+        self.__parser = MultipartParser(boundary.encode("latin-1"))
+        # anything after the headers is already part of the stream
+        self.__parser.feed(response[header_end + 4 :])
+        self.__socket = sock
+        self.connected = True
+
+    def close(self) -> None:
+        self.connected = False
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+    def start(self) -> None:
+        if self.is_alive():
+            return
+
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.__stop.set()
+        # wake up the reader if it is waiting for data
+        sock = self.__socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self.__thread is not None:
+            self.__thread.join(self.timeout if timeout is None else timeout)
+            self.__thread = None
+        self.close()
+
+    def is_alive(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def get(self, timeout: float | None = None) -> tuple[bytes, float] | None:
+        """return the newest JPEG and the time it was received, None if no image arrived within `timeout`"""
+        with self.__condition:
+            if self.__packet is None and self.is_alive():
+                self.__condition.wait(timeout)
+            packet, self.__packet = self.__packet, None
+        return packet
+
+    def _run(self) -> None:
+        backoff = 0.0
+        buffer = bytearray(MJPEG_RECV_SIZE)
+        view = memoryview(buffer)
+        while not self.__stop.is_set():
+            try:
+                if self.__socket is None:
+                    self.connect()
+                    self.reconnects += 1
+                assert self.__socket is not None and self.__parser is not None
+                self.read(self.__socket, self.__parser, view)
+                backoff = 0.0
+            except Exception as e:
+                self.error = e
+                self.close()
+                if self.__stop.wait(backoff):
+                    break
+                backoff = min(max(backoff * 2, MJPEG_MIN_BACKOFF), MJPEG_MAX_BACKOFF)
+
+    def read(self, sock: socket.socket, parser: MultipartParser, view: memoryview) -> None:
+        size = sock.recv_into(view)
+        if size == 0:
+            raise MJPEGError("Connection closed by camera")
+        parser.feed(view[:size])
+        while (part := parser.next_part()) is not None:
+            with self.__condition:
+                if self.__packet is not None:
+                    self.dropped += 1
+                self.__packet = (part, time.perf_counter())
+                self.__condition.notify()
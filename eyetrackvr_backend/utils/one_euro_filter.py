@@ -12,8 +12,10 @@ def exponential_smoothing(a, x, x_prev):
 
 
 class OneEuroFilter:
-    def __init__(self, x0, dx0=0.0, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
-        """Initialize the one euro filter."""
+    def __init__(self, x0, dx0=0.0, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, t0=None):
+        """Initialize the one euro filter.
+        * If timestamps are passed when calling the filter, `t0` must come from the same clock
+        """
         # The parameters.
         self.data_shape = x0.shape
         self.beta = np.full(x0.shape, beta)
@@ -21,14 +23,14 @@ class OneEuroFilter:
         self.min_cutoff = np.full(x0.shape, min_cutoff)
         # Previous values.
         self.x_prev = x0.astype(np.single)
-        self.t_prev = time()
+        self.t_prev = time() if t0 is None else t0
         self.dx_prev = np.full(x0.shape, dx0)
 
-    def __call__(self, x):
-        """Compute the filtered signal."""
+    def __call__(self, x, t=None):
+        """Compute the filtered signal, `t` is the time the sample was taken at (defaults to now)."""
         assert x.shape == self.data_shape
 
-        t = time()
+        t = time() if t is None else t
         t_e = t - self.t_prev
         # if t_e is ever 0.0, a divide by zero occurs and it will crash the filter
         if t_e > 0.0:
@@ -0,0 +1,107 @@
+from typing import Final
+
+"""
+header-begin (2 bytes)
+header-type (2 bytes)
+packet-size (2 bytes)
+packet (packet-size bytes)
+
+header-type is `0xFF 0xA1` for a single camera, receivers that carry several cameras over one link count up from
+there to tell them apart: stream 0 is `0xFF 0xA1`, stream 1 is `0xFF 0xA2` and so on up to `0xFF 0xAF`.
+"""
+ETVR_HEADER_LENGTH: Final = 6
+ETVR_HEADER: Final = b"\xff\xa0"
+ETVR_HEADER_NAME: Final = b"\xff\xa1"
+ETVR_PACKET_HEADER: Final = ETVR_HEADER + ETVR_HEADER_NAME
+ETVR_MAX_STREAMS: Final = 15
+JPEG_SOI: Final = b"\xff\xd8"
+JPEG_EOI: Final = b"\xff\xd9"
+# if we cant find a header in this many bytes something is very wrong, start over instead of growing forever
+MAX_BUFFER_SIZE: Final = 1024 * 1024
+
+
+class PacketParser:
+    """Streaming parser for the ETVR serial protocol.
+
+    Bytes are appended to a persistent buffer and complete packets are sliced out of it, anything left over
+    (usually the start of the next packet) is kept for the next call. The consumed part of the buffer is only
+    dropped once it makes up most of the buffer, so parsing stays linear no matter how the data is chunked.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        # index of the first byte that hasnt been consumed yet
+        self.start: int = 0
+        self.packets: int = 0
+        # times we had to skip bytes to find the next header
+        self.resyncs: int = 0
+        # packets that were not a valid JPEG image
+        self.corrupt: int = 0
+        # stream id of the last packet `next_packet` returned
+        self.stream: int = 0
+
+    def feed(self, data: bytes) -> None:
+        if self.start > 0 and self.start >= len(self.buffer) // 2:
+            del self.buffer[: self.start]
+            self.start = 0
+        self.buffer += data
+
+        if len(self.buffer) - self.start > MAX_BUFFER_SIZE:
+            self.resyncs += 1
+            # keep the last few bytes, they might be the start of a header
+            del self.buffer[: len(self.buffer) - len(ETVR_HEADER)]
+            self.start = 0
+
+    def next_packet(self) -> bytes | None:
+        """return the next complete packet or None if we need more data"""
+        while True:
+            begin = self.buffer.find(ETVR_HEADER, self.start)
+            if begin == -1:
+                # the last byte could be the start of a header, keep it around for the next call
+                end = max(len(self.buffer) - len(ETVR_HEADER) + 1, self.start)
+                if end > self.start:
+                    self.resyncs += 1
+                    self.start = end
+                return None
+            if begin > self.start:
+                self.resyncs += 1
+                self.start = begin
+
+            if len(self.buffer) - begin < ETVR_HEADER_LENGTH:
+                return None
+            stream = self.buffer[begin + 3] - ETVR_HEADER_NAME[1]
+            if self.buffer[begin + 2] != ETVR_HEADER_NAME[0] or not 0 <= stream < ETVR_MAX_STREAMS:
+                # not a header type we know, keep looking
+                self.start = begin + 1
+                continue
+            size = int.from_bytes(self.buffer[begin + 4 : begin + ETVR_HEADER_LENGTH], byteorder="little")
+            end = begin + ETVR_HEADER_LENGTH + size
+            # the payload of a valid JPEG can contain a header (e.g. in its quantization tables), so we only look
+            # for the next header if the packet turns out to be broken, like one that was truncated
+            if len(self.buffer) < end:
+                return None
+
+            packet = bytes(self.buffer[begin + ETVR_HEADER_LENGTH : end])
+            if packet.startswith(JPEG_SOI) and packet.endswith(JPEG_EOI):
+                self.start = end
+                self.packets += 1
+                self.stream = stream
+                return packet
+
+            # the next packet might start inside of this one
+            self.corrupt += 1
+            self.start = begin + 1
+
+    def latest_packet(self) -> bytes | None:
+        """return the newest complete packet, skipping any older ones"""
+        latest = None
+        while (packet := self.next_packet()) is not None:
+            latest = packet
+        return latest
+
+    def pending(self) -> int:
+        return len(self.buffer) - self.start
+
+    def reset(self) -> None:
+        self.buffer.clear()
+        self.start = 0
@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+from typing import Final
+from cv2.typing import MatLike
+from dataclasses import dataclass
+
+# pixels outside of the source frame are white, same as `mat_rotate`. a scalar would only fill the first channel
+# of a color frame
+BORDER_VALUE: Final = (255, 255, 255)
+
+
+@dataclass(frozen=True)
+class PreprocessSettings:
+    flip_x_axis: bool = False
+    flip_y_axis: bool = False
+    rotation: float = 0
+    # (x, y, w, h) in pixels of the rotated frame, like `mat_crop` any value <= 0 disables cropping
+    roi: tuple[int, int, int, int] = (0, 0, 0, 0)
+    # OpenCV distortion coefficients (k1, k2, p1, p2[, k3]), empty disables undistortion
+    distortion: tuple[float, ...] = ()
+    # focal length in pixels, 0 uses the width of the frame
+    focal_length: float = 0
+
+
+class FramePreprocessor:
+    """Flips, rotates, undistorts and crops a frame in a single pass.
+
+    Doing these steps one after another means several passes over the whole frame, even though we only keep the
+    ROI in the end. Instead all steps are folded into one transformation from the output (ROI) pixels back to the
+    source frame, which is cached until the settings or the frame size change.
+    * Without rotation or undistortion the ROI is simply sliced out of the frame
+    * Without undistortion the transformation is affine and we can use `cv2.warpAffine`
+    * Otherwise the transformation is baked into a `cv2.remap` lookup table
+    """
+
+    def __init__(self):
+        self.settings = PreprocessSettings()
+        self.__cache: dict[tuple, tuple] = {}
+
+    def process(self, frame: MatLike, settings: PreprocessSettings) -> MatLike:
+        """return the flipped, rotated, undistorted and cropped ROI of the frame"""
+        return self.__apply(frame, settings, crop=True)
+
+    def preview(self, frame: MatLike, settings: PreprocessSettings) -> MatLike:
+        """return the whole frame with every step but the crop applied, the ROI is relative to this frame"""
+        return self.__apply(frame, settings, crop=False)
+
+    def __apply(self, frame: MatLike, settings: PreprocessSettings, crop: bool) -> MatLike:
+        key = (settings, frame.shape[:2], crop)
+        cached = self.__cache.get(key)
+        if cached is None:
+            # the settings only change when the config does, so there is no point in keeping the old entries around
+            if settings != self.settings:
+                self.__cache.clear()
+                self.settings = settings
+            cached = self.__cache[key] = self.__build(settings, frame.shape[0], frame.shape[1], crop)
+
+        kind, *args = cached
+        if kind == "slice":
+            rows, cols, flip_code = args
+            frame = frame[rows, cols]
+            return frame if flip_code is None else cv2.flip(frame, flip_code)
+        if kind == "affine":
+            matrix, size = args
+            return cv2.warpAffine(
+                frame, matrix, size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=BORDER_VALUE
+            )
+        map1, map2 = args
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=BORDER_VALUE)
+
+    def __build(self, settings: PreprocessSettings, height: int, width: int, crop: bool) -> tuple:
+        x, y, w, h = crop_rect(settings.roi, width, height) if crop else (0, 0, width, height)
+
+        if settings.rotation == 0 and not settings.distortion:
+            # flipping and cropping only moves pixels around, so we can slice the ROI out of the source frame
+            rows = slice(height - y - h, height - y) if settings.flip_x_axis else slice(y, y + h)
+            cols = slice(width - x - w, width - x) if settings.flip_y_axis else slice(x, x + w)
+            flip_codes = {(True, True): -1, (True, False): 0, (False, True): 1}
+            return "slice", rows, cols, flip_codes.get((settings.flip_x_axis, settings.flip_y_axis))
+
+        # source frame -> flipped -> rotated -> cropped, as 3x3 matrices so we can chain them
+        flip = np.eye(3)
+        if settings.flip_x_axis:
+            flip = np.array([[1, 0, 0], [0, -1, height - 1], [0, 0, 1]]) @ flip
+        if settings.flip_y_axis:
+            flip = np.array([[-1, 0, width - 1], [0, 1, 0], [0, 0, 1]]) @ flip
+        rotation = np.vstack([cv2.getRotationMatrix2D((width / 2, height / 2), settings.rotation, 1), [0, 0, 1]])
+        translation = np.array([[1, 0, -x], [0, 1, -y], [0, 0, 1]])
+        matrix = translation @ rotation @ flip
+
+        if not settings.distortion:
+            return "affine", matrix[:2], (w, h)
+
+        # for every output pixel, find the undistorted pixel it came from and then where that pixel is in the
+        # distorted source frame
+        output_x, output_y = np.meshgrid(np.arange(w, dtype=np.float64), np.arange(h, dtype=np.float64))
+        points = np.linalg.inv(matrix) @ np.stack([output_x.ravel(), output_y.ravel(), np.ones(w * h)])
+        map_x, map_y = distort_points(points[0], points[1], settings.distortion, settings.focal_length or width, width, height)
+        map1, map2 = cv2.convertMaps(map_x.reshape(h, w).astype(np.float32), map_y.reshape(h, w).astype(np.float32), cv2.CV_16SC2)
+        return "remap", map1, map2
+
+
+def crop_rect(roi: tuple[int, int, int, int], width: int, height: int) -> tuple[int, int, int, int]:
+    """clamp the ROI to the frame the same way `mat_crop` does, returns the whole frame if cropping is disabled"""
+    x, y, w, h = roi
+    if x <= 0 or y <= 0 or w <= 0 or h <= 0 or x >= width or y >= height:
+        return 0, 0, width, height
+    return x, y, min(w, width - x), min(h, height - y)
+
+
+def scale_roi(roi: tuple[int, int, int, int], scale: int) -> tuple[int, int, int, int]:
+    """scale a ROI in pixels of the full resolution frame to a frame decoded at `1 / scale` of its size"""
+    if scale == 1 or any(value <= 0 for value in roi):
+        return roi
+    # a disabled ROI stays disabled, but a small one must not round down to 0 and turn cropping off, see `crop_rect`
+    x, y, w, h = (max(1, round(value / scale)) for value in roi)
+    return x, y, w, h
+
+
+def distort_points(
+    x: np.ndarray, y: np.ndarray, distortion: tuple[float, ...], focal_length: float, width: int, height: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """apply the OpenCV lens distortion model, the principal point is assumed to be the center of the frame"""
+    k1, k2, p1, p2, k3 = (*distortion, 0.0, 0.0, 0.0, 0.0, 0.0)[:5]
+    cx, cy = (width - 1) / 2, (height - 1) / 2
+    x = (x - cx) / focal_length
+    y = (y - cy) / focal_length
+    r2 = x * x + y * y
+    radial = 1 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
+    distorted_x = x * radial + 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+    distorted_y = y * radial + p1 * (r2 + 2 * y * y) + 2 * p2 * x * y
+    return distorted_x * focal_length + cx, distorted_y * focal_length + cy
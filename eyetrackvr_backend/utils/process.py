@@ -1,9 +1,12 @@
+import os
 import time
 import psutil
+import threading
 from ..window import Window
 from multiprocessing import Process, Event
 from ..logger import get_logger, setup_logger
 from ..utils.misc_utils import mask_to_cpu_list
+from ..utils.metrics import LatencyRecorder, MetricCounters
 from ..config import EyeTrackConfig, ConfigManager, TrackerConfig
 
 # Welcome to assassin's multiprocessing realm
@@ -15,14 +18,29 @@ from ..config import EyeTrackConfig, ConfigManager, TrackerConfig
 # 5. Queue's are your friend, use them
 # 6. Unless explicitly shared, all variables should be cloned
 # 7. If you have share a variable, please document it
+#
+# Workers can also be started as a thread instead of a process (`threaded=True`), the lifecycle hooks stay the same
+# but nothing gets cloned, so anything shared between threaded workers has to be thread safe.
 
 
 # TODO: when python 3.13 comes out, we should look into the new per interpreter GIL
 # if it is faster maybe we should refactor this to use it?
 class WorkerProcess:
-    def __init__(self, name: str, uuid: str = ""):
+    def __init__(
+        self,
+        name: str,
+        uuid: str = "",
+        threaded: bool = False,
+        latency: LatencyRecorder | None = None,
+        counters: MetricCounters | None = None,
+    ):
         self.name = name
-        self.__process = Process()
+        self.threaded = threaded
+        # shared metrics of the tracker this worker belongs to, children set `loop_stage` to record loop times
+        self.latency = latency
+        self.counters = counters
+        self.loop_stage: str = ""
+        self.__process: Process | threading.Thread = threading.Thread() if threaded else Process()
         self.__shutdown_event = Event()
         self.base_config = ConfigManager(self.on_config_modified).load()
 
@@ -63,8 +81,10 @@ class WorkerProcess:
 
     # region: Internal methods
     def _run(self) -> None:
-        setup_logger()
-        self.set_affinity()
+        # threads share the logger and affinity with the process they live in
+        if not self.threaded:
+            setup_logger()
+            self.set_affinity()
         self.base_config.start()
         try:
             self.startup()
@@ -72,6 +92,8 @@ class WorkerProcess:
             self.shutdown()
         except Exception:
             self.logger.exception("Error occurred in child process!")
+        finally:
+            self.base_config.stop()
 
     def _mainloop(self) -> None:
         while not self.__shutdown_event.is_set():
@@ -79,7 +101,10 @@ class WorkerProcess:
             # hack to prevent a divide by zero error
             self.delta_time = (current_time - self._last_time) + 0.0000001
             try:
+                start = time.perf_counter()
                 self.run()
+                if self.loop_stage:
+                    self.record_latency(self.loop_stage, time.perf_counter() - start)
                 self.window._waitkey(1)
             except KeyboardInterrupt:
                 self.logger.warning("Keyboard interrupt received, shutting down...")
@@ -90,6 +115,14 @@ class WorkerProcess:
                 continue
             self._last_time = current_time
 
+    def record_latency(self, stage: str, seconds: float) -> None:
+        if self.latency is not None:
+            self.latency.record(stage, seconds)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        if self.counters is not None:
+            self.counters.increment(counter, amount)
+
     def set_affinity(self) -> None:
         # The MacOS kernel does not export the CPU affinity API to user space
         if callable(getattr(psutil.Process(), "cpu_affinity", None)):
@@ -124,8 +157,12 @@ class WorkerProcess:
         try:
             self.base_config.load()
             self.__shutdown_event.clear()
-            self.logger.info(f"Starting Process `{self.name}`")
-            self.__process = Process(target=self._run, name=f"{self.name}")
+            if self.threaded:
+                self.logger.info(f"Starting Thread `{self.name}`")
+                self.__process = threading.Thread(target=self._run, name=f"{self.name}")
+            else:
+                self.logger.info(f"Starting Process `{self.name}`")
+                self.__process = Process(target=self._run, name=f"{self.name}")
             self.__process.daemon = True
             self.__process.start()
         except (TypeError, Exception):
@@ -147,6 +184,10 @@ class WorkerProcess:
 
     def kill(self) -> None:
         if self.is_alive():
+            # there is no way to kill a thread, the best we can do is yell about it
+            if isinstance(self.__process, threading.Thread):
+                self.logger.error(f"Failed to stop thread `{self.name}`!")
+                return
             self.__process.kill()
             self.__process.join()
             self.logger.info(f"Killed process `{self.name}`")
@@ -158,6 +199,12 @@ class WorkerProcess:
     def process_name(self) -> str:
         return self.name
 
+    def pid(self) -> int | None:
+        """return the pid of the process this worker runs in, threaded workers live in our own process"""
+        if not self.is_alive():
+            return None
+        return os.getpid() if self.threaded else self.__process.pid  # type: ignore[union-attr]
+
     def is_alive(self) -> bool:
         if self.__process is None:
             return False
@@ -0,0 +1,89 @@
+import time
+import random
+import threading
+from typing import Callable, Final
+
+# the first retry happens after `RECONNECT_MIN_DELAY` seconds, every failure doubles the delay up to `RECONNECT_MAX_DELAY`
+RECONNECT_MIN_DELAY: Final = 0.25
+RECONNECT_MAX_DELAY: Final = 5.0
+# every delay is randomly stretched or shrunk by up to this fraction, so trackers dont all retry at the same time
+RECONNECT_JITTER: Final = 0.25
+# how often we check if the device showed up while waiting for the next attempt
+PROBE_INTERVAL: Final = 0.5
+
+
+class ReconnectScheduler:
+    """Decides when a disconnected camera should try to connect again, without spinning in the meantime.
+
+    Failed attempts back off exponentially (with jitter), but waiting is cut short if
+    * `wake` is called, e.g. because the config changed
+    * the `probe` passed to `wait` starts returning True, e.g. because the serial port was plugged in
+    `wait` and `idle` only ever block for the given timeout, so the caller can still check if it should shut down.
+    """
+
+    def __init__(
+        self,
+        min_delay: float = RECONNECT_MIN_DELAY,
+        max_delay: float = RECONNECT_MAX_DELAY,
+        jitter: float = RECONNECT_JITTER,
+        probe_interval: float = PROBE_INTERVAL,
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.probe_interval = probe_interval
+        # failed attempts since the last success
+        self.attempts: int = 0
+        # `time.monotonic()` of when we should try again
+        self.next_attempt: float = 0
+        self.__next_probe: float = 0
+        # result of the last probe, we only care about the device showing up and not about it being there
+        self.__present: bool = True
+        self.__wake = threading.Event()
+
+    def failed(self) -> float:
+        """schedule the next attempt after a failed one, returns the delay in seconds"""
+        # capped, otherwise a camera that stays unplugged for a few hours overflows the float
+        delay = min(self.min_delay * 2 ** min(self.attempts, 32), self.max_delay)
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.attempts += 1
+        self.next_attempt = time.monotonic() + delay
+        self.__next_probe = 0
+        return delay
+
+    def reset(self) -> None:
+        """forget about previous failures, the next attempt is due right away"""
+        self.attempts = 0
+        self.next_attempt = 0
+        self.__present = True
+
+    def wake(self) -> None:
+        """skip the rest of the backoff, can be called from any thread"""
+        self.__wake.set()
+
+    def wait(self, timeout: float, probe: Callable[[], bool] | None = None) -> bool:
+        """wait up to `timeout` seconds for the next attempt, returns True if we should try to connect now"""
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if self.__wake.is_set():
+                self.__wake.clear()
+                return True
+            if now >= self.next_attempt:
+                return True
+            if probe is not None and now >= self.__next_probe:
+                self.__next_probe = now + self.probe_interval
+                present, self.__present = self.__present, probe()
+                if self.__present and not present:
+                    return True
+            if now >= deadline:
+                return False
+
+            wake_up = min(self.next_attempt, deadline, self.__next_probe if probe is not None else deadline)
+            self.__wake.wait(max(wake_up - now, 0))
+
+    def idle(self, timeout: float) -> bool:
+        """wait until `wake` is called or `timeout` seconds passed, returns True if we were woken up"""
+        woken = self.__wake.wait(timeout)
+        self.__wake.clear()
+        return woken
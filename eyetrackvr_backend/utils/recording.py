@@ -0,0 +1,141 @@
+import os
+import mmap
+import time
+import struct
+from typing import Final
+
+# Recordings are a plain append-only file, a magic number followed by one record per packet
+# * record header: seconds since the recording started (float64) and the size of the packet (uint32), little endian
+# * packet: the raw, undecoded packet (JPEG bytes) as it came from the camera
+# A recording that was cut short (crash, unplugged drive) simply ends at the last complete record.
+RECORDING_MAGIC: Final = b"ETVRREC\x01"
+RECORD_HEADER: Final = struct.Struct("<dI")
+
+
+class PacketRecorder:
+    """Appends raw capture packets to a recording, recording into an existing file continues where it left off."""
+
+    def __init__(self, path: str):
+        self.path = path
+        # timestamps continue after the last packet if we append to an existing recording
+        offset = 0.0
+        end = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with PacketRecording(path) as recording:
+                offset = recording.duration()
+                end = recording.end
+        self.__offset = offset
+        self.__start: float | None = None
+        self.__file = open(path, "r+b" if end > 0 else "wb")
+        # a record that was cut short would hide everything we append after it, so we write over it
+        self.__file.truncate(end)
+        self.__file.seek(end)
+        if end == 0:
+            self.__file.write(RECORDING_MAGIC)
+        self.packets: int = 0
+
+    def write(self, packet: bytes | memoryview, timestamp: float) -> None:
+        """append a packet, `timestamp` is the `time.perf_counter()` of when the packet was received"""
+        if self.__start is None:
+            self.__start = timestamp
+        self.__file.write(RECORD_HEADER.pack(timestamp - self.__start + self.__offset, len(packet)))
+        self.__file.write(packet)
+        self.packets += 1
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+class PacketRecording:
+    """Read only view of a recording, packets are memory mapped so reading them doesnt copy anything."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+                raise ValueError(f"`{path}` is not a ETVR recording")
+            self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # (timestamp, offset, size) of every complete record
+        self.records: list[tuple[float, int, int]] = []
+        offset = len(RECORDING_MAGIC)
+        while offset + RECORD_HEADER.size <= len(self.__mmap):
+            timestamp, size = RECORD_HEADER.unpack_from(self.__mmap, offset)
+            offset += RECORD_HEADER.size
+            if offset + size > len(self.__mmap):
+                break
+            self.records.append((timestamp, offset, size))
+            offset += size
+        # end of the last complete record, anything after it was cut short
+        self.end = self.records[-1][1] + self.records[-1][2] if self.records else len(RECORDING_MAGIC)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> tuple[float, memoryview]:
+        """return the timestamp and packet of a record, the packet is only valid until the recording is closed"""
+        timestamp, offset, size = self.records[index]
+        return timestamp, memoryview(self.__mmap)[offset : offset + size]
+
+    def duration(self) -> float:
+        return self.records[-1][0] if self.records else 0.0
+
+    def close(self) -> None:
+        try:
+            self.__mmap.close()
+        except BufferError:
+            # someone is still holding on to a packet, the mapping is closed once it gets garbage collected
+            pass
+
+    def __enter__(self) -> "PacketRecording":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ReplaySource:
+    """Plays back a recording like a camera would, either with the original timing or as fast as possible.
+
+    `speed` scales the original timing (2 plays twice as fast), 0 plays every packet without waiting.
+    It can be changed during playback, the replay then continues from the current packet at the new speed.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.recording = PacketRecording(path)
+        self.speed = speed
+        self.loop = loop
+        self.index: int = 0
+        self.__start: float = 0
+        # timestamp of the first packet since the last (re)start
+        self.__first: float = 0
+        # the speed `__start` and `__first` were set for
+        self.__speed: float = speed
+
+    def finished(self) -> bool:
+        return not self.loop and self.index >= len(self.recording)
+
+    def get(self, timeout: float | None = None) -> tuple[memoryview, float] | None:
+        """return the next packet and the time it was "received", None if it isnt due within `timeout`"""
+        if len(self.recording) == 0 or self.finished():
+            return None
+        if self.index >= len(self.recording):
+            self.index = 0
+        timestamp, packet = self.recording[self.index]
+        if self.index == 0 or self.speed != self.__speed:
+            # the current packet is due right away, everything after it follows the (new) speed
+            self.__start = time.perf_counter()
+            self.__first = timestamp
+            self.__speed = self.speed
+
+        if self.speed > 0:
+            delay = self.__start + (timestamp - self.__first) / self.speed - time.perf_counter()
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                return None
+            if delay > 0:
+                time.sleep(delay)
+        self.index += 1
+        return packet, time.perf_counter()
+
+    def close(self) -> None:
+        self.recording.close()
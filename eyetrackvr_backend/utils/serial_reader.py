@@ -0,0 +1,94 @@
+import os
+import time
+import serial
+import threading
+from typing import Final
+from .packet_parser import PacketParser
+
+# how long a single read blocks, this is also the worst case time it takes the reader to notice it should stop
+SERIAL_READ_TIMEOUT: Final = 0.1
+SERIAL_BAUDRATE: Final = 3000000
+
+
+def open_serial_port(port: str) -> serial.Serial:
+    serial_port = serial.Serial(
+        port=port, baudrate=SERIAL_BAUDRATE, xonxoff=False, dsrdtr=False, rtscts=False, timeout=SERIAL_READ_TIMEOUT
+    )
+    # The `set_buffer_size` method is only available on Windows (we ignore the type error for linux)
+    if os.name == "nt":
+        serial_port.set_buffer_size(rx_size=32768, tx_size=32768)  # type: ignore[attr-defined]
+    return serial_port
+
+
+class SerialReader:
+    """Drains a serial port on its own thread and keeps the newest complete packet around.
+
+    Decoding a frame takes a lot longer than reading one, if both happen on the same thread the OS buffer fills up
+    while we decode and we end up throwing away data. Here the reader thread only feeds the `PacketParser`, the
+    consumer picks up the newest packet with `get` and anything it didnt get to in time is counted as dropped.
+    The parser is only ever touched by the reader thread, the only thing shared is the newest packet.
+    """
+
+    def __init__(self, port, name: str = "Serial Reader"):
+        # anything with `read(size)` and `in_waiting`, reads should time out so we can stop the thread
+        self.port = port
+        self.name = name
+        self.parser = PacketParser()
+        # packets that were overwritten by a newer one before anyone picked them up
+        self.dropped: int = 0
+        # set if the reader thread died, most likely because the device was unplugged
+        self.error: Exception | None = None
+        self.__packet: tuple[bytes, float] | None = None
+        self.__condition = threading.Condition()
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_alive():
+            return
+
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def is_alive(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def get(self, timeout: float | None = None) -> tuple[bytes, float] | None:
+        """return the newest packet and the time it was received, None if no packet arrived within `timeout`"""
+        with self.__condition:
+            if self.__packet is None and self.is_alive():
+                self.__condition.wait(timeout)
+            packet, self.__packet = self.__packet, None
+        return packet
+
+    def _run(self) -> None:
+        try:
+            while not self.__stop.is_set():
+                # read everything that is waiting, but block for at least 1 byte so we dont spin
+                data = self.port.read(max(self.port.in_waiting, 1))
+                if not data:
+                    continue
+
+                self.parser.feed(data)
+                while (packet := self.parser.next_packet()) is not None:
+                    self.publish(packet, time.perf_counter())
+        except Exception as e:
+            self.error = e
+        finally:
+            # wake up anyone waiting for a packet that will never come
+            with self.__condition:
+                self.__condition.notify_all()
+
+    def publish(self, packet: bytes, timestamp: float) -> None:
+        with self.__condition:
+            if self.__packet is not None:
+                self.dropped += 1
+            self.__packet = (packet, timestamp)
+            self.__condition.notify()
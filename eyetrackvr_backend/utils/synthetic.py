@@ -0,0 +1,169 @@
+import cv2
+import math
+import time
+import numpy as np
+from typing import Final
+from cv2.typing import MatLike
+from dataclasses import dataclass, fields
+from urllib.parse import urlsplit, parse_qsl
+
+# the generator draws with sub pixel precision, see `cv2.ellipse`
+DRAW_SHIFT: Final = 4
+# how many noise frames we cycle through, generating fresh noise for every frame is slower than the rest combined
+NOISE_FRAMES: Final = 16
+# gray values of the different parts of a IR eye image
+SKIN: Final = 175
+SCLERA: Final = 150
+IRIS: Final = 95
+PUPIL: Final = 15
+GLINT: Final = 255
+BLINK_DURATION: Final = 0.15
+
+
+@dataclass(frozen=True)
+class SyntheticSettings:
+    """Settings of a `synthetic://` capture source, every field can be set as a query parameter of the url.
+
+    `synthetic://?width=320&height=240&fps=200&seed=1` renders 320x240 frames at 200 fps, `fps=0` renders them as
+    fast as possible. Motion and blinks follow the frame number and not the clock, so every tracker using the same
+    settings sees exactly the same frames no matter how fast it runs.
+    """
+
+    width: int = 240
+    height: int = 240
+    fps: float = 120
+    seed: int = 0
+    # standard deviation of the sensor noise in gray values
+    noise: float = 4
+    # standard deviation of the gaussian blur in pixels, 0 disables blurring
+    blur: float = 1
+    # average seconds between blinks, 0 disables blinking
+    blink_interval: float = 4
+
+    @classmethod
+    def from_url(cls, url: str) -> "SyntheticSettings":
+        values: dict[str, int | float] = {}
+        types = {field.name: field.type for field in fields(cls)}
+        for name, value in parse_qsl(urlsplit(url).query):
+            if name not in types:
+                raise ValueError(f"Unknown synthetic capture source parameter `{name}`")
+            values[name] = int(value) if types[name] is int else float(value)
+
+        settings = cls(**values)  # type: ignore[arg-type]
+        if settings.width < 16 or settings.height < 16:
+            raise ValueError("Synthetic frames must be at least 16x16 pixels")
+        if settings.fps < 0 or settings.noise < 0 or settings.blur < 0 or settings.blink_interval < 0:
+            raise ValueError("Synthetic capture source parameters must not be negative")
+        return settings
+
+
+class SyntheticEye:
+    """Procedurally renders IR style eye images together with the ground truth of every frame.
+
+    The pupil is a dark ellipse inside the iris that follows a lissajous curve, it gets flatter the further it
+    looks away from the camera. Fixed IR LEDs show up as glints on the cornea, the eyelid closes from the top during
+    blinks and the frame ends up blurred and noisy like a real sensor would deliver it.
+    The ground truth is `(x, y, blink)` with the pupil center normalized to 0-1 like the algorithms return it and
+    a blink value of 1 for a open and 0 for a closed eye.
+    """
+
+    def __init__(self, settings: SyntheticSettings):
+        self.settings = settings
+        width, height = settings.width, settings.height
+        rng = np.random.default_rng(settings.seed)
+        size = min(width, height)
+        # lissajous frequencies and phases, the pupil never repeats the same path within a few minutes
+        self.frequencies = rng.uniform(0.15, 0.45, 2)
+        self.phases = rng.uniform(0, 2 * math.pi, 2)
+        self.blink_offset = rng.uniform(0, settings.blink_interval)
+        self.iris_radius = 0.24 * size
+        self.pupil_radius = 0.09 * size
+        self.glints = [(rng.uniform(-0.12, 0.12) * size, rng.uniform(-0.1, 0.05) * size) for _ in range(3)]
+        # the eye opening, skin everywhere else
+        self.eye_center = (width / 2, height / 2)
+        self.eye_axes = (0.46 * width, 0.36 * height)
+        self.eye_mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.ellipse(self.eye_mask, self.point(self.eye_center), self.point(self.eye_axes), 0, 0, 360, 255, -1, cv2.LINE_8, DRAW_SHIFT)
+        self.background = np.full((height, width), SKIN, dtype=np.uint8)
+        self.noise = rng.normal(0, settings.noise, (NOISE_FRAMES, height, width)).astype(np.int16) if settings.noise > 0 else None
+
+    def ground_truth(self, frame_number: int) -> tuple[float, float, float]:
+        t = frame_number / (self.settings.fps or SyntheticSettings.fps)
+        x = 0.5 + 0.22 * math.sin(2 * math.pi * self.frequencies[0] * t + self.phases[0])
+        y = 0.5 + 0.14 * math.sin(2 * math.pi * self.frequencies[1] * t + self.phases[1])
+        blink = 1.0
+        interval = self.settings.blink_interval
+        if interval > 0:
+            phase = ((t + self.blink_offset) % interval) / BLINK_DURATION
+            if phase < 1:
+                blink = 1 - math.sin(math.pi * phase)
+        return x, y, blink
+
+    def render(self, frame_number: int) -> tuple[MatLike, tuple[float, float, float]]:
+        settings = self.settings
+        x, y, blink = truth = self.ground_truth(frame_number)
+        center = (x * settings.width, y * settings.height)
+        # how far the eye is turned away from the camera, -1 to 1 on both axes
+        turn_x = (center[0] - self.eye_center[0]) / self.eye_axes[0]
+        turn_y = (center[1] - self.eye_center[1]) / self.eye_axes[1]
+
+        eye = np.full((settings.height, settings.width), SCLERA, dtype=np.uint8)
+        cv2.circle(eye, self.point(center), int(self.iris_radius * 2**DRAW_SHIFT), IRIS, -1, cv2.LINE_AA, DRAW_SHIFT)
+        # the pupil is a circle seen at an angle, foreshortened along the direction the eye is turned
+        angle = math.degrees(math.atan2(turn_y, turn_x))
+        foreshortening = math.sqrt(max(1 - 0.5 * (turn_x**2 + turn_y**2), 0.3))
+        axes = (self.pupil_radius * foreshortening, self.pupil_radius)
+        cv2.ellipse(eye, self.point(center), self.point(axes), angle, 0, 360, PUPIL, -1, cv2.LINE_AA, DRAW_SHIFT)
+        for offset_x, offset_y in self.glints:
+            # the LEDs dont move, so the glints only follow the cornea part of the way
+            glint = (
+                self.eye_center[0] + 0.4 * (center[0] - self.eye_center[0]) + offset_x,
+                self.eye_center[1] + 0.4 * (center[1] - self.eye_center[1]) + offset_y,
+            )
+            cv2.circle(eye, self.point(glint), 2 * 2**DRAW_SHIFT, GLINT, -1, cv2.LINE_AA, DRAW_SHIFT)
+
+        mask = self.eye_mask
+        if blink < 1:
+            # the upper lid covers the eye from the top down
+            mask = mask.copy()
+            top = self.eye_center[1] - self.eye_axes[1]
+            mask[: int(top + 2 * self.eye_axes[1] * (1 - blink))] = 0
+        frame: MatLike = self.background.copy()
+        cv2.copyTo(eye, mask, frame)
+
+        if settings.blur > 0:
+            frame = cv2.GaussianBlur(frame, (0, 0), settings.blur)
+        if self.noise is not None:
+            frame = cv2.add(frame, self.noise[frame_number % NOISE_FRAMES], dtype=cv2.CV_16S)
+            frame = np.clip(frame, 0, 255).astype(np.uint8)
+        return frame, truth
+
+    @staticmethod
+    def point(point: tuple[float, float]) -> tuple[int, int]:
+        return round(point[0] * 2**DRAW_SHIFT), round(point[1] * 2**DRAW_SHIFT)
+
+
+class SyntheticSource:
+    """Serves `SyntheticEye` frames like a camera would, paced to the configured fps."""
+
+    def __init__(self, settings: SyntheticSettings):
+        self.settings = settings
+        self.eye = SyntheticEye(settings)
+        self.frame_number: int = 0
+        self.__start: float | None = None
+
+    def get(self, timeout: float | None = None) -> tuple[MatLike, tuple[float, float, float], float] | None:
+        """return the next frame, its ground truth and the time it was "captured", None if it isnt due within `timeout`"""
+        if self.__start is None:
+            self.__start = time.perf_counter()
+        if self.settings.fps > 0:
+            delay = self.__start + self.frame_number / self.settings.fps - time.perf_counter()
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                return None
+            if delay > 0:
+                time.sleep(delay)
+
+        frame, truth = self.eye.render(self.frame_number)
+        self.frame_number += 1
+        return frame, truth, time.perf_counter()
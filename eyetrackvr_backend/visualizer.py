@@ -1,9 +1,13 @@
 import cv2
+import ctypes
 import os.path
+import threading
 from typing import Any
 from queue import Queue
+from multiprocessing.sharedctypes import RawValue
 from fastapi.responses import StreamingResponse
 from .assets import IMAGES_DIR
+from .utils import clear_queue
 
 OFLINE_IMAGE = cv2.imread(os.path.join(IMAGES_DIR, "camera_offline.png"))
 
@@ -12,15 +16,27 @@ class Visualizer:
     def __init__(self, image_queue: Queue):
         self.image_queue: Queue = image_queue
         self.running: bool = True
+        # how many clients are streaming, shared with the process filling the queue so it can skip the preview
+        self.subscribers = RawValue(ctypes.c_int, 0)
+        self.__lock = threading.Lock()
 
     def gen_frame(self):
-        while self.running:
-            try:
-                frame = self.image_queue.get(timeout=1)
-            except Exception:
-                frame = OFLINE_IMAGE
-            ret, frame = cv2.imencode(".jpg", frame)
-            yield (b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + bytearray(frame) + b"\r\n")
+        with self.__lock:
+            self.subscribers.value += 1
+            if self.subscribers.value == 1:
+                # nobody was watching, so whatever is still queued is old
+                clear_queue(self.image_queue)
+        try:
+            while self.running:
+                try:
+                    frame = self.image_queue.get(timeout=1)
+                except Exception:
+                    frame = OFLINE_IMAGE
+                ret, frame = cv2.imencode(".jpg", frame)
+                yield (b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + bytearray(frame) + b"\r\n")
+        finally:
+            with self.__lock:
+                self.subscribers.value -= 1
 
     def video_feed(self) -> StreamingResponse:
         return StreamingResponse(self.gen_frame(), media_type="multipart/x-mixed-replace; boundary=frame")
@@ -8,6 +8,11 @@ class Window:
         self._debug: bool = debug
         self.__active: bool = False
 
+    @property
+    def debug(self) -> bool:
+        """True if debug windows are shown"""
+        return self._debug
+
     def imshow(self, name, frame) -> None:
         if self._debug:
             self.__active = True
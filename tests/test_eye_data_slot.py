@@ -0,0 +1,21 @@
+from eyetrackvr_backend.types import EyeData, TrackerPosition
+from eyetrackvr_backend.utils import EyeDataSlot
+from queue import Empty
+import pytest
+
+
+def test_eye_data_slot_round_trip():
+    slot = EyeDataSlot()
+    eye_data = EyeData(0.25, 0.75, 1.0, TrackerPosition.RIGHT_EYE, timestamp=12.5, frame_number=3)
+    slot.put(eye_data)
+    assert slot.get(timeout=0.1) == eye_data
+
+
+def test_eye_data_slot_latest_value_wins():
+    slot = EyeDataSlot()
+    for i in range(10):
+        slot.put(EyeData(i, i, 1.0, TrackerPosition.LEFT_EYE, frame_number=i))
+
+    assert slot.get(timeout=0.1).frame_number == 9
+    with pytest.raises(Empty):
+        slot.get(timeout=0.01)
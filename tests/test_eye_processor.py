@@ -0,0 +1,301 @@
+from eyetrackvr_backend.config import TrackerConfig, AlgorithmConfig
+from eyetrackvr_backend.processes import EyeProcessor
+from eyetrackvr_backend.processes.eye_processor import (
+    ADAPTIVE_PROBE_INTERVAL,
+    ADAPTIVE_REORDER_INTERVAL,
+    OVERRUN_LIMIT,
+    OVERRUN_SKIP_FRAMES,
+)
+from eyetrackvr_backend.types import Algorithms, EyeData, TrackerPosition, TRACKING_FAILED
+from eyetrackvr_backend.utils import BaseAlgorithm, LocalFrameRing, EyeDataSlot, MetricCounters, Overlay
+from eyetrackvr_backend.utils.synthetic import SyntheticEye, SyntheticSettings
+from queue import Queue
+import numpy as np
+import pytest
+import time
+
+
+class FakeAlgorithm(BaseAlgorithm):
+    def __init__(self, result: EyeData, delay: float = 0, name: str = "FakeAlgorithm"):
+        self.result = result
+        self.delay = delay
+        self.name = name
+        self.runs = 0
+
+    def get_name(self):
+        return self.name
+
+    def run(self, frame, tracker_position, overlay):
+        self.runs += 1
+        self.writeable = frame.flags.writeable
+        self.shape = frame.shape
+        time.sleep(self.delay)
+        if (layer := overlay.layer()) is not None:
+            layer[0, 0] = 255
+        return self.result
+
+
+class WindowedAlgorithm(FakeAlgorithm):
+    supports_search_window = True
+
+
+@pytest.fixture
+def processor():
+    config = TrackerConfig(tracker_position=TrackerPosition.LEFT_EYE, algorithm=AlgorithmConfig(parallel_algorithms=2))
+    processor = EyeProcessor(config, LocalFrameRing(), EyeDataSlot(), Queue())
+    processor.setup_executor()
+    yield processor
+    processor.shutdown()
+
+
+def test_parallel_algorithms_use_highest_priority_result(processor):
+    first = EyeData(0.1, 0.1, 1, TrackerPosition.LEFT_EYE)
+    second = EyeData(0.2, 0.2, 1, TrackerPosition.LEFT_EYE)
+    processor.algorithms = [FakeAlgorithm(first, delay=0.05), FakeAlgorithm(second)]
+
+    result, overlays = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert result == first
+    assert len(overlays) == 1
+
+
+def test_parallel_algorithms_fall_back_in_order(processor):
+    fallback = EyeData(0.3, 0.3, 1, TrackerPosition.LEFT_EYE)
+    algorithms = [FakeAlgorithm(TRACKING_FAILED), FakeAlgorithm(TRACKING_FAILED), FakeAlgorithm(fallback)]
+    processor.algorithms = algorithms
+
+    result, overlays = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert result == fallback
+    assert len(overlays) == 3
+    assert [algorithm.runs for algorithm in algorithms] == [1, 1, 1]
+
+
+def test_parallel_algorithms_skip_busy_algorithms(processor):
+    slow = FakeAlgorithm(EyeData(0.1, 0.1, 1, TrackerPosition.LEFT_EYE), delay=0.2)
+    fast = FakeAlgorithm(EyeData(0.2, 0.2, 1, TrackerPosition.LEFT_EYE))
+    processor.submit_algorithm(processor.executor, slow, np.zeros((8, 8), dtype=np.uint8), Overlay((8, 8)))
+
+    # the slow algorithm is still running on the previous frame, so only the fast one runs
+    processor.algorithms = [slow, fast]
+    result, _ = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert result == fast.result
+    assert slow.runs == 1
+
+
+def test_algorithms_share_a_read_only_frame():
+    processor = EyeProcessor(TrackerConfig(), LocalFrameRing(), EyeDataSlot(), Queue())
+    algorithms = [FakeAlgorithm(TRACKING_FAILED), FakeAlgorithm(EyeData(0.1, 0.1, 1, TrackerPosition.LEFT_EYE))]
+    processor.algorithms = algorithms
+    frame = np.zeros((8, 8), dtype=np.uint8)
+
+    _, overlays = processor.run_algorithms(frame, preview=False)
+    assert [algorithm.writeable for algorithm in algorithms] == [False, False]
+    # the frame the processor got is untouched and nothing was allocated for the preview
+    assert frame.flags.writeable
+    assert not any(overlay.drawn() for overlay in overlays)
+
+    _, overlays = processor.run_algorithms(frame, preview=True)
+    assert all(overlay.drawn() for overlay in overlays)
+    assert not frame.any()
+
+
+def test_blink_order_supplies_openness(processor):
+    gaze = FakeAlgorithm(EyeData(0.1, 0.2, 1, TrackerPosition.LEFT_EYE))
+    failed = FakeAlgorithm(TRACKING_FAILED)
+    blink = FakeAlgorithm(EyeData(0.9, 0.9, 0.25, TrackerPosition.LEFT_EYE))
+    processor.algorithms = [gaze]
+    processor.blink_algorithms = [failed, blink]
+
+    result, overlays = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert (result.x, result.y, result.blink) == (0.1, 0.2, 0.25)
+    assert len(overlays) == 3
+
+    # a algorithm that already ran for the gaze isnt run again
+    processor.blink_algorithms = [gaze, blink]
+    result, _ = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert result.blink == 1
+    assert gaze.runs == 2 and blink.runs == 1
+
+
+def test_blink_order_runs_when_gaze_fails(processor):
+    gaze = FakeAlgorithm(EyeData(0.1, 0.2, 1, TrackerPosition.LEFT_EYE))
+    blink = FakeAlgorithm(EyeData(0.9, 0.9, 0.75, TrackerPosition.LEFT_EYE))
+    processor.algorithms = [gaze]
+    processor.blink_algorithms = [blink]
+
+    # no gaze yet, the openness still gets through
+    gaze.result = TRACKING_FAILED
+    result, _ = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert (result.x, result.y, result.blink) == (0.9, 0.9, 0.75)
+
+    gaze.result = EyeData(0.1, 0.2, 1, TrackerPosition.LEFT_EYE)
+    processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+
+    # the eye closes and the gaze is lost, the openness is reported with the last gaze
+    gaze.result = TRACKING_FAILED
+    blink.result = EyeData(0.9, 0.9, 0.0, TrackerPosition.LEFT_EYE)
+    result, _ = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert (result.x, result.y, result.blink) == (0.1, 0.2, 0.0)
+    assert blink.runs == 3
+
+    # nothing found at all
+    blink.result = TRACKING_FAILED
+    result, _ = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert result == TRACKING_FAILED
+
+
+def test_intensity_detects_blinks():
+    config = TrackerConfig(algorithm=AlgorithmConfig(algorithm_order=[Algorithms.HSF], blink_order=[Algorithms.INTENSITY]))
+    processor = EyeProcessor(config, LocalFrameRing(), EyeDataSlot(), Queue())
+    processor.setup_algorithms()
+    (intensity,) = processor.blink_algorithms
+    eye = SyntheticEye(SyntheticSettings(blink_interval=1))
+
+    errors = []
+    for frame_number in range(400):
+        frame, (_, _, blink) = eye.render(frame_number)
+        result = intensity.run(frame, TrackerPosition.LEFT_EYE, Overlay(frame.shape))
+        if frame_number >= config.algorithm.intensity.calibration_frames:
+            errors.append(abs(result.blink - blink))
+    assert np.mean(errors) < 0.1
+
+
+def test_adaptive_order_demotes_failing_algorithms():
+    config = TrackerConfig(algorithm=AlgorithmConfig(adaptive_order=True))
+    processor = EyeProcessor(config, LocalFrameRing(), EyeDataSlot(), Queue())
+    failing = FakeAlgorithm(TRACKING_FAILED, name="LEAP")
+    working = FakeAlgorithm(EyeData(0.1, 0.1, 1, TrackerPosition.LEFT_EYE), name="BLOB")
+    processor.algorithms = [failing, working]
+    processor.effective_order = [failing, working]
+
+    for _ in range(ADAPTIVE_PROBE_INTERVAL):
+        processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert processor.effective_order == [working, failing]
+    # after the reorder the failing algorithm only runs when it gets probed
+    assert failing.runs < ADAPTIVE_REORDER_INTERVAL + 2
+    assert working.runs == ADAPTIVE_PROBE_INTERVAL
+    # looking at the order doesnt count as a frame
+    processor.gaze_order()
+    assert processor.frame_count == ADAPTIVE_PROBE_INTERVAL
+
+
+def test_frame_budget_skips_algorithms_that_wont_finish():
+    counters = MetricCounters()
+    config = TrackerConfig(algorithm=AlgorithmConfig(frame_budget_ms=20))
+    processor = EyeProcessor(config, LocalFrameRing(), EyeDataSlot(), Queue(), counters=counters)
+    slow = FakeAlgorithm(EyeData(0.1, 0.1, 1, TrackerPosition.LEFT_EYE), name="LEAP")
+    processor.algorithm_stats.record("LEAP", True, 0.05)
+    cheap = FakeAlgorithm(EyeData(0.2, 0.2, 1, TrackerPosition.LEFT_EYE), name="BLOB")
+    processor.algorithms = [FakeAlgorithm(TRACKING_FAILED, delay=0.005, name="HSF"), slow, cheap]
+
+    result, _ = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert result == cheap.result
+    assert slow.runs == 0
+    assert counters.snapshot()["frame_budget_exceeded"] == 1
+
+
+def test_frame_budget_ignores_late_parallel_algorithms(processor):
+    processor.config = AlgorithmConfig(parallel_algorithms=2, frame_budget_ms=20)
+    slow = FakeAlgorithm(EyeData(0.1, 0.1, 1, TrackerPosition.LEFT_EYE), delay=0.2)
+    fast = FakeAlgorithm(EyeData(0.2, 0.2, 1, TrackerPosition.LEFT_EYE))
+    processor.algorithms = [slow, fast]
+
+    start = time.perf_counter()
+    result, _ = processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert time.perf_counter() - start < 0.1
+    assert result == fast.result
+
+
+def test_algorithms_over_budget_are_degraded_then_skipped():
+    counters = MetricCounters()
+    processor = EyeProcessor(TrackerConfig(), LocalFrameRing(), EyeDataSlot(), Queue(), counters=counters)
+    slow = FakeAlgorithm(EyeData(0.1, 0.1, 1, TrackerPosition.LEFT_EYE), delay=0.002, name="HSF")
+    slow.degrade = lambda: False
+    processor.algorithms = [slow, FakeAlgorithm(TRACKING_FAILED, name="BLOB")]
+    processor.budgets = {slow: 0.001}
+
+    for _ in range(OVERRUN_LIMIT + 10):
+        processor.run_algorithms(np.zeros((8, 8), dtype=np.uint8))
+    assert slow.runs == OVERRUN_LIMIT
+    assert counters.snapshot()["algorithm_overrun.HSF"] == OVERRUN_LIMIT
+    assert processor.skipped_until[slow] == OVERRUN_LIMIT + OVERRUN_SKIP_FRAMES
+
+
+def test_search_window_follows_the_pupil():
+    config = TrackerConfig(algorithm=AlgorithmConfig(search_window=True))
+    processor = EyeProcessor(config, LocalFrameRing(), EyeDataSlot(), Queue())
+    full_frame = FakeAlgorithm(TRACKING_FAILED)
+    windowed = WindowedAlgorithm(EyeData(0.2, 0.5, 1, TrackerPosition.LEFT_EYE))
+    processor.algorithms = [full_frame, windowed]
+    frame = np.zeros((100, 200), dtype=np.uint8)
+
+    # nothing to follow yet
+    result, _ = processor.run_algorithms(frame)
+    assert windowed.shape == (100, 200)
+    assert result == windowed.result
+
+    # the window is moved back into the frame at the left edge, the result is relative to the whole frame again
+    result, overlays = processor.run_algorithms(frame)
+    assert full_frame.shape == (100, 200)
+    assert windowed.shape == (50, 100)
+    assert result.x == pytest.approx(0.1)
+    assert result.y == pytest.approx(0.5)
+    assert overlays[1].layer().shape == (50, 100, 3)
+
+
+def test_search_window_falls_back_to_the_whole_frame():
+    counters = MetricCounters()
+    config = TrackerConfig(algorithm=AlgorithmConfig(search_window=True))
+    processor = EyeProcessor(config, LocalFrameRing(), EyeDataSlot(), Queue(), counters=counters)
+    windowed = WindowedAlgorithm(EyeData(0.5, 0.5, 1, TrackerPosition.LEFT_EYE))
+    processor.algorithms = [windowed]
+    frame = np.zeros((100, 100), dtype=np.uint8)
+
+    processor.run_algorithms(frame)
+    windowed.result = TRACKING_FAILED
+    processor.run_algorithms(frame)
+    assert windowed.shape == (50, 50)
+    processor.run_algorithms(frame)
+    assert windowed.shape == (100, 100)
+
+    # a blink also loses the pupil
+    windowed.result = EyeData(0.5, 0.5, 0, TrackerPosition.LEFT_EYE)
+    processor.run_algorithms(frame)
+    processor.run_algorithms(frame)
+    assert windowed.shape == (100, 100)
+
+    snapshot = counters.snapshot()
+    assert snapshot["search_window_frames"] == 1
+    assert snapshot["search_window_misses"] == 1
+
+
+def test_search_window_resets_on_blinks_from_blink_order():
+    config = TrackerConfig(algorithm=AlgorithmConfig(search_window=True))
+    processor = EyeProcessor(config, LocalFrameRing(), EyeDataSlot(), Queue())
+    # like AHSF and Blob, the gaze algorithm always reports a open eye
+    windowed = WindowedAlgorithm(EyeData(0.5, 0.5, 1, TrackerPosition.LEFT_EYE))
+    blink = FakeAlgorithm(EyeData(0.5, 0.5, 1, TrackerPosition.LEFT_EYE))
+    processor.algorithms = [windowed]
+    processor.blink_algorithms = [blink]
+    frame = np.zeros((100, 100), dtype=np.uint8)
+
+    processor.run_algorithms(frame)
+    processor.run_algorithms(frame)
+    assert windowed.shape == (50, 50)
+
+    blink.result = EyeData(0.5, 0.5, 0, TrackerPosition.LEFT_EYE)
+    processor.run_algorithms(frame)
+    assert processor.last_position is None
+    processor.run_algorithms(frame)
+    assert windowed.shape == (100, 100)
+
+
+def test_tracking_error_is_counted():
+    counters = MetricCounters()
+    processor = EyeProcessor(TrackerConfig(), LocalFrameRing(), EyeDataSlot(), Queue(), counters=counters)
+    processor.record_tracking_error(EyeData(0.5, 0.5, 1, TrackerPosition.LEFT_EYE), (0.8, 0.9, 0.75))
+    processor.record_tracking_error(EyeData(0.5, 0.5, 1, TrackerPosition.LEFT_EYE), (0.5, 0.5, 1.0))
+
+    snapshot = counters.snapshot()
+    assert snapshot["ground_truth_frames"] == 2
+    assert snapshot["tracking_error_sum"] == 500000
+    assert snapshot["blink_error_sum"] == 250000
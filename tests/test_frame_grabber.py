@@ -0,0 +1,66 @@
+from eyetrackvr_backend.utils import FrameGrabber
+import numpy as np
+import threading
+import time
+
+
+class FakeCapture:
+    """pretends to be a 200 fps stream with a decoder that takes 20ms"""
+
+    def __init__(self, frames: int = 1000):
+        self.frames = frames
+        self.grabbed = 0
+        self.busy = threading.Lock()
+
+    def grab(self) -> bool:
+        assert self.busy.acquire(blocking=False), "grab and retrieve were called at the same time"
+        try:
+            time.sleep(0.005)
+            self.grabbed += 1
+            return self.grabbed <= self.frames
+        finally:
+            self.busy.release()
+
+    def retrieve(self) -> tuple[bool, np.ndarray]:
+        assert self.busy.acquire(blocking=False), "grab and retrieve were called at the same time"
+        try:
+            time.sleep(0.02)
+            return True, np.full((4, 4), self.grabbed % 256, dtype=np.uint8)
+        finally:
+            self.busy.release()
+
+
+def test_frame_grabber_skips_old_frames():
+    grabber = FrameGrabber(FakeCapture())  # type: ignore[arg-type]
+    grabber.start()
+    try:
+        frame_numbers = []
+        for _ in range(5):
+            result = grabber.get(timeout=1)
+            assert result is not None
+            frame, timestamp, frame_number = result
+            assert int(frame[0, 0]) == frame_number % 256
+            assert timestamp <= time.perf_counter()
+            frame_numbers.append(frame_number)
+            # pretend to process the frame
+            time.sleep(0.02)
+
+        # we are slower than the stream, so frames should have been skipped instead of queueing up
+        assert frame_numbers == sorted(frame_numbers)
+        assert frame_numbers[-1] - frame_numbers[0] > 4
+        assert grabber.skipped > 0
+        assert grabber.skipped + len(frame_numbers) == frame_numbers[-1]
+    finally:
+        grabber.stop()
+    assert not grabber.is_alive()
+
+
+def test_frame_grabber_stream_ended():
+    grabber = FrameGrabber(FakeCapture(frames=3))  # type: ignore[arg-type]
+    grabber.start()
+    time.sleep(0.1)
+    assert not grabber.is_alive()
+    assert grabber.error is not None
+    # the last frame that was grabbed can still be retrieved
+    assert grabber.get(timeout=0.1) is not None
+    assert grabber.get(timeout=0.1) is None
@@ -0,0 +1,97 @@
+from eyetrackvr_backend.utils import FrameRing, LocalFrameRing
+from eyetrackvr_backend.types import DropPolicy, FrameMeta
+from queue import Empty
+import numpy as np
+import pytest
+import time
+
+
+@pytest.fixture(params=["shared", "local"])
+def ring(request):
+    ring = FrameRing(slots=4, slot_size=32 * 32) if request.param == "shared" else LocalFrameRing(slots=4)
+    yield ring
+    ring.close()
+
+
+def test_frame_ring_round_trip(ring):
+    frame = np.random.randint(0, 255, (16, 16), dtype=np.uint8)
+    meta = FrameMeta(frame_number=7, fps=60.0, uuid="a6b1c4f0-0000-4000-8000-000000000000")
+    ring.put(frame, meta)
+    assert ring.qsize() == 1
+    result, result_meta = ring.get(timeout=0.1)
+    assert np.array_equal(result, frame)
+    assert result_meta == meta
+    assert ring.qsize() == 0
+
+
+def test_frame_ring_ground_truth(ring):
+    ring.set_policy(DropPolicy.BOUNDED, max_frames=4)
+    frame = np.zeros((16, 16), dtype=np.uint8)
+    ring.put(frame, FrameMeta(frame_number=1, ground_truth=(0.25, 0.75, 1.0)))
+    ring.put(frame, FrameMeta(frame_number=2))
+    _, meta = ring.get(timeout=0.1)
+    assert meta.ground_truth == (0.25, 0.75, 1.0)
+    _, meta = ring.get(timeout=0.1)
+    assert meta.ground_truth is None
+
+
+def test_frame_ring_empty(ring):
+    with pytest.raises(Empty):
+        ring.get(block=False)
+    with pytest.raises(Empty):
+        ring.get(timeout=0.01)
+
+
+def test_frame_ring_overwrites_oldest(ring):
+    ring.set_policy(DropPolicy.BOUNDED, max_frames=4)
+    for i in range(6):
+        ring.put(np.full((8, 8), i, dtype=np.uint8), FrameMeta())
+
+    assert ring.qsize() == 4
+    assert [int(ring.get(timeout=0.1)[0][0, 0]) for _ in range(4)] == [2, 3, 4, 5]
+    assert ring.drop_counts()["overrun"] == 2
+
+
+def test_frame_ring_latest_policy(ring):
+    ring.set_policy(DropPolicy.LATEST)
+    for i in range(3):
+        ring.put(np.full((8, 8), i, dtype=np.uint8), FrameMeta())
+
+    assert int(ring.get(timeout=0.1)[0][0, 0]) == 2
+    assert ring.qsize() == 0
+    assert ring.drop_counts()[DropPolicy.LATEST] == 2
+
+
+def test_frame_ring_bounded_policy(ring):
+    ring.set_policy(DropPolicy.BOUNDED, max_frames=2)
+    for i in range(4):
+        ring.put(np.full((8, 8), i, dtype=np.uint8), FrameMeta())
+
+    assert [int(ring.get(timeout=0.1)[0][0, 0]) for _ in range(2)] == [2, 3]
+    assert ring.drop_counts()[DropPolicy.BOUNDED] == 2
+
+
+def test_frame_ring_deadline_policy(ring):
+    ring.set_policy(DropPolicy.DEADLINE, deadline=0.05)
+    ring.put(np.full((8, 8), 0, dtype=np.uint8), FrameMeta())
+    time.sleep(0.1)
+    ring.put(np.full((8, 8), 1, dtype=np.uint8), FrameMeta())
+
+    assert int(ring.get(timeout=0.1)[0][0, 0]) == 1
+    assert ring.drop_counts()[DropPolicy.DEADLINE] == 1
+
+    ring.put(np.full((8, 8), 2, dtype=np.uint8), FrameMeta())
+    time.sleep(0.1)
+    with pytest.raises(Empty):
+        ring.get(block=False)
+
+
+@pytest.mark.parametrize("shape", [(8, 8), (64, 64, 3), (16, 24)])
+def test_frame_ring_frame_size_changes(ring, shape):
+    ring.set_policy(DropPolicy.BOUNDED, max_frames=4)
+    ring.put(np.zeros((8, 8), dtype=np.uint8), FrameMeta())
+    frame = np.full(shape, 42, dtype=np.uint8)
+    ring.put(frame, FrameMeta())
+
+    assert ring.get(timeout=0.1)[0].shape == (8, 8)
+    assert np.array_equal(ring.get(timeout=0.1)[0], frame)
@@ -0,0 +1,74 @@
+from eyetrackvr_backend.processes.inference import InferenceService, LEAP_INPUT_SHAPE, LEAP_OUTPUT_SHAPE
+from types import SimpleNamespace
+import numpy as np
+
+
+class FakeSession:
+    def __init__(self, batching: bool):
+        self.batching = batching
+        self.batch_sizes: list[int] = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input")]
+
+    def run(self, outputs, inputs):
+        batch = inputs["input"]
+        if not self.batching and len(batch) > 1:
+            raise RuntimeError("Got invalid dimensions for input")
+        self.batch_sizes.append(len(batch))
+        # the landmarks are the second output, use the mean of each tensor so we can tell the results apart
+        landmarks = np.repeat(batch.mean(axis=(1, 2, 3))[:, np.newaxis], np.prod(LEAP_OUTPUT_SHAPE), axis=1)
+        return [None, landmarks]
+
+
+def run_requests(batching: bool) -> tuple[InferenceService, list]:
+    service = InferenceService(clients=2)
+    service.session = FakeSession(batching)
+    service.running.set()
+    for index, client in enumerate(service.clients):
+        assert client.submit(np.full(LEAP_INPUT_SHAPE, index + 1, dtype=np.float32))
+
+    service.process_requests()
+    return service, [client.result(timeout=0.1) for client in service.clients]
+
+
+def test_inference_service_batches_requests():
+    service, results = run_requests(batching=True)
+    assert service.session.batch_sizes == [2]
+    for index, result in enumerate(results):
+        assert result.shape == LEAP_OUTPUT_SHAPE
+        assert np.all(result == index + 1)
+
+
+def test_inference_service_falls_back_to_sequential():
+    service, results = run_requests(batching=False)
+    assert not service.batching
+    assert service.session.batch_sizes == [1, 1]
+    for index, result in enumerate(results):
+        assert np.all(result == index + 1)
+
+
+def test_inference_client_not_running():
+    service = InferenceService(clients=1)
+    assert service.clients[0].run(np.zeros(LEAP_INPUT_SHAPE, dtype=np.float32)) is None
+
+
+def test_inference_client_ignores_late_results():
+    service = InferenceService(clients=1)
+    service.session = FakeSession(batching=True)
+    service.running.set()
+    (client,) = service.clients
+    assert client.submit(np.full(LEAP_INPUT_SHAPE, 1, dtype=np.float32))
+    stale = client.sequence()
+    # we give up on the first frame and submit the next one before the service gets to the first one
+    assert client.result(timeout=0.01) is None
+    assert client.submit(np.full(LEAP_INPUT_SHAPE, 2, dtype=np.float32))
+
+    client.respond(stale, np.full(LEAP_OUTPUT_SHAPE, 1, dtype=np.float32))
+    assert client.is_pending()
+    assert client.result(timeout=0.01) is None
+
+    service.process_requests()
+    result = client.result(timeout=0.1)
+    assert result is not None and np.all(result == 2)
+    assert not client.is_pending()
@@ -0,0 +1,104 @@
+from eyetrackvr_backend.utils.metrics import (
+    AlgorithmStats,
+    LatencyRecorder,
+    MetricCounters,
+    bucket_index,
+    bucket_upper_bounds,
+    format_prometheus,
+    format_prometheus_summary,
+    BUCKETS,
+)
+from multiprocessing import Process
+import pytest
+
+
+def record_in_child(latency: LatencyRecorder) -> None:
+    for _ in range(10):
+        latency.record("capture", 0.002)
+
+
+def test_bucket_bounds():
+    upper_bounds = bucket_upper_bounds()
+    for value in [0, 1, 15, 16, 17, 31, 32, 1000, 12345, 999_999, 2**31 - 1]:
+        index = bucket_index(value)
+        assert value <= upper_bounds[index]
+        # the relative error of a bucket is at most 1/16
+        assert upper_bounds[index] - value <= max(value / 16, 1)
+    assert bucket_index(2**40) == BUCKETS - 1
+
+
+def test_latency_recorder_percentiles():
+    latency = LatencyRecorder(["stage", "unused"])
+    for ms in range(1, 101):
+        latency.record("stage", ms / 1000)
+    # unknown stages are ignored
+    latency.record("unknown", 1.0)
+
+    snapshot = latency.snapshot()
+    assert list(snapshot) == ["stage"]
+    stats = snapshot["stage"]
+    assert stats["count"] == 100
+    assert stats["mean_ms"] == pytest.approx(50.5)
+    assert stats["max_ms"] == 100
+    for percentile in [50, 95, 99]:
+        assert stats[f"p{percentile}_ms"] == pytest.approx(percentile, rel=1 / 16)
+
+
+def test_latency_recorder_shared_between_processes():
+    latency = LatencyRecorder()
+    process = Process(target=record_in_child, args=(latency,))
+    process.start()
+    process.join()
+
+    assert latency.snapshot()["capture"]["count"] == 10
+
+
+def test_metric_counters():
+    counters = MetricCounters(["frames_captured", "frames_processed"])
+    counters.increment("frames_captured")
+    counters.increment("frames_captured", 2)
+    counters.increment("unknown")
+    assert counters.snapshot() == {"frames_captured": 3, "frames_processed": 0}
+
+
+def test_format_prometheus():
+    samples = [({"tracker": 'left "eye"'}, 3), ({}, 1.5)]
+    assert format_prometheus("etvr_frames_total", "counter", "Frames", samples) == (
+        "# HELP etvr_frames_total Frames\n"
+        "# TYPE etvr_frames_total counter\n"
+        'etvr_frames_total{tracker="left \\"eye\\""} 3\n'
+        "etvr_frames_total 1.5\n"
+    )
+
+
+def test_format_prometheus_summary():
+    samples = [({"stage": "capture"}, {"0.5": 0.001, "0.99": 0.004}, 0.25, 100)]
+    assert format_prometheus_summary("etvr_latency_seconds", "Latency", samples) == (
+        "# HELP etvr_latency_seconds Latency\n"
+        "# TYPE etvr_latency_seconds summary\n"
+        'etvr_latency_seconds{stage="capture",quantile="0.5"} 0.001\n'
+        'etvr_latency_seconds{stage="capture",quantile="0.99"} 0.004\n'
+        'etvr_latency_seconds_sum{stage="capture"} 0.25\n'
+        'etvr_latency_seconds_count{stage="capture"} 100\n'
+    )
+
+
+def test_algorithm_stats_use_a_sliding_window():
+    stats = AlgorithmStats(window=4)
+    for _ in range(4):
+        stats.record("LEAP", False, 0.01)
+    assert stats.snapshot()["LEAP"]["success_rate"] == 0
+    for _ in range(4):
+        stats.record("LEAP", True, 0.002)
+    stats.record("UNKNOWN", True, 1)
+
+    snapshot = stats.snapshot()
+    assert list(snapshot) == ["LEAP"]
+    assert snapshot["LEAP"]["runs"] == 4
+    assert snapshot["LEAP"]["success_rate"] == 1
+    assert snapshot["LEAP"]["mean_ms"] == pytest.approx(2)
+    # algorithms that never ran are free, so they get tried first
+    assert stats.expected_cost("BLOB") == 0
+
+    stats.set_order(["HSF", "LEAP"])
+    assert stats.order() == ["HSF", "LEAP"]
@@ -0,0 +1,126 @@
+from eyetrackvr_backend.utils.mjpeg_client import MJPEGClient, MJPEGError, MultipartParser, split_url
+from eyetrackvr_backend.utils.packet_parser import JPEG_SOI, JPEG_EOI
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+import threading
+import pytest
+import time
+
+BOUNDARY = "123456789000000000000987654321"
+
+
+def make_image(index: int) -> bytes:
+    return JPEG_SOI + f"image {index}".encode() + JPEG_EOI
+
+
+def make_part(image: bytes, content_length: bool = True) -> bytes:
+    headers = f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+    if content_length:
+        headers += f"Content-Length: {len(image)}\r\n"
+    return headers.encode() + b"\r\n" + image + b"\r\n"
+
+
+class MJPEGServer(ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, frames_per_connection: int, content_type: str):
+        self.frames_per_connection = frames_per_connection
+        self.content_type = content_type
+        self.connections = 0
+        super().__init__(("127.0.0.1", 0), MJPEGHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/stream"
+
+
+class MJPEGHandler(StreamRequestHandler):
+    server: MJPEGServer
+
+    def handle(self) -> None:
+        self.server.connections += 1
+        while self.rfile.readline() not in (b"\r\n", b""):
+            pass
+        self.wfile.write(f"HTTP/1.1 200 OK\r\nContent-Type: {self.server.content_type}\r\n\r\n".encode())
+        for index in range(self.server.frames_per_connection):
+            self.wfile.write(make_part(make_image(index)))
+            self.wfile.flush()
+            time.sleep(0.005)
+
+
+@pytest.fixture
+def mjpeg_server(request):
+    frames, content_type = getattr(request, "param", (1000, f"multipart/x-mixed-replace; boundary={BOUNDARY}"))
+    server = MJPEGServer(frames, content_type)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize("content_length", [True, False])
+def test_multipart_parser(chunk_size, content_length):
+    images = [make_image(index) for index in range(5)]
+    # a trailing boundary, without it the last part cant be found without a content length
+    stream = b"".join(make_part(image, content_length) for image in images) + f"--{BOUNDARY}".encode()
+    parser = MultipartParser(BOUNDARY.encode())
+    parts = []
+    for i in range(0, len(stream), chunk_size):
+        parser.feed(stream[i : i + chunk_size])
+        while (part := parser.next_part()) is not None:
+            parts.append(part)
+    assert parts == images
+
+
+def test_split_url():
+    assert split_url("openiris.local") == ("openiris.local", 80, "/")
+    assert split_url("http://10.0.0.39:81/stream?fps=60") == ("10.0.0.39", 81, "/stream?fps=60")
+    with pytest.raises(MJPEGError):
+        split_url("rtsp://10.0.0.39/stream")
+
+
+def test_mjpeg_client_newest_frame(mjpeg_server):
+    client = MJPEGClient(mjpeg_server.url)
+    client.connect()
+    client.start()
+    try:
+        time.sleep(0.1)
+        result = client.get(timeout=1)
+        assert result is not None
+        image, timestamp = result
+        assert image.startswith(JPEG_SOI) and image.endswith(JPEG_EOI)
+        assert client.dropped > 0
+        newer = client.get(timeout=1)
+        assert newer is not None
+        assert int(newer[0][8:-2]) > int(image[8:-2])
+    finally:
+        client.stop()
+    assert not client.is_alive()
+    assert not client.connected
+
+
+@pytest.mark.parametrize("mjpeg_server", [(3, f"multipart/x-mixed-replace; boundary={BOUNDARY}")], indirect=True)
+def test_mjpeg_client_reconnects(mjpeg_server):
+    client = MJPEGClient(mjpeg_server.url)
+    client.start()
+    try:
+        images = []
+        start = time.perf_counter()
+        while len(images) < 6 and time.perf_counter() - start < 2:
+            if (result := client.get(timeout=0.5)) is not None:
+                images.append(result[0])
+        # every connection only serves 3 images, so we must have reconnected a few times in the meantime
+        assert len(images) == 6
+        assert mjpeg_server.connections >= 2
+        assert client.reconnects >= 2
+    finally:
+        client.stop()
+
+
+@pytest.mark.parametrize("mjpeg_server", [(1, "text/html")], indirect=True)
+def test_mjpeg_client_not_a_stream(mjpeg_server):
+    client = MJPEGClient(mjpeg_server.url)
+    with pytest.raises(MJPEGError):
+        client.connect()
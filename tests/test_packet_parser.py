@@ -0,0 +1,78 @@
+from eyetrackvr_backend.utils import PacketParser
+from eyetrackvr_backend.utils.packet_parser import ETVR_PACKET_HEADER, JPEG_SOI, JPEG_EOI
+import pytest
+
+
+def make_packet(payload: bytes) -> bytes:
+    jpeg = JPEG_SOI + payload + JPEG_EOI
+    return ETVR_PACKET_HEADER + len(jpeg).to_bytes(2, byteorder="little") + jpeg
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 2048])
+def test_packet_parser_chunked_stream(chunk_size):
+    packets = [make_packet(bytes([i]) * (100 + i)) for i in range(5)]
+    stream = b"".join(packets)
+    parser = PacketParser()
+    parsed = []
+    for i in range(0, len(stream), chunk_size):
+        parser.feed(stream[i : i + chunk_size])
+        while (packet := parser.next_packet()) is not None:
+            parsed.append(packet)
+
+    assert parsed == [packet[6:] for packet in packets]
+    assert parser.resyncs == 0
+    assert parser.corrupt == 0
+    assert parser.pending() == 0
+
+
+def test_packet_parser_keeps_remainder():
+    first, second = make_packet(b"first"), make_packet(b"second")
+    parser = PacketParser()
+    # the start of the next packet arrives in the same read as the end of the current one
+    parser.feed(first + second[:4])
+    assert parser.next_packet() == first[6:]
+    assert parser.next_packet() is None
+    parser.feed(second[4:])
+    assert parser.next_packet() == second[6:]
+
+
+def test_packet_parser_resyncs_on_garbage():
+    parser = PacketParser()
+    parser.feed(b"garbage" + make_packet(b"image"))
+    assert parser.next_packet() == JPEG_SOI + b"image" + JPEG_EOI
+    assert parser.resyncs == 1
+
+
+def test_packet_parser_skips_corrupt_packets():
+    truncated = make_packet(b"truncated" * 10)[:40]
+    valid = make_packet(b"valid")
+    parser = PacketParser()
+    # the declared size of the truncated packet reaches into the following packets
+    parser.feed(truncated + valid)
+    assert parser.next_packet() is None
+    parser.feed(b"\x00" * 100)
+    assert parser.next_packet() == valid[6:]
+    assert parser.corrupt == 1
+
+    parser.reset()
+    parser.feed(make_packet(b"no eoi")[:-2] + b"\x00\x00" + valid)
+    assert parser.next_packet() == valid[6:]
+    assert parser.corrupt == 2
+
+
+def test_packet_parser_keeps_headers_inside_of_jpegs():
+    # quantization tables and the like can contain the bytes of a header
+    packet = make_packet(b"\xff\xdb\x00\x43" + b"\xff\xa0\xff\xa1\x10\x00" + b"table")
+    parser = PacketParser()
+    parser.feed(packet + make_packet(b"next"))
+    assert parser.next_packet() == packet[6:]
+    assert parser.next_packet() == JPEG_SOI + b"next" + JPEG_EOI
+    assert parser.corrupt == 0
+    assert parser.resyncs == 0
+
+
+def test_packet_parser_latest_packet():
+    parser = PacketParser()
+    parser.feed(make_packet(b"old") + make_packet(b"new") + make_packet(b"partial")[:10])
+    assert parser.latest_packet() == JPEG_SOI + b"new" + JPEG_EOI
+    assert parser.pending() == 10
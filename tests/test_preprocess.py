@@ -0,0 +1,69 @@
+from eyetrackvr_backend.utils import mat_crop, mat_rotate
+from eyetrackvr_backend.utils.preprocess import FramePreprocessor, PreprocessSettings, scale_roi
+from dataclasses import replace
+import numpy as np
+import pytest
+import cv2
+
+
+def legacy_preprocess(frame: np.ndarray, settings: PreprocessSettings) -> np.ndarray:
+    if settings.flip_x_axis:
+        frame = cv2.flip(frame, 0)
+    if settings.flip_y_axis:
+        frame = cv2.flip(frame, 1)
+    frame = mat_rotate(frame, settings.rotation)
+    return mat_crop(*settings.roi, frame)
+
+
+@pytest.mark.parametrize("flip_x_axis", [False, True])
+@pytest.mark.parametrize("flip_y_axis", [False, True])
+@pytest.mark.parametrize("rotation", [0, 90, 33])
+@pytest.mark.parametrize("roi", [(0, 0, 0, 0), (10, 20, 64, 48), (100, 80, 200, 200)])
+def test_preprocess_matches_legacy(flip_x_axis, flip_y_axis, rotation, roi):
+    frame = np.random.randint(0, 255, (120, 160), dtype=np.uint8)
+    settings = PreprocessSettings(flip_x_axis=flip_x_axis, flip_y_axis=flip_y_axis, rotation=rotation, roi=roi)
+    preprocessor = FramePreprocessor()
+
+    for result, expected in [
+        (preprocessor.process(frame, settings), legacy_preprocess(frame, settings)),
+        (preprocessor.preview(frame, settings), legacy_preprocess(frame, replace(settings, roi=(0, 0, 0, 0)))),
+    ]:
+        assert result.shape == expected.shape
+        # warpAffine rounds a little differently depending on the transformation
+        assert np.abs(result.astype(np.int16) - expected.astype(np.int16)).max() <= 1
+
+
+def test_preprocess_border_is_white_in_color():
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    preprocessor = FramePreprocessor()
+    for settings in [PreprocessSettings(rotation=33), PreprocessSettings(rotation=33, distortion=(0, 0, 0, 0))]:
+        assert preprocessor.process(frame, settings)[0, 0].tolist() == [255, 255, 255]
+
+
+def test_preprocess_undistort():
+    frame = np.random.randint(0, 255, (120, 160), dtype=np.uint8)
+    preprocessor = FramePreprocessor()
+    # no actual distortion, the remap path should end up with the same result as the affine one
+    undistorted = preprocessor.process(frame, PreprocessSettings(rotation=90, roi=(10, 10, 50, 40), distortion=(0, 0, 0, 0)))
+    expected = preprocessor.process(frame, PreprocessSettings(rotation=90, roi=(10, 10, 50, 40)))
+    assert undistorted.shape == expected.shape == (40, 50)
+    assert np.abs(undistorted.astype(np.int16) - expected.astype(np.int16)).max() <= 1
+
+    # barrel distortion pulls the corners of the source frame towards the center of the output
+    camera_matrix = np.array([[160, 0, 79.5], [0, 160, 59.5], [0, 0, 1]])
+    distortion = (-0.3, 0.1, 0, 0, 0)
+    expected = cv2.undistort(frame, camera_matrix, np.array(distortion))
+    undistorted = preprocessor.process(frame, PreprocessSettings(distortion=distortion, focal_length=160))
+    assert np.abs(undistorted[20:100, 20:140].astype(np.int16) - expected[20:100, 20:140].astype(np.int16)).mean() < 2
+
+
+def test_scale_roi_keeps_small_rois():
+    assert scale_roi((10, 20, 64, 48), 1) == (10, 20, 64, 48)
+    assert scale_roi((10, 20, 64, 48), 2) == (5, 10, 32, 24)
+    # rounding down to 0 would turn cropping off
+    assert scale_roi((1, 1, 1, 64), 2) == (1, 1, 1, 32)
+    assert scale_roi((0, 0, 0, 0), 2) == (0, 0, 0, 0)
+
+    frame = np.random.randint(0, 255, (60, 80), dtype=np.uint8)
+    cropped = FramePreprocessor().process(frame, PreprocessSettings(roi=scale_roi((1, 3, 40, 20), 2)))
+    assert np.array_equal(cropped, frame[2:12, 1:21])
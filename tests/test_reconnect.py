@@ -0,0 +1,57 @@
+from eyetrackvr_backend.utils.reconnect import ReconnectScheduler
+import threading
+import pytest
+import time
+
+
+def test_reconnect_backoff():
+    scheduler = ReconnectScheduler(min_delay=0.1, max_delay=1.0, jitter=0.25)
+    delays = [scheduler.failed() for _ in range(8)]
+    for attempt, delay in enumerate(delays):
+        expected = min(0.1 * 2**attempt, 1.0)
+        assert expected * 0.75 <= delay <= expected * 1.25
+    assert scheduler.attempts == 8
+
+    scheduler.reset()
+    assert scheduler.attempts == 0
+    assert scheduler.wait(0)
+    # a camera that has been gone for days doesnt overflow the delay
+    scheduler.attempts = 10000
+    assert scheduler.failed() <= 1.25
+
+
+def test_reconnect_wait_times_out():
+    scheduler = ReconnectScheduler(min_delay=10, jitter=0)
+    scheduler.failed()
+    start = time.perf_counter()
+    assert not scheduler.wait(0.1)
+    assert 0.1 <= time.perf_counter() - start < 0.5
+
+
+def test_reconnect_wake():
+    scheduler = ReconnectScheduler(min_delay=10, jitter=0)
+    scheduler.failed()
+    threading.Timer(0.05, scheduler.wake).start()
+    start = time.perf_counter()
+    assert scheduler.wait(2)
+    assert time.perf_counter() - start < 1
+
+    threading.Timer(0.05, scheduler.wake).start()
+    assert scheduler.idle(2)
+    assert not scheduler.idle(0.01)
+
+
+@pytest.mark.parametrize("states, expected", [([True, True, True], False), ([False, False, True], True)])
+def test_reconnect_probe(states, expected):
+    scheduler = ReconnectScheduler(min_delay=10, jitter=0, probe_interval=0.02)
+    scheduler.failed()
+    probes = iter(states + [states[-1]] * 100)
+    calls = []
+
+    def probe():
+        calls.append(True)
+        return next(probes)
+
+    # only a device showing up counts, one that is there but refuses to connect has to wait for the backoff
+    assert scheduler.wait(0.2, probe) == expected
+    assert len(calls) <= 12
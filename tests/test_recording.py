@@ -0,0 +1,87 @@
+from eyetrackvr_backend.utils.recording import PacketRecorder, PacketRecording, ReplaySource
+import pytest
+import time
+import os
+
+
+@pytest.fixture
+def recording_path(tmp_path):
+    path = str(tmp_path / "recording.etvr")
+    recorder = PacketRecorder(path)
+    for index in range(10):
+        recorder.write(f"packet {index}".encode(), 100 + index * 0.01)
+    recorder.close()
+    return path
+
+
+def test_recording_round_trip(recording_path):
+    with PacketRecording(recording_path) as recording:
+        assert len(recording) == 10
+        for index in range(10):
+            timestamp, packet = recording[index]
+            assert timestamp == pytest.approx(index * 0.01)
+            assert bytes(packet) == f"packet {index}".encode()
+            packet.release()
+
+
+def test_recording_append_and_truncate(recording_path):
+    # pretend we crashed in the middle of writing the last packet
+    with open(recording_path, "r+b") as file:
+        file.truncate(os.path.getsize(recording_path) - 3)
+
+    recorder = PacketRecorder(recording_path)
+    recorder.write(b"appended", 5000)
+    recorder.write(b"after", 5000.5)
+    recorder.close()
+
+    with PacketRecording(recording_path) as recording:
+        assert len(recording) == 11
+        assert [recording[index][0] for index in (9, 10)] == pytest.approx([0.08, 0.58])
+
+    replay = ReplaySource(recording_path, speed=0)
+    packets = []
+    while (result := replay.get()) is not None:
+        packets.append(bytes(result[0]))
+    assert packets == [f"packet {index}".encode() for index in range(9)] + [b"appended", b"after"]
+    replay.close()
+
+
+def test_replay_as_fast_as_possible(recording_path):
+    replay = ReplaySource(recording_path, speed=0)
+    packets = []
+    while (result := replay.get()) is not None:
+        packets.append(bytes(result[0]))
+    assert packets == [f"packet {index}".encode() for index in range(10)]
+    assert replay.finished()
+    replay.close()
+
+
+def test_replay_original_timing(recording_path):
+    replay = ReplaySource(recording_path, speed=1, loop=True)
+    start = time.perf_counter()
+    for _ in range(10):
+        assert replay.get(timeout=1) is not None
+    # the packets are 10ms apart, so the last one should show up 90ms after the first one
+    assert 0.08 < time.perf_counter() - start < 0.5
+    # looping starts over with the first packet
+    result = replay.get(timeout=1)
+    assert result is not None and bytes(result[0]) == b"packet 0"
+    assert not replay.finished()
+    replay.close()
+
+
+def test_replay_speed_change_continues_from_the_current_packet(recording_path):
+    replay = ReplaySource(recording_path, speed=1)
+    for _ in range(3):
+        assert replay.get(timeout=1) is not None
+
+    # at the new speed the next packet would have been due 150ms after the start, it shouldnt stall until then
+    replay.speed = 0.2
+    start = time.perf_counter()
+    result = replay.get(timeout=1)
+    assert result is not None and bytes(result[0]) == b"packet 3"
+    assert time.perf_counter() - start < 0.03
+    assert replay.get(timeout=1) is not None
+    # the packets are 10ms apart, 50ms at a fifth of the speed
+    assert 0.04 < time.perf_counter() - start < 0.15
+    replay.close()
@@ -0,0 +1,96 @@
+from eyetrackvr_backend.processes import SerialHub, SerialHubClient
+from eyetrackvr_backend.utils import PacketParser
+from eyetrackvr_backend.utils.packet_parser import ETVR_HEADER, ETVR_HEADER_NAME, JPEG_SOI, JPEG_EOI
+import pytest
+import time
+import os
+
+
+def make_packet(payload: bytes, stream: int = 0) -> bytes:
+    jpeg = JPEG_SOI + payload + JPEG_EOI
+    header_type = bytes([ETVR_HEADER_NAME[0], ETVR_HEADER_NAME[1] + stream])
+    return ETVR_HEADER + header_type + len(jpeg).to_bytes(2, byteorder="little") + jpeg
+
+
+def test_packet_parser_streams():
+    parser = PacketParser()
+    parser.feed(make_packet(b"left", 0) + make_packet(b"right", 1) + b"\xff\xa0\xff\xb5" + make_packet(b"again", 1))
+    packets = []
+    while (packet := parser.next_packet()) is not None:
+        packets.append((parser.stream, packet))
+    # the unknown header type is skipped
+    assert packets == [(0, JPEG_SOI + b"left" + JPEG_EOI), (1, JPEG_SOI + b"right" + JPEG_EOI), (1, JPEG_SOI + b"again" + JPEG_EOI)]
+    assert parser.resyncs == 1
+
+
+def test_serial_hub_client_keeps_newest_packet():
+    client = SerialHubClient("uuid")
+    assert client.get(timeout=0.01) is None
+    for index in range(3):
+        client.publish(f"packet {index}".encode(), 100.0 + index)
+
+    assert client.get(timeout=0.01) == (b"packet 2", 102.0)
+    assert client.dropped == 2
+    assert client.get(timeout=0.01) is None
+
+    client.publish(b"packet 3", 103.0)
+    client.publish(b"packet 4", 104.0)
+    client.skip()
+    assert client.get(timeout=0.01) is None
+    assert client.dropped == 2
+
+
+@pytest.fixture
+def pty():
+    pytest.importorskip("termios")
+    master, slave = os.openpty()
+    yield master, os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+def test_serial_hub_demultiplexes_pty(pty):
+    master, port = pty
+    hub = SerialHub(["left", "right", "unused"])
+    hub.startup()
+    left, right, unused = hub.clients
+    hub.routes = {port: {0: [left], 1: [right]}}
+    try:
+        hub.update_ports()
+        assert left.connected() and right.connected() and not unused.connected()
+        # a single write with both streams interleaved, like a dual eye receiver would send them
+        os.write(master, make_packet(b"left 1", 0) + make_packet(b"right 1", 1) + make_packet(b"stray", 2))
+        left_packet, right_packet = left.get(timeout=2), right.get(timeout=2)
+        assert left_packet is not None and left_packet[0] == JPEG_SOI + b"left 1" + JPEG_EOI
+        assert right_packet is not None and right_packet[0] == JPEG_SOI + b"right 1" + JPEG_EOI
+        assert unused.get(timeout=0.05) is None
+
+        # moving a tracker to another stream only changes the routes, the port stays open
+        hub.routes = {port: {2: [left]}}
+        hub.update_ports()
+        assert left.connected() and not right.connected()
+        os.write(master, make_packet(b"right 2", 1) + make_packet(b"stream 2", 2))
+        left_packet = left.get(timeout=2)
+        assert left_packet is not None and left_packet[0] == JPEG_SOI + b"stream 2" + JPEG_EOI
+        assert right.get(timeout=0.05) is None
+
+        hub.routes = {}
+        hub.update_ports()
+        assert not left.connected()
+        assert hub.readers == {}
+    finally:
+        hub.shutdown()
+
+
+def test_serial_hub_retries_missing_port():
+    hub = SerialHub(["left"])
+    hub.startup()
+    hub.routes = {"/dev/ttyETVRMissing": {0: hub.clients}}
+    hub.update_ports()
+    assert hub.readers == {}
+    assert not hub.clients[0].connected()
+    # backing off, so the next update doesnt try again right away
+    start = time.perf_counter()
+    hub.update_ports()
+    assert time.perf_counter() - start < 0.1
+    assert hub.reconnect["/dev/ttyETVRMissing"].attempts == 1
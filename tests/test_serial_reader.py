@@ -0,0 +1,61 @@
+from eyetrackvr_backend.utils import SerialReader
+from eyetrackvr_backend.utils.packet_parser import ETVR_PACKET_HEADER, JPEG_SOI, JPEG_EOI
+from queue import Queue, Empty
+import time
+
+
+def make_packet(payload: bytes) -> bytes:
+    jpeg = JPEG_SOI + payload + JPEG_EOI
+    return ETVR_PACKET_HEADER + len(jpeg).to_bytes(2, byteorder="little") + jpeg
+
+
+class FakeSerial:
+    def __init__(self):
+        self.chunks: Queue[bytes | Exception] = Queue()
+
+    @property
+    def in_waiting(self) -> int:
+        return 0
+
+    def read(self, size: int = 1) -> bytes:
+        try:
+            chunk = self.chunks.get(timeout=0.01)
+        except Empty:
+            return b""
+        if isinstance(chunk, Exception):
+            raise chunk
+        return chunk
+
+
+def test_serial_reader_keeps_newest_packet():
+    port = FakeSerial()
+    reader = SerialReader(port)
+    reader.start()
+    try:
+        assert reader.get(timeout=0.05) is None
+        for payload in [b"one", b"two", b"three"]:
+            port.chunks.put(make_packet(payload))
+        # give the reader some time to drain the port
+        time.sleep(0.2)
+
+        result = reader.get(timeout=1)
+        assert result is not None
+        packet, timestamp = result
+        assert packet == JPEG_SOI + b"three" + JPEG_EOI
+        assert timestamp <= time.perf_counter()
+        assert reader.dropped == 2
+        assert reader.get(timeout=0.05) is None
+    finally:
+        reader.stop()
+    assert not reader.is_alive()
+
+
+def test_serial_reader_error():
+    port = FakeSerial()
+    reader = SerialReader(port)
+    reader.start()
+    port.chunks.put(OSError("device disconnected"))
+    assert reader.get(timeout=1) is None
+    time.sleep(0.05)
+    assert not reader.is_alive()
+    assert isinstance(reader.error, OSError)
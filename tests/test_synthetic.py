@@ -0,0 +1,63 @@
+from eyetrackvr_backend.utils.synthetic import SyntheticSettings, SyntheticEye, SyntheticSource, PUPIL, IRIS, SKIN
+import numpy as np
+import pytest
+
+
+def test_synthetic_settings_from_url():
+    assert SyntheticSettings.from_url("synthetic://") == SyntheticSettings()
+    settings = SyntheticSettings.from_url("synthetic://?width=320&height=200&fps=0&seed=3&noise=0")
+    assert (settings.width, settings.height, settings.fps, settings.seed, settings.noise) == (320, 200, 0, 3, 0)
+
+
+@pytest.mark.parametrize("url", ["synthetic://?colour=1", "synthetic://?width=8", "synthetic://?fps=-1", "synthetic://?seed=x"])
+def test_synthetic_settings_invalid(url):
+    with pytest.raises(ValueError):
+        SyntheticSettings.from_url(url)
+
+
+def test_synthetic_frames_are_deterministic():
+    first, second = SyntheticEye(SyntheticSettings(seed=1)), SyntheticEye(SyntheticSettings(seed=1))
+    for frame_number in [0, 10, 500]:
+        frame, truth = first.render(frame_number)
+        other_frame, other_truth = second.render(frame_number)
+        assert np.array_equal(frame, other_frame)
+        assert truth == other_truth
+
+    other_seed, _ = SyntheticEye(SyntheticSettings(seed=2)).render(0)
+    assert not np.array_equal(first.render(0)[0], other_seed)
+
+
+def test_synthetic_ground_truth_matches_frame():
+    settings = SyntheticSettings(width=200, height=160, noise=0, blink_interval=0.5)
+    eye = SyntheticEye(settings)
+    open_frames = closed_frames = 0
+    for frame_number in range(0, 600, 3):
+        frame, (x, y, blink) = eye.render(frame_number)
+        assert frame.shape == (160, 200) and frame.dtype == np.uint8
+        assert 0 < x < 1 and 0 < y < 1 and 0 <= blink <= 1
+        # median of the pixels around the center, a glint might be right on top of it
+        row, column = int(y * settings.height), int(x * settings.width)
+        value = np.median(frame[row - 5 : row + 6, column - 5 : column + 6])
+        if blink == 1:
+            open_frames += 1
+            assert value < (PUPIL + IRIS) / 2
+        elif blink < 0.05:
+            # the lid covers the pupil
+            closed_frames += 1
+            assert value > (SKIN + IRIS) / 2
+    assert open_frames > 0 and closed_frames > 0
+
+
+def test_synthetic_source_pacing():
+    source = SyntheticSource(SyntheticSettings(fps=0))
+    frame_numbers = []
+    for _ in range(5):
+        result = source.get(timeout=0)
+        assert result is not None
+        frame_numbers.append(source.frame_number)
+    assert frame_numbers == [1, 2, 3, 4, 5]
+
+    source = SyntheticSource(SyntheticSettings(fps=1))
+    assert source.get(timeout=0.01) is not None
+    # the next frame is due in a second
+    assert source.get(timeout=0.01) is None
@@ -1,5 +1,9 @@
-from eyetrackvr_backend.utils import clamp
+from eyetrackvr_backend.utils import clamp, mat_crop, mat_rotate
+from eyetrackvr_backend.utils.image_utils import decode_jpeg, reduce_frame, Overlay, draw_overlays
+from eyetrackvr_backend.types import DecodeMode, DECODE_SCALES
+import numpy as np
 import pytest
+import cv2
 
 
 @pytest.mark.parametrize(
@@ -16,3 +20,43 @@ import pytest
 )
 def test_clamp(x, low, high, expected):
     assert clamp(x, low, high) == expected
+
+
+@pytest.mark.parametrize("mode", list(DecodeMode))
+@pytest.mark.parametrize("scale", DECODE_SCALES)
+def test_decode_jpeg(mode, scale):
+    frame = np.random.randint(0, 255, (240, 236, 3), dtype=np.uint8)
+    _, jpeg = cv2.imencode(".jpg", frame)
+    decoded = decode_jpeg(jpeg.tobytes(), mode, scale)
+    assert decoded is not None
+    # decoding straight to the reduced size should look like decoding the full image and shrinking it afterwards
+    reduced = reduce_frame(cv2.imdecode(jpeg, cv2.IMREAD_COLOR), mode, scale)
+    assert decoded.shape == reduced.shape
+    assert decoded.shape[:2] == (-(-240 // scale), -(-236 // scale))
+    assert decoded.ndim == (2 if mode == DecodeMode.GRAY else 3)
+
+
+@pytest.mark.parametrize("shape", [(64, 48), (64, 48, 3)])
+def test_mat_rotate_crop(shape):
+    frame = np.random.randint(0, 255, shape, dtype=np.uint8)
+    rotated = mat_rotate(frame, 90)
+    assert rotated.shape == frame.shape
+    assert mat_crop(4, 8, 16, 24, rotated).shape == (24, 16, *shape[2:])
+    # a zero sized ROI means no cropping
+    assert mat_crop(0, 0, 0, 0, rotated) is rotated
+
+
+def test_overlay_is_drawn_on_top_of_the_frame():
+    frame = np.full((4, 6), 100, dtype=np.uint8)
+    disabled = Overlay(frame.shape, enabled=False)
+    assert disabled.layer() is None
+    overlay = Overlay(frame.shape)
+    assert not overlay.drawn()
+    overlay.layer()[1, 2] = (0, 0, 255)  # type: ignore[index]
+
+    preview = draw_overlays(frame, [disabled, overlay])
+    assert preview.shape == (4, 6, 3)
+    assert tuple(preview[1, 2]) == (0, 0, 255)
+    # black is transparent, everything else is the frame
+    assert tuple(preview[0, 0]) == (100, 100, 100)
+    assert frame.ndim == 2